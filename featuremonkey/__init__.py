@@ -1,7 +1,10 @@
 from __future__ import absolute_import
+import importlib
+import sys
+
 from featuremonkey.composer import (Composer,
     get_features_from_equation_file,
-    CompositionError)
+    CompositionError, FeatureNotFound, BrokenFeature)
 
 from featuremonkey.importhooks import ImportGuardHook
 
@@ -12,9 +15,45 @@ __author__ = 'Hendrik Speidel <hendrik@schnapptack.de>'
 add_import_guard = ImportGuardHook.add
 remove_import_guard = ImportGuardHook.remove
 
-# setup default composer and provide access to its methods at the module level
-_default_composer = Composer()
-select = _default_composer.select
-select_equation = _default_composer.select_equation
-compose = _default_composer.compose
-compose_later = _default_composer.compose_later
+# the default composer is created when it is used for the first time;
+# its methods are provided at the module level
+_default_composer = None
+_COMPOSER_METHODS = (
+    'select', 'select_equation', 'compose', 'compose_later', 'compose_instances',
+    'compose_package',
+)
+
+# public names that are imported from their module on first access
+_LAZY_ATTRIBUTES = {
+    'memoize': 'featuremonkey.caching',
+    'merge': 'featuremonkey.merging',
+    'pointcut': 'featuremonkey.pointcuts',
+    'mark': 'featuremonkey.pointcuts',
+}
+
+
+def _get_default_composer():
+    global _default_composer
+    if _default_composer is None:
+        _default_composer = Composer()
+    return _default_composer
+
+
+def __getattr__(name):
+    if name in _COMPOSER_METHODS:
+        value = getattr(_get_default_composer(), name)
+    elif name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name])
+        value = getattr(module, name)
+    else:
+        raise AttributeError(
+            'module %r has no attribute %r' % (__name__, name)
+        )
+    globals()[name] = value
+    return value
+
+
+if sys.version_info < (3, 7):
+    # no module level __getattr__ (PEP 562) - resolve everything right away
+    for _name in _COMPOSER_METHODS + tuple(_LAZY_ATTRIBUTES):
+        __getattr__(_name)
@@ -0,0 +1,5 @@
+import sys
+
+from featuremonkey.cli import main
+
+sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+caching.py - declarative caching refinements
+
+Adding a cache to a base method usually means writing a ``refine_`` closure
+by hand. ``memoize`` creates that refinement::
+
+    from featuremonkey.caching import memoize
+
+    class CachingFeature(object):
+        refine_expensive = memoize(maxsize=128, ttl=60)
+
+``memoize`` works with every kind of callable the composer can refine:
+functions, methods, staticmethods, classmethods and methods of instances.
+"""
+
+from __future__ import absolute_import
+
+import threading
+import time
+import weakref
+
+from collections import namedtuple, OrderedDict
+from functools import wraps
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+SCOPES = ('global', 'instance', 'class')
+
+_monotonic = getattr(time, 'monotonic', time.time)
+_MISSING = object()
+_KWARGS_MARK = object()
+
+
+def _default_key(*args, **kws):
+    if kws:
+        return args + (_KWARGS_MARK,) + tuple(sorted(kws.items()))
+    return args
+
+
+class _Cache(object):
+    """
+    thread-safe LRU mapping with optional time to live
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires is None or expires > _monotonic():
+                    if self.maxsize:
+                        self._data[key] = self._data.pop(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return _MISSING
+
+    def set(self, key, value):
+        expires = None if self.ttl is None else _monotonic() + self.ttl
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires)
+            if self.maxsize:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _CacheStorage(object):
+    """
+    the caches of a single refined callable, one per scope object
+    """
+
+    def __init__(self, scope, maxsize, ttl):
+        self.scope = scope
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        if scope == 'global':
+            self._global = _Cache(maxsize, ttl)
+        else:
+            self._caches = weakref.WeakKeyDictionary()
+
+    def _scope_object(self, args):
+        if not args:
+            raise TypeError(
+                'memoize scope "%s" requires the instance or class '
+                'as first argument' % self.scope
+            )
+        if self.scope == 'class' and not isinstance(args[0], type):
+            return type(args[0])
+        return args[0]
+
+    def split(self, args):
+        """
+        returns the cache for a call with ``args`` and the arguments
+        that make up the cache key
+        """
+        if self.scope == 'global':
+            return self._global, args
+        scope_object = self._scope_object(args)
+        with self._lock:
+            try:
+                cache = self._caches.get(scope_object)
+                if cache is None:
+                    cache = self._caches[scope_object] = _Cache(self.maxsize, self.ttl)
+            except TypeError:
+                raise TypeError(
+                    'memoize scope "%s" requires weak referenceable '
+                    'scope objects, got %r' % (self.scope, scope_object)
+                )
+        return cache, args[1:]
+
+    def caches(self):
+        if self.scope == 'global':
+            return [self._global]
+        with self._lock:
+            return list(self._caches.values())
+
+    def cache_info(self):
+        caches = self.caches()
+        return CacheInfo(
+            sum(cache.hits for cache in caches),
+            sum(cache.misses for cache in caches),
+            self.maxsize,
+            sum(len(cache) for cache in caches),
+        )
+
+    def cache_clear(self):
+        for cache in self.caches():
+            cache.clear()
+
+
+class memoize(object):
+    """
+    refinement factory that memoizes the refined callable.
+
+    ``maxsize``: maximum number of entries per cache (LRU eviction);
+    ``None`` means unbounded.
+
+    ``ttl``: seconds after which an entry expires; ``None`` means never.
+
+    ``key``: callable computing the cache key from the call arguments;
+    by default positional and keyword arguments are used.
+    Arguments must be hashable unless a custom key is given.
+
+    ``scope``: where the cache lives:
+
+    - ``'global'``: one cache for all calls of the refined callable
+    - ``'instance'``: one cache per instance (first argument, e.g. ``self``)
+    - ``'class'``: one cache per class (``cls`` or the class of ``self``)
+
+    For ``'instance'`` and ``'class'`` scopes the first argument is not part
+    of the cache key and the cache is dropped with its scope object.
+
+    The refined callable gets ``cache_info()``, ``cache_clear()`` and
+    ``invalidate(*args, **kws)`` attached; ``cache_info()`` and
+    ``cache_clear()`` of the ``memoize`` object cover every callable
+    it has refined.
+    """
+
+    def __init__(self, maxsize=None, ttl=None, key=None, scope='global'):
+        if scope not in SCOPES:
+            raise ValueError(
+                'invalid memoize scope %r; use one of %s' % (scope, ', '.join(SCOPES))
+            )
+        if maxsize is not None and maxsize < 1:
+            raise ValueError('maxsize must be a positive number or None')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.key = key or _default_key
+        self.scope = scope
+        self._storages = []
+
+    def __call__(self, original):
+        storage = _CacheStorage(self.scope, self.maxsize, self.ttl)
+        self._storages.append(storage)
+        make_key = self.key
+
+        @wraps(original)
+        def memoized(*args, **kws):
+            cache, key_args = storage.split(args)
+            key = make_key(*key_args, **kws)
+            value = cache.get(key)
+            if value is _MISSING:
+                value = original(*args, **kws)
+                cache.set(key, value)
+            return value
+
+        def invalidate(*args, **kws):
+            """
+            drop the cache entry for a call with the given arguments
+            """
+            cache, key_args = storage.split(args)
+            cache.discard(make_key(*key_args, **kws))
+
+        memoized.cache_info = storage.cache_info
+        memoized.cache_clear = storage.cache_clear
+        memoized.invalidate = invalidate
+        return memoized
+
+    def cache_info(self):
+        infos = [storage.cache_info() for storage in self._storages]
+        return CacheInfo(
+            sum(info.hits for info in infos),
+            sum(info.misses for info in infos),
+            self.maxsize,
+            sum(info.currsize for info in infos),
+        )
+
+    def cache_clear(self):
+        for storage in self._storages:
+            storage.cache_clear()
@@ -0,0 +1,326 @@
+"""
+cli.py - the ``featuremonkey`` command line tool
+
+Subcommands working on equation files::
+
+    featuremonkey validate product.equation [more.equation ...]
+    featuremonkey profile product.equation
+    featuremonkey trace product.equation -o product.trace
+    featuremonkey warm product.equation
+    featuremonkey bench product.equation
+    featuremonkey stats product.equation --watch '*.render' --max-depth 3
+    featuremonkey prefork product.equation --workers 4
+    featuremonkey diff old.equation new.equation
+
+- ``validate`` reports all conflicts of a product without composing it
+- ``profile`` shows the startup cost of each feature (import and select)
+- ``trace`` writes the serialized operation log in the binary trace format
+  (see ``featuremonkey.tracing.binary``) or as json
+- ``warm`` compiles the sources of the selected features to bytecode
+- ``bench`` estimates the per call overhead of the most refined attributes
+  and, given ``--call`` expressions, times real calls against the bottom
+  layer of the called attribute
+- ``stats`` reports the composition metrics (see ``featuremonkey.metrics``)
+  and fails if a watched chain is deeper than allowed
+- ``prefork`` forks workers after composing and reports their shared and
+  private memory (see ``featuremonkey.prefork``)
+- ``diff`` reports the attributes whose layers differ between two products,
+  given as equation files (analyzed statically) or binary trace files
+
+Features are imported from the current directory, ``sys.path`` and the
+directories given with ``--path``. Commands exit with status 1 if they
+find problems.
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import os
+import sys
+import time
+
+from .composer import Composer, get_features_from_equation_file
+
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+def _validate(args):
+    from .validation import validate_equations
+    results = validate_equations(args.equations, args.processes)
+    status = 0
+    for filename in args.equations:
+        conflicts = results[filename]
+        print('%s: %d conflict(s)' % (filename, len(conflicts)))
+        for conflict in conflicts:
+            print('  %s' % (conflict,))
+        if conflicts:
+            status = 1
+    return status
+
+
+def _profile(args):
+    composer = Composer()
+    timings = []
+    total_start = _timer()
+    for feature_name in get_features_from_equation_file(args.equation):
+        operations = sum(count for count, _ in composer.stats.operations.values())
+        start = _timer()
+        composer.select(feature_name)
+        elapsed = _timer() - start
+        operations = sum(count for count, _ in composer.stats.operations.values()) - operations
+        timings.append((feature_name, elapsed, operations))
+    total = _timer() - total_start
+    if args.sort:
+        timings.sort(key=lambda timing: -timing[1])
+    print('%10s %6s %10s  %s' % ('ms', '%', 'operations', 'feature'))
+    for feature_name, elapsed, operations in timings:
+        print('%10.3f %6.1f %10d  %s' % (
+            elapsed * 1000, 100 * elapsed / total if total else 0, operations, feature_name
+        ))
+    print('%10.3f %6.1f %10s  total' % (total * 1000, 100, ''))
+    return 0
+
+
+def _trace(args):
+    from .tracing.logger import OperationLogger
+    from .tracing.serializer import SerializationBudget, serialize_operation_log
+    logger = OperationLogger()
+    logger.operation_log = []
+    composer = Composer()
+    composer.composition_tracer = logger
+    if args.filter:
+        from .tracing.filters import TraceFilter
+        composer.trace_filter = TraceFilter.parse(args.filter)
+    composer.select_equation(args.equation)
+    budget = SerializationBudget(
+        max_depth=args.max_depth, max_items=args.max_items, max_bytes=args.max_bytes
+    )
+    operation_log = serialize_operation_log(logger.operation_log, budget)
+    if args.json:
+        import io
+        import json
+        with io.open(args.output, 'w', encoding='utf-8') as output:
+            output.write(json.dumps(
+                operation_log, sort_keys=True, ensure_ascii=False, default=repr
+            ))
+    else:
+        from .tracing.binary import dump_operation_log
+        dump_operation_log(operation_log, args.output)
+    print('%d operations written to %s' % (len(operation_log), args.output))
+    return 0
+
+
+def _warm(args):
+    import compileall
+    from .fingerprint import feature_sources
+    status = 0
+    for feature_name in get_features_from_equation_file(args.equation):
+        compiled = failed = 0
+        for relative, path, _ in feature_sources(feature_name):
+            if not path.endswith('.py'):
+                continue
+            if compileall.compile_file(path, quiet=1, force=args.force):
+                compiled += 1
+            else:
+                failed += 1
+        print('%s: %d file(s) compiled%s' % (
+            feature_name, compiled, ', %d failed' % failed if failed else ''
+        ))
+        if failed:
+            status = 1
+    return status
+
+
+def _parse_call(call, namespace):
+    """
+    returns ``(obj, name, args, kws)`` of the call expression ``call``,
+    e.g. ``'clibase.Greeter().greet("Joe")'``. the object and the arguments
+    are evaluated once, in ``namespace``.
+    """
+    import ast
+    try:
+        node = ast.parse(call.strip(), mode='eval').body
+    except SyntaxError as e:
+        raise ValueError('invalid call %r: %s' % (call, e))
+    if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+        raise ValueError('invalid call %r: expected <object>.<attribute>(<arguments>)' % call)
+    name = node.func.attr
+    obj = eval(compile(ast.Expression(node.func.value), '<call>', 'eval'), namespace)
+    # evaluates the arguments with the syntax of the call
+    node.func = ast.Name(id='_arguments', ctx=ast.Load())
+    namespace['_arguments'] = lambda *args, **kws: (args, kws)
+    args, kws = eval(
+        compile(ast.fix_missing_locations(ast.Expression(node)), '<call>', 'eval'), namespace
+    )
+    return obj, name, args, kws
+
+
+def _time_call(func, args, kws):
+    """
+    returns the time per call of ``func(*args, **kws)`` in seconds
+    """
+    import timeit
+    timer = timeit.Timer(lambda: func(*args, **kws))
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= 0.02:
+            break
+        number *= 10
+    return min([elapsed] + timer.repeat(4, number)) / number
+
+
+def _bench(args):
+    from .layers import layers, original
+    composer = Composer()
+    composer.select_equation(args.equation)
+    stats = composer.stats
+    layer_cost = stats.layer_cost()
+    print('per layer (estimated): %.3f us' % (layer_cost * 1e6))
+    print('%6s %16s  %s' % ('depth', 'est. overhead us', 'attribute'))
+    for target, attribute, depth in stats.deepest(args.count):
+        print('%6d %16.3f  %s.%s' % (depth, depth * layer_cost * 1e6, target, attribute))
+    if not args.call:
+        return 0
+    # measured: the composed attribute against its bottom layer
+    namespace = {}
+    for statement in args.setup:
+        exec(statement, namespace)
+    print('%6s %10s %12s  %s' % ('depth', 'call us', 'overhead us', 'call'))
+    for call in args.call:
+        obj, name, call_args, call_kws = _parse_call(call, namespace)
+        composed = _time_call(getattr(obj, name), call_args, call_kws)
+        bottom = _time_call(original(obj, name), call_args, call_kws)
+        print('%6d %10.3f %12.3f  %s' % (
+            len(layers(obj, name)) - 1, composed * 1e6, max(composed - bottom, 0.0) * 1e6, call
+        ))
+    return 0
+
+
+def _stats(args):
+    import warnings
+    from .metrics import ChainDepthWarning
+    composer = Composer()
+    if args.watch:
+        composer.stats.watch(args.watch, args.max_depth)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ChainDepthWarning)
+        composer.select_equation(args.equation)
+    print(composer.stats.report(args.count))
+    return 1 if composer.stats.violations() else 0
+
+
+def _prefork(args):
+    from .prefork import benchmark, format_usage
+    composer = Composer()
+    composer.select_equation(args.equation)
+    results = benchmark(args.workers, composer=composer, freeze=not args.no_freeze)
+    print(format_usage(results))
+    return 0
+
+
+def _diff(args):
+    from .diff import diff
+    from .static import analyze_equation
+    from .tracing.binary import MAGIC, TraceReader
+    products = []
+    try:
+        for filename in (args.old, args.new):
+            with open(filename, 'rb') as product_file:
+                is_trace = product_file.read(len(MAGIC)) == MAGIC
+            products.append(TraceReader(filename) if is_trace else analyze_equation(filename))
+        product_diff = diff(*products)
+    finally:
+        for product in products:
+            if isinstance(product, TraceReader):
+                product.close()
+    print(product_diff.format() or 'no differences')
+    return 1 if product_diff else 0
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog='featuremonkey',
+        description='validate, profile, trace, warm, bench, stats, prefork and diff feature oriented products',
+    )
+    parser.add_argument(
+        '-p', '--path', action='append', default=[],
+        help='additional directory to import features from',
+    )
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    validate = subparsers.add_parser('validate', help='report all conflicts of products')
+    validate.add_argument('equations', nargs='+', metavar='equation')
+    validate.add_argument('--processes', type=int, default=None,
+                          help='number of worker processes for many equations')
+    validate.set_defaults(handler=_validate)
+
+    profile = subparsers.add_parser('profile', help='startup cost per feature')
+    profile.add_argument('equation')
+    profile.add_argument('--sort', action='store_true', help='most expensive features first')
+    profile.set_defaults(handler=_profile)
+
+    trace = subparsers.add_parser('trace', help='write the operation log of a product')
+    trace.add_argument('equation')
+    trace.add_argument('-o', '--output', required=True)
+    trace.add_argument('--json', action='store_true', help='write json instead of the binary format')
+    trace.add_argument('--filter', help='trace matching operations only, e.g. "bases=app.*;operations=refinement"')
+    trace.add_argument('--max-depth', type=int, default=4)
+    trace.add_argument('--max-items', type=int, default=1000)
+    trace.add_argument('--max-bytes', type=int, default=256 * 1024)
+    trace.set_defaults(handler=_trace)
+
+    warm = subparsers.add_parser('warm', help='compile the sources of the selected features')
+    warm.add_argument('equation')
+    warm.add_argument('--force', action='store_true', help='recompile up to date files, too')
+    warm.set_defaults(handler=_warm)
+
+    bench = subparsers.add_parser('bench', help='per call overhead of the most refined attributes')
+    bench.add_argument('equation')
+    bench.add_argument('--count', type=int, default=10)
+    bench.add_argument(
+        '--call', action='append', default=[],
+        help='time a call of a composed attribute, e.g. "app.models.Order().save()"',
+    )
+    bench.add_argument(
+        '-s', '--setup', action='append', default=[],
+        help='statement run once before the calls, e.g. "import app.models"',
+    )
+    bench.set_defaults(handler=_bench)
+
+    stats = subparsers.add_parser('stats', help='composition metrics of a product')
+    stats.add_argument('equation')
+    stats.add_argument(
+        '--watch', action='append', default=[], metavar='PATTERN',
+        help='check the chain depth of matching attributes (<target>.<attribute>)',
+    )
+    stats.add_argument('--max-depth', type=int, default=3,
+                       help='maximum chain depth of watched attributes')
+    stats.add_argument('--count', type=int, default=10, help='number of entries per table')
+    stats.set_defaults(handler=_stats)
+
+    prefork = subparsers.add_parser('prefork', help='memory of workers forked after composing')
+    prefork.add_argument('equation')
+    prefork.add_argument('--workers', type=int, default=4)
+    prefork.add_argument('--no-freeze', action='store_true', help='do not gc.freeze() before forking')
+    prefork.set_defaults(handler=_prefork)
+
+    diff = subparsers.add_parser('diff', help='attributes whose layers differ between two products')
+    diff.add_argument('old', help='equation or binary trace file')
+    diff.add_argument('new', help='equation or binary trace file')
+    diff.set_defaults(handler=_diff)
+    return parser
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    for path in [os.getcwd()] + args.path:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
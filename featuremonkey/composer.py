@@ -5,13 +5,16 @@ composer.py - feature oriented composition of python code
 from __future__ import absolute_import, print_function, unicode_literals
 
 import importlib
-import inspect
 import os
 import sys
+import time
+import types
 
 from .helpers import (
-    _delegate, _is_class_instance, _get_role_name,
-    _get_base_name, _get_method, _extract_classmethod, _extract_staticmethod
+    _delegate, _is_class_instance, _get_role_name, _get_role_key,
+    _get_base_name, _get_method, _get_raw_attribute,
+    _extract_classmethod, _extract_staticmethod, _set_pickle_identity,
+    _find_module_file, _get_layer_chain, _set_layer_chain,
 )
 from .importhooks import LazyComposerHook
 
@@ -42,42 +45,216 @@ def get_features_from_equation_file(filename):
     return features
 
 
+def _iter_package_modules(paths, prefix=''):
+    """
+    yields the names of all modules below the package directories ``paths``
+    relative to the package, starting with ``''`` for the package itself.
+    parents are yielded before their children. nothing is imported.
+
+    pkgutil is imported here as it is only needed when packages are composed.
+    """
+    import pkgutil
+    yield prefix
+    for _, name, is_package in sorted(pkgutil.iter_modules(paths), key=lambda m: m[1]):
+        relative_name = prefix + '.' + name if prefix else name
+        if is_package:
+            subpaths = [
+                os.path.join(path, name) for path in paths
+                if os.path.isdir(os.path.join(path, name))
+            ]
+            for submodule_name in _iter_package_modules(subpaths, relative_name):
+                yield submodule_name
+        else:
+            yield relative_name
+
+
+def _getargspec(func):
+    """
+    returns ``(args, varargs, keywords, defaults)`` of ``func``.
+
+    inspect is imported here as it is only needed when features are selected.
+    """
+    import inspect
+    if hasattr(inspect, 'getfullargspec'):
+        spec = inspect.getfullargspec(func)
+        return (
+            spec.args, spec.varargs,
+            spec.varkw or spec.kwonlyargs, spec.defaults
+        )
+    return inspect.getargspec(func)
+
+
 class CompositionError(Exception):
     pass
 
 
+class FeatureNotFound(CompositionError, ImportError):
+    """
+    the selected feature does not exist
+    """
+
+
+class BrokenFeature(CompositionError, ImportError):
+    """
+    the selected feature exists but cannot be imported,
+    e.g. because it lacks a feature.py or imports a missing module
+    """
+
+
+def _is_missing(error, module_name):
+    """
+    tells whether ImportError ``error`` means that ``module_name``
+    (and not something it imports) does not exist
+    """
+    missing = getattr(error, 'name', None)
+    if missing is None:
+        # python 2: ImportError does not name the module
+        return _find_module_file(module_name) is None
+    return module_name == missing or module_name.startswith(missing + '.')
+
+
+def _pop_force(options):
+    force = options.pop('force', False)
+    if options:
+        raise TypeError('unexpected keyword argument %r' % sorted(options)[0])
+    return force
+
+
 class LoggerDoesNotExist(Exception):
     message = """The logger ({logger}) set in the COMPOSITION_TRACER environment variable does not exist.\n
               Make sure the entered module/class exists, has the correct format ("path.to.module.LoggerClass")\n
               Unset the variable to use default logger (NullOperationLogger)."""
 
 
-# prevent errors; in case there is no operation logger defined, use the NullOperationLogger
-if not os.environ.get('COMPOSITION_TRACER'):
-    os.environ['COMPOSITION_TRACER'] = 'featuremonkey.tracing.logger.NullOperationLogger'
+_timer = getattr(time, 'perf_counter', time.time)
+
+# used if the COMPOSITION_TRACER environment variable is not set
+DEFAULT_COMPOSITION_TRACER = 'featuremonkey.tracing.logger.NullOperationLogger'
+
+
+class _DeferredComposition(object):
+    """
+    composes the fsts queued by compose_later once their module is imported,
+    on behalf of ``composer`` and attributed to the feature that queued them
+    """
+
+    def __init__(self, composer, feature):
+        self.composer = composer
+        self.feature = feature
+
+    def compose(self, *things):
+        composer = self.composer
+        previous_feature = composer._active_feature
+        composer._active_feature = self.feature
+        composer._compose_depth += 1
+        try:
+            return composer.compose(*things)
+        finally:
+            composer._compose_depth -= 1
+            composer._active_feature = previous_feature
 
 
 class Composer(object):
 
     def __init__(self):
-        logger_class = self._get_logger_class()
-        if logger_class:
-            self.composition_tracer = logger_class()
-        else:
-            raise LoggerDoesNotExist(LoggerDoesNotExist.message.format(
-                logger=os.environ['COMPOSITION_TRACER']
-            ))
+        # name of the feature whose select() is currently running, if any
+        self._active_feature = None
+        # resolved on first use, see composition_tracer
+        self._composition_tracer = None
+        # (base class, role keys) -> (generated subclass, roles), see compose_instances.
+        # keeps configured roles alive, so their ids are not reused
+        self._composed_subclasses = {}
+        # nesting level of compose calls
+        self._compose_depth = 0
+        # selections and compositions made outside of features in order,
+        # i.e. everything needed to recreate the product (see featuremonkey.workers)
+        self._product = []
+        # names of the modules composed by this composer
+        self._composed_modules = set()
+        # created on first use, see stats
+        self._stats = None
+        # callables getting every new method layer (see _hook_layer)
+        self._layer_hooks = []
+        # optional featuremonkey.registry.FeatureRegistry consulted by select
+        self.registry = None
+        # keys of the compositions applied so far -> role (or its class),
+        # see _composition_key. an entry goes away with its configured role,
+        # so the id in its key cannot be reused while it exists
+        import weakref
+        self._applied = weakref.WeakValueDictionary()
+        # keys of the features selected so far, see _selection_key
+        self._selected = set()
+        # whether compositions are applied again (compose/select with force=True)
+        self._force = False
+        # see trace_filter
+        self._trace_filter = None
+        self._is_traced = None
+        trace_filter = os.environ.get('COMPOSITION_TRACE_FILTER')
+        if trace_filter:
+            from .tracing.filters import TraceFilter
+            self.trace_filter = TraceFilter.parse(trace_filter)
+
+    @property
+    def stats(self):
+        """
+        ``featuremonkey.metrics.CompositionStats`` of this composer
+        """
+        if self._stats is None:
+            from .metrics import CompositionStats
+            self._stats = CompositionStats()
+        return self._stats
+
+    @property
+    def composition_tracer(self):
+        """
+        the operation logger given by the COMPOSITION_TRACER environment variable.
+
+        The tracer is imported when the first composition happens,
+        so importing featuremonkey stays cheap.
+        """
+        if self._composition_tracer is None:
+            self._composition_tracer = self._get_logger_class()()
+        return self._composition_tracer
+
+    @composition_tracer.setter
+    def composition_tracer(self, tracer):
+        self._composition_tracer = tracer
+
+    @property
+    def trace_filter(self):
+        """
+        ``featuremonkey.tracing.filters.TraceFilter`` selecting the operations
+        passed to the composition tracer; ``None`` traces everything.
+        Defaults to the COMPOSITION_TRACE_FILTER environment variable.
+        """
+        return self._trace_filter
+
+    @trace_filter.setter
+    def trace_filter(self, trace_filter):
+        self._trace_filter = trace_filter
+        self._is_traced = None if trace_filter is None else trace_filter.compile()
+
+    def _traced(self, operation):
+        """
+        whether ``operation`` is passed to the composition tracer
+        """
+        return self._is_traced is None or self._is_traced(operation)
 
     def _get_logger_class(self):
-        logger_module = '.'.join(os.environ['COMPOSITION_TRACER'].split('.')[:-1])
-        logger_class_name = os.environ['COMPOSITION_TRACER'].split('.')[-1]
+        logger_path = os.environ.get('COMPOSITION_TRACER') or DEFAULT_COMPOSITION_TRACER
+        logger_module, _, logger_class_name = logger_path.rpartition('.')
         try:
             class_module = importlib.import_module(logger_module)
-        except ImportError:
+        except (ImportError, ValueError):
+            raise LoggerDoesNotExist(LoggerDoesNotExist.message.format(
+                logger=logger_path
+            ))
+        logger_class = getattr(class_module, logger_class_name, None)
+        if logger_class is None:
             raise LoggerDoesNotExist(LoggerDoesNotExist.message.format(
-                logger=os.environ['COMPOSITION_TRACER']
+                logger=logger_path
             ))
-        return getattr(class_module, logger_class_name, None)
+        return logger_class
 
     def _introduce(self, role, target_attrname, transformation, base):
         if hasattr(base, target_attrname):
@@ -94,8 +271,11 @@ class Composer(object):
             target_attrname=target_attrname,
             role=_get_role_name(role),
             base=_get_base_name(base),
+            feature=self._active_feature,
         )
-        self.composition_tracer.log(operation=operation, old_value=getattr(base, target_attrname, None))
+        traced = self._traced(operation)
+        if traced:
+            self.composition_tracer.log(operation=operation, old_value=getattr(base, target_attrname, None))
         if callable(transformation):
             evaluated_trans = transformation()
             if not callable(evaluated_trans):
@@ -107,13 +287,18 @@ class Composer(object):
                         _get_base_name(base),
                     )
                 )
-            method = _get_method(evaluated_trans, base)
+            _set_pickle_identity(evaluated_trans, base, target_attrname)
+            method = self._hook_layer(
+                operation, _get_method(evaluated_trans, base), base, target_attrname
+            )
             setattr(base, target_attrname, method)
+            _set_layer_chain(base, target_attrname, (), operation)
             new_value = method
         else:
             setattr(base, target_attrname, transformation)
             new_value = transformation
-        self.composition_tracer.log_new_value(operation=operation, new_value=new_value)
+        if traced:
+            self.composition_tracer.log_new_value(operation=operation, new_value=new_value)
 
     def _refine(self, role, target_attrname, transformation, base):
         if not hasattr(base, target_attrname):
@@ -130,17 +315,22 @@ class Composer(object):
             target_attrname=target_attrname,
             role=_get_role_name(role),
             base=_get_base_name(base),
+            feature=self._active_feature,
         )
         # In some cases the attribute refinement causes the old value to change, too (reference).
         # Therefore, the value needs to be tracked (and so copied) before the refinement
-        self.composition_tracer.log(operation=operation, old_value=getattr(base, target_attrname, None))
+        traced = self._traced(operation)
+        if traced:
+            self.composition_tracer.log(operation=operation, old_value=getattr(base, target_attrname, None))
         if callable(transformation):
             baseattr = getattr(base, target_attrname)
             if callable(baseattr):
-                wrapper = self._create_refinement_wrapper(
+                below = _get_layer_chain(base, target_attrname)
+                wrapper = self._hook_layer(operation, self._create_refinement_wrapper(
                     transformation, baseattr, base, target_attrname
-                )
+                ), base, target_attrname)
                 setattr(base, target_attrname, wrapper)
+                _set_layer_chain(base, target_attrname, below, operation)
                 new_value = transformation
             else:
                 evaluated_trans = transformation(baseattr)
@@ -149,7 +339,19 @@ class Composer(object):
         else:
             setattr(base, target_attrname, transformation)
             new_value = transformation
-        self.composition_tracer.log_new_value(operation=operation, new_value=new_value)
+        if traced:
+            self.composition_tracer.log_new_value(operation=operation, new_value=new_value)
+
+    def _hook_layer(self, operation, layer, base, target_attrname):
+        """
+        passes a new layer (refinement wrapper or introduced method) through
+        the layer hooks. each hook is called as
+        ``hook(operation, layer, base, target_attrname)`` and returns the
+        layer to use instead, e.g. ``featuremonkey.coverage`` adds probes.
+        """
+        for hook in self._layer_hooks:
+            layer = hook(operation, layer, base, target_attrname)
+        return layer
 
     @staticmethod
     def _create_refinement_wrapper(transformation, baseattr, base, target_attrname):
@@ -164,10 +366,7 @@ class Composer(object):
         special_refinement_type=None
         instance_refinement = _is_class_instance(base)
 
-        if instance_refinement:
-            dictelem = base.__class__.__dict__.get(target_attrname, None)
-        else:
-            dictelem = base.__dict__.get(target_attrname, None)
+        dictelem = _get_raw_attribute(base, target_attrname)
 
         if isinstance(dictelem, staticmethod):
             special_refinement_type = 'staticmethod'
@@ -193,6 +392,9 @@ class Composer(object):
         if not wrapper.__doc__:
             wrapper.__doc__ = baseattr.__doc__
 
+        # make the wrapper picklable by reference
+        _set_pickle_identity(wrapper, base, target_attrname)
+
         # step three: make wrapper ready for injection
         if special_refinement_type == 'staticmethod':
             wrapper = staticmethod(wrapper)
@@ -205,29 +407,158 @@ class Composer(object):
         return wrapper
 
     def _apply_transformation(self, role, base, transformation, attrname):
+        start = _timer()
         if attrname.startswith('introduce_'):
+            operation_type = 'introduction'
             target_attrname = attrname[len('introduce_'):]
             self._introduce(role, target_attrname, transformation, base)
         elif attrname.startswith('refine_'):
+            operation_type = 'refinement'
             target_attrname = attrname[len('refine_'):]
             self._refine(role, target_attrname, transformation, base)
         elif attrname.startswith('child_'):
+            operation_type = 'child'
             target_attrname = attrname[len('child_'):]
-            refinement = transformation()
-            self.compose(refinement, getattr(base, target_attrname))
+            self._compose_child(role, target_attrname, transformation, base)
+        elif attrname.startswith('merge_'):
+            operation_type = 'merge'
+            target_attrname = attrname[len('merge_'):]
+            self._merge(role, target_attrname, transformation, base)
+        else:
+            return
+        self.stats.record(
+            operation_type, _get_base_name(base), target_attrname, _timer() - start
+        )
+
+    def _merge(self, role, target_attrname, transformation, base):
+        if not hasattr(base, target_attrname):
+            raise CompositionError(
+                'Cannot merge "%s" of "%s" by "%s"!'
+                ' Attribute does not exist in original!' % (
+                    target_attrname,
+                    _get_base_name(base),
+                    _get_role_name(role),
+                )
+            )
+        from .merging import apply_merge
+        operation = dict(
+            type='merge',
+            target_attrname=target_attrname,
+            role=_get_role_name(role),
+            base=_get_base_name(base),
+            feature=self._active_feature,
+        )
+        # merges are traced as deltas; copying the container is what they avoid
+        traced = self._traced(operation)
+        if traced:
+            self.composition_tracer.log(operation=operation, old_value=None)
+        delta = apply_merge(
+            getattr(base, target_attrname),
+            transformation,
+            lambda: 'Cannot merge "%s" from "%s" into "%s"!' % (
+                target_attrname,
+                _get_role_name(role),
+                _get_base_name(base),
+            )
+        )
+        if traced:
+            self.composition_tracer.log_new_value(operation=operation, new_value=delta)
+
+    def _compose_child(self, role, target_attrname, transformation, base):
+        refinement = transformation()
+        self.compose(refinement, getattr(base, target_attrname))
+
+    def _composition_key(self, role, base):
+        '''
+        identity of the composition of role onto base. instances are
+        composed one by one and never considered as applied already.
+        role instances without state are identified by their class,
+        configured ones by identity, see _get_role_key.
+        '''
+        if _is_class_instance(base):
+            return None
+        return (_get_role_key(role), base, self._active_feature)
+
+    def _remember(self, key, role):
+        '''
+        marks the composition ``key`` of ``role`` as applied
+        '''
+        if _get_role_key(role) is getattr(role, '__class__', None):
+            # the class stands for all roles without state
+            role = role.__class__
+        try:
+            self._applied[key] = role
+        except TypeError:
+            # not weakly referenceable: not deduplicated
+            pass
+
+    def _selection_key(self, feature_name):
+        '''
+        identity of the selection of a feature
+        '''
+        return feature_name
 
     def _compose_pair(self, role, base):
         '''
         composes onto base by applying the role
         '''
+        key = self._composition_key(role, base)
+        if key is not None and key in self._applied and not self._force:
+            # e.g. a feature selected twice: do not stack identical layers
+            return base
+        if isinstance(base, types.ModuleType):
+            self._composed_modules.add(base.__name__)
+        elif _is_class_instance(base):
+            self.stats.record_instances(1)
         # apply transformations in role to base
+        instance_layers = []
+        pointcuts = []
         for attrname in dir(role):
             transformation = getattr(role, attrname)
+            if attrname.startswith('pointcut_'):
+                pointcuts.append((attrname, transformation))
+                continue
             self._apply_transformation(role, base, transformation, attrname)
-
+            if _is_class_instance(base) and callable(transformation):
+                for prefix in ('introduce_', 'refine_', 'merge_'):
+                    if attrname.startswith(prefix):
+                        target_attrname = attrname[len(prefix):]
+                        if callable(getattr(base, '__dict__', {}).get(target_attrname)):
+                            instance_layers.append((attrname, target_attrname))
+                        break
+        if pointcuts:
+            # after the other transformations, so introduced methods match too
+            from .pointcuts import match_pointcuts
+            pointcut_names = dict((id(pointcut), attrname) for attrname, pointcut in pointcuts)
+            matches = match_pointcuts(base, [pointcut for _, pointcut in pointcuts])
+            for target_attrname, pointcut in matches:
+                self._apply_transformation(
+                    role, base, pointcut.refinement, 'refine_' + target_attrname
+                )
+                if _is_class_instance(base):
+                    instance_layers.append((pointcut_names[id(pointcut)], target_attrname))
+        if instance_layers:
+            self._record_instance_layers(base, role, instance_layers)
+        if key is not None:
+            self._remember(key, role)
         return base
 
-    def compose(self, *things):
+    def _record_instance_layers(self, base, role, layers):
+        '''
+        remembers how the instance base was composed, so it can be pickled
+        '''
+        from .pickling import record_instance_layers
+        record_instance_layers(base, role, layers)
+
+    def _forced(self, force, func, *args):
+        previous_force = self._force
+        self._force = previous_force or force
+        try:
+            return func(*args)
+        finally:
+            self._force = previous_force
+
+    def compose(self, *things, **options):
         '''
         compose applies multiple fsts onto a base implementation.
         Pass the base implementation as last parameter.
@@ -239,7 +570,25 @@ class Composer(object):
             introduce_foo = 'bar'
 
         compose(MyFST(), MyClass)
+
+        Composing the same fst onto the same module or class again within
+        the same feature is a no-op. Pass ``force=True`` to apply it anyway.
+        Role instances without attributes count as the same fst if they
+        are of the same class, configured role instances (e.g. ``Timeout(5)``)
+        only while they are the same, living object.
         '''
+        force = _pop_force(options)
+        self._compose_depth += 1
+        try:
+            result = self._forced(force, self._compose, *things)
+        finally:
+            self._compose_depth -= 1
+        if self._active_feature is None and not self._compose_depth:
+            # compositions outside of features are part of the product, too
+            self._product.append(('compose', things))
+        return result
+
+    def _compose(self, *things):
         if not len(things):
             raise CompositionError('nothing to compose')
         if len(things) == 1:
@@ -247,12 +596,78 @@ class Composer(object):
             return things[0]
         else:
             # recurse after applying last role to object
-            return self.compose(*(
+            return self._compose(*(
                 list(things[:-2])  # all but the last two
                 # plus the composition of the last two
                 + [self._compose_pair(things[-2], things[-1])]
             ))
 
+    def compose_instances(self, roles, instances):
+        '''
+        composes the sequence of fsts ``roles`` onto every instance in ``instances``.
+
+        Instead of binding wrappers into each instance (like compose() does),
+        the roles are composed once onto a generated subclass of the instance`s
+        class and the ``__class__`` of each instance is switched to it.
+        Generated subclasses are cached by base class and roles, so composing
+        many instances costs little more than an assignment per instance.
+        Roles without state are cached by class, configured role instances
+        (e.g. ``Timeout(5)``) by identity.
+
+        As the transformations live in the class, this also works for classes
+        using ``__slots__`` and for special methods like ``__repr__``.
+        Note that introduced values are shared by all instances of the
+        generated subclass.
+
+        roles are applied RIGHT TO LEFT like in compose().
+        Returns the list of composed instances.
+        '''
+        roles = tuple(roles)
+        if not roles:
+            raise CompositionError('nothing to compose')
+        composed = []
+        for instance in instances:
+            subclass = self._get_composed_subclass(instance.__class__, roles)
+            try:
+                instance.__class__ = subclass
+            except TypeError as e:
+                raise CompositionError(
+                    'Cannot compose "%s" onto instance of "%s": %s' % (
+                        ', '.join(_get_role_name(role) for role in roles),
+                        instance.__class__.__name__,
+                        e,
+                    )
+                )
+            composed.append(instance)
+        self.stats.record_instances(len(composed))
+        return composed
+
+    def _get_composed_subclass(self, cls, roles):
+        key = (cls, tuple(_get_role_key(role) for role in roles))
+        try:
+            return self._composed_subclasses[key][0]
+        except KeyError:
+            pass
+        from .pickling import reduce_subclass_instance
+        subclass = type(cls)(cls.__name__, (cls,), {
+            # keep the memory layout of cls so __class__ can be assigned
+            '__slots__': (),
+            '__module__': cls.__module__,
+            '__qualname__': getattr(cls, '__qualname__', cls.__name__),
+            '_featuremonkey_base_class': cls,
+            '_featuremonkey_roles': roles,
+            # pickle instances with their base class and roles
+            '__reduce_ex__': reduce_subclass_instance,
+        })
+        # instances are not part of the product replayed by featuremonkey.workers
+        self._compose_depth += 1
+        try:
+            self.compose(*(list(roles) + [subclass]))
+        finally:
+            self._compose_depth -= 1
+        self._composed_subclasses[key] = (subclass, roles)
+        return subclass
+
     def compose_later(self, *things):
         """
         register list of things for composition using compose()
@@ -270,9 +685,63 @@ class Composer(object):
                 'compose_later call after module has been imported: '
                  + module_name
             )
-        LazyComposerHook.add(module_name, things[:-1], self)
+        self._compose_on_import(module_name, things[:-1])
+        if self._active_feature is None and not self._compose_depth:
+            self._product.append(('compose_later', things))
+
+    def _compose_on_import(self, module_name, fsts):
+        """
+        queue ``fsts`` for composition onto ``module_name`` once it is imported
+        """
+        LazyComposerHook.add(
+            module_name, fsts, _DeferredComposition(self, self._active_feature)
+        )
 
-    def select(self, *features):
+    def compose_package(self, feature_package, base_package):
+        """
+        superimposes the package ``feature_package`` onto ``base_package``
+        module by module.
+
+        Every module ``<feature_package>.x.y`` of the feature package is
+        composed onto its counterpart ``<base_package>.x.y``.
+        Pairs whose base module is imported already are composed right away.
+        All others are composed lazily by the import hook when the base module
+        is imported for the first time, so the base package is never
+        imported upfront.
+
+        Example: in ``myfeature/feature.py``::
+
+            def select(composer):
+                composer.compose_package('myfeature.base', 'base')
+
+        Only packages on the file system can be mirrored.
+        """
+        package = importlib.import_module(feature_package)
+        self._compose_depth += 1
+        try:
+            self._compose_package(package, feature_package, base_package)
+        finally:
+            self._compose_depth -= 1
+        if self._active_feature is None and not self._compose_depth:
+            self._product.append(('compose_package', (feature_package, base_package)))
+
+    def _compose_package(self, package, feature_package, base_package):
+        for relative_name in _iter_package_modules(package.__path__):
+            feature_module_name = '.'.join(
+                name for name in (feature_package, relative_name) if name
+            )
+            base_module_name = '.'.join(
+                name for name in (base_package, relative_name) if name
+            )
+            if base_module_name in sys.modules:
+                self.compose(
+                    importlib.import_module(feature_module_name),
+                    sys.modules[base_module_name],
+                )
+            else:
+                self._compose_on_import(base_module_name, [feature_module_name])
+
+    def select(self, *features, **options):
         """
         selects the features given as string
         e.g
@@ -280,44 +749,72 @@ class Composer(object):
         'hello' and 'world'. Then, if possible 'hello.feature'
         and 'world.feature' are imported and select is called
         in each feature module.
+
+        Selecting a feature again does not apply its compositions twice.
+        Pass ``force=True`` to apply them anyway.
         """
+        force = _pop_force(options)
         for feature_name in features:
-            feature_module = importlib.import_module(feature_name)
-            # if available, import feature.py and select the feature
+            key = self._selection_key(feature_name)
+            if key in self._selected and not (force or self._force):
+                # its select function creates new role instances
+                continue
+            if self._active_feature is None and not self._compose_depth:
+                self._product.append(('select', (feature_name,)))
+            previous_feature = self._active_feature
+            self._active_feature = feature_name
             try:
-                feature_spec_module = importlib.import_module(
-                    feature_name + '.feature'
+                self._forced(force, self._select_feature, feature_name)
+                self._selected.add(key)
+            finally:
+                self._active_feature = previous_feature
+
+    def _import_feature_module(self, feature_name, module_name):
+        try:
+            return importlib.import_module(module_name)
+        except ImportError as e:
+            if module_name == feature_name and _is_missing(e, module_name):
+                raise FeatureNotFound('Feature "%s" not found!' % feature_name)
+            if _is_missing(e, module_name):
+                raise BrokenFeature(
+                    'Feature "%s" has no feature.py!' % feature_name
                 )
-                if not hasattr(feature_spec_module, 'select'):
-                    raise CompositionError(
-                        'Function %s.feature.select not found!\n '
-                        'Feature modules need to specify a function'
-                        ' select(composer).' % (
-                            feature_name
-                        )
-                    )
-                args, varargs, keywords, defaults = inspect.getargspec(
-                    feature_spec_module.select
+            raise BrokenFeature(
+                'Feature "%s" cannot be imported: %s' % (feature_name, e)
+            )
+
+    def _select_feature(self, feature_name):
+        if self.registry is not None:
+            # fails early for unknown features, without importing anything
+            info = self.registry.resolve(feature_name)
+            if not info.has_feature_py:
+                raise BrokenFeature('Feature "%s" has no feature.py!' % feature_name)
+        # features must contain a feature.py. missing features raise
+        # FeatureNotFound, features failing to import BrokenFeature
+        self._import_feature_module(feature_name, feature_name)
+        feature_spec_module = self._import_feature_module(
+            feature_name, feature_name + '.feature'
+        )
+        if not hasattr(feature_spec_module, 'select'):
+            raise CompositionError(
+                'Function %s.feature.select not found!\n '
+                'Feature modules need to specify a function'
+                ' select(composer).' % (
+                    feature_name
                 )
-                if varargs or keywords or defaults or len(args) != 1:
-                    raise CompositionError(
-                        'invalid signature: %s.feature.select must '
-                        'have the signature select(composer)' % (
-                            feature_name
-                        )
-                    )
-                # call the feature`s select function
-                feature_spec_module.select(self)
-            except ImportError:
-                # Unfortunately, python makes it really hard
-                # to distinguish missing modules from modules
-                # that contain errors.
-                # Hacks like parsing the exception message will
-                # not work reliably due to import hooks and such.
-                # Conclusion: features must contain a feature.py for now
-
-                # re-raise
-                raise
+            )
+        args, varargs, keywords, defaults = _getargspec(
+            feature_spec_module.select
+        )
+        if varargs or keywords or defaults or len(args) != 1:
+            raise CompositionError(
+                'invalid signature: %s.feature.select must '
+                'have the signature select(composer)' % (
+                    feature_name
+                )
+            )
+        # call the feature`s select function
+        feature_spec_module.select(self)
 
     def select_equation(self, filename):
         """
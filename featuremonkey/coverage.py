@@ -0,0 +1,245 @@
+"""
+coverage.py - which feature layers run at all
+
+Selected features whose refinements never execute are dead weight. The
+``CoverageCollector`` notes every refinement wrapper and introduced method
+a composer creates and marks it the first time it runs::
+
+    from featuremonkey import coverage
+    coverage.enable('feature-coverage.json')
+    featuremonkey.select_equation('product.equation')
+
+At interpreter exit the per feature report is written to the given file
+(json) or printed to stderr. Layers must be created after the collector
+was installed, so enable it before selecting features.
+
+On Python 3.12+ ``sys.monitoring`` is used: each layer's code reports its
+first start and its events are then switched off, so there is no overhead
+afterwards. Code shared by several layers (e.g. the wrapper of ``memoize``)
+and older Pythons use one-shot probes instead: a thin wrapper around the
+layer that records the first call and then puts the layer itself back in
+place. A probe that a later refinement has wrapped cannot be put back and
+stays as an extra call with a flag check. Before 3.12 that is every layer
+but the outermost of a refinement chain, so the steady-state overhead is
+only zero with ``sys.monitoring``. Hits are recorded per layer, so layers
+sharing code are told apart.
+"""
+
+from __future__ import absolute_import, print_function
+
+import atexit
+import io
+import json
+import sys
+import threading
+import types
+
+from collections import namedtuple
+
+from .helpers import (
+    LAYER_CHAIN_ATTRIBUTE, _layer_function, _set_pickle_identity,
+)
+
+
+Layer = namedtuple('Layer', 'feature role target attribute type')
+
+_monitoring = getattr(sys, 'monitoring', None)
+
+
+def _unwrap(layer):
+    """
+    returns the function of ``layer`` and a callable restoring the
+    kind of ``layer`` (staticmethod, classmethod, bound method) for another function
+    """
+    if isinstance(layer, staticmethod):
+        return layer.__func__, staticmethod
+    if isinstance(layer, classmethod):
+        return layer.__func__, classmethod
+    if isinstance(layer, types.MethodType):
+        instance = layer.__self__
+        return layer.__func__, lambda func: types.MethodType(func, instance)
+    return layer, lambda func: func
+
+
+def _restore(base, name, probe, func, rewrap):
+    """
+    replaces ``probe`` by the layer ``func`` it wraps,
+    unless a later layer has wrapped the probe
+    """
+    raw = getattr(base, '__dict__', {}).get(name)
+    if raw is None or _layer_function(raw) is not probe:
+        return
+    chain = getattr(probe, LAYER_CHAIN_ATTRIBUTE, None)
+    if chain and chain[-1][3] is probe:
+        setattr(func, LAYER_CHAIN_ATTRIBUTE, chain[:-1] + (chain[-1][:3] + (func,),))
+    _set_pickle_identity(func, base, name)
+    setattr(base, name, rewrap(func))
+
+
+class CoverageCollector(object):
+    """
+    records which layers created by a composer have been executed
+    """
+
+    def __init__(self, use_monitoring=None):
+        if use_monitoring is None:
+            use_monitoring = _monitoring is not None
+        self.use_monitoring = use_monitoring
+        self.layers = []
+        self.hits = []
+        self._composers = []
+        # code object -> number of the layer it is monitored for, for sys.monitoring
+        self._codes = {}
+        self._tool_id = None
+        # the code a probe is about to start, see _monitor
+        self._probing = threading.local()
+
+    def install(self, composer=None):
+        """
+        collect the layers created by ``composer`` (default: the default composer)
+        """
+        if composer is None:
+            import featuremonkey
+            composer = featuremonkey._get_default_composer()
+        composer._layer_hooks.append(self._hook)
+        self._composers.append(composer)
+        return self
+
+    def uninstall(self):
+        for composer in self._composers:
+            composer._layer_hooks.remove(self._hook)
+        self._composers = []
+        if self._tool_id is not None:
+            _monitoring.register_callback(self._tool_id, _monitoring.events.PY_START, None)
+            for code in self._codes:
+                _monitoring.set_local_events(self._tool_id, code, 0)
+            _monitoring.free_tool_id(self._tool_id)
+            self._tool_id = None
+
+    def _hook(self, operation, layer, base, target_attrname):
+        func, rewrap = _unwrap(layer)
+        if not isinstance(func, types.FunctionType):
+            return layer
+        number = len(self.layers)
+        self.layers.append(Layer(
+            operation['feature'], operation['role'], operation['base'],
+            target_attrname, operation['type'],
+        ))
+        self.hits.append(False)
+        code = func.__code__
+        if self.use_monitoring and code not in self._codes and self._start_monitoring():
+            self._codes[code] = number
+            _monitoring.set_local_events(
+                self._tool_id, code, _monitoring.events.PY_START
+            )
+            return layer
+        # the layer the code is monitored for, if any
+        shared = self._codes.get(code) if self.use_monitoring else None
+        return rewrap(self._probe(func, number, shared, base, target_attrname, rewrap))
+
+    def _start_monitoring(self):
+        if self._tool_id is None:
+            for tool_id in range(6):
+                if _monitoring.get_tool(tool_id) is None:
+                    break
+            else:
+                self.use_monitoring = False
+                return False
+            _monitoring.use_tool_id(tool_id, 'featuremonkey coverage')
+            _monitoring.register_callback(
+                tool_id, _monitoring.events.PY_START, self._monitor
+            )
+            self._tool_id = tool_id
+        return True
+
+    def _monitor(self, code, instruction_offset):
+        if getattr(self._probing, 'code', None) is code:
+            # started by the probe of another layer with the same code:
+            # not a hit of the monitored layer, keep listening
+            self._probing.code = None
+            return None
+        number = self._codes.get(code)
+        if number is not None:
+            self.hits[number] = True
+        # switched off for this code only; unlike returning DISABLE this
+        # needs no global restart_events() for the next user of the tool id
+        _monitoring.set_local_events(self._tool_id, code, 0)
+        return None
+
+    def _probe(self, func, number, shared, base, target_attrname, rewrap):
+        hits = self.hits
+        probing = self._probing
+        code = func.__code__
+        # emptied once the probe tried to put func back in place;
+        # afterwards a probe a later layer wrapped only checks it
+        pending = [True]
+
+        def probe(*args, **kws):
+            if pending:
+                hits[number] = True
+                if shared is not None and not hits[shared]:
+                    probing.code = code
+                    try:
+                        return func(*args, **kws)
+                    finally:
+                        probing.code = None
+                del pending[:]
+                _restore(base, target_attrname, probe, func, rewrap)
+            return func(*args, **kws)
+
+        probe.__name__ = func.__name__
+        probe.__doc__ = func.__doc__
+        probe.__dict__.update(func.__dict__)
+        probe.__wrapped__ = func
+        _set_pickle_identity(probe, base, target_attrname)
+        return probe
+
+    def report(self):
+        """
+        returns a dict mapping each feature to the number of its layers,
+        the number of executed layers and the layers that never ran
+        """
+        result = {}
+        for layer, hit in zip(self.layers, self.hits):
+            entry = result.setdefault(layer.feature, dict(layers=0, executed=0, unused=[]))
+            entry['layers'] += 1
+            if hit:
+                entry['executed'] += 1
+            else:
+                entry['unused'].append(dict(layer._asdict()))
+        return result
+
+    def format_report(self):
+        lines = []
+        report = self.report()
+        for feature in sorted(report, key=lambda feature: (feature is not None, feature)):
+            entry = report[feature]
+            lines.append('%s: %d of %d layers executed' % (
+                feature or '(no feature)', entry['executed'], entry['layers']
+            ))
+            for layer in entry['unused']:
+                lines.append('  never ran: %(type)s of %(target)s.%(attribute)s by %(role)s' % layer)
+        return '\n'.join(lines)
+
+    def dump(self, filename=None):
+        """
+        writes the report as json to ``filename`` or prints it to stderr
+        """
+        if filename is None:
+            print(self.format_report(), file=sys.stderr)
+            return
+        with io.open(filename, 'w', encoding='utf-8') as output:
+            report = dict(
+                (feature or '(no feature)', entry) for feature, entry in self.report().items()
+            )
+            output.write(json.dumps(report, sort_keys=True, indent=2, ensure_ascii=False))
+
+
+def enable(filename=None, composer=None, use_monitoring=None):
+    """
+    installs a ``CoverageCollector`` on ``composer`` (default: the default
+    composer) and dumps its report at exit. returns the collector.
+    """
+    collector = CoverageCollector(use_monitoring).install(composer)
+    atexit.register(collector.dump, filename)
+    return collector
@@ -0,0 +1,257 @@
+"""
+diff.py - which attributes differ between two products
+
+Compares the layers of two products attribute by attribute, e.g. before
+rolling out a new equation::
+
+    from featuremonkey.diff import diff_equations
+
+    product_diff = diff_equations('old.equation', 'new.equation')
+    print(product_diff.format())
+
+Products can be given as static composition plans (``featuremonkey.static``,
+nothing is imported), as operation logs or as binary trace files
+(``featuremonkey.tracing.binary``)::
+
+    diff(analyze_equation('old.equation'), old_tracer.operation_log)
+    diff_traces('old.trace', 'new.trace')
+
+For every ``(target, attribute)`` the diff reports the layers (feature,
+role, operation) that were added or removed, whether the common layers
+were reordered, and the layers whose source changed. Sources are compared
+by hash: plans carry the hash of the transformation's source, for
+operation logs the byte code, constants, names and closure cells of the
+transformation (or a bounded serialization of a value) are hashed and for
+trace files the stored value bytes. Trace values are never deserialized,
+and sources are only compared between products of the same kind. The diff
+takes time linear in the number of operations.
+
+Also available as ``featuremonkey diff old new``.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import types
+
+from collections import namedtuple
+
+from .static import Plan, analyze_equation
+
+
+AttributeDiff = namedtuple(
+    'AttributeDiff', 'target attribute added removed reordered changed'
+)
+
+
+# bounds the cost of hashing plain values of operation logs
+_VALUE_BUDGET = dict(max_depth=5, max_items=1000, max_bytes=64 * 1024)
+
+
+def _update_code(digest, code):
+    """
+    hashes what ``code`` does, but not where it is:
+    file names, line numbers and line tables are left out
+    """
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode('utf-8'))
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _update_code(digest, const)
+        else:
+            digest.update(repr(const).encode('utf-8'))
+
+
+def _update_value(digest, value, budget, depth=0):
+    """
+    hashes functions and methods by their code and the contents of their
+    closure cells (e.g. the arguments of a refinement factory), other
+    values by their serialization within ``budget``
+    """
+    func = getattr(value, '__func__', value)
+    code = getattr(func, '__code__', None)
+    if code is None or depth > budget.max_depth:
+        from .tracing.serializer import serialize_obj
+        digest.update(repr(serialize_obj(value, budget)).encode('utf-8'))
+        return
+    _update_code(digest, code)
+    for cell in getattr(func, '__closure__', None) or ():
+        try:
+            contents = cell.cell_contents
+        except ValueError:
+            # not assigned yet
+            digest.update(b'<empty cell>')
+            continue
+        _update_value(digest, contents, budget, depth + 1)
+
+
+def _code_hash(value):
+    """
+    returns a hash of the source of ``value``: of the code and closures of
+    functions and methods, of a bounded serialization of other values
+    """
+    if isinstance(value, type('')):
+        value = value.encode('utf-8')
+    if isinstance(value, bytes):
+        return hashlib.sha1(value).hexdigest()
+    from .tracing.serializer import SerializationBudget
+    digest = hashlib.sha1()
+    _update_value(digest, value, SerializationBudget(**_VALUE_BUDGET))
+    return digest.hexdigest()
+
+
+def _plan_layers(plan):
+    for entry in plan.entries:
+        if entry.operation == 'child':
+            # children are composed by the layers of the child target
+            continue
+        yield (
+            (entry.target, entry.attribute),
+            (entry.feature, entry.role, entry.operation),
+            entry.source_hash,
+        )
+
+
+def _log_layers(operation_log):
+    for operation in operation_log:
+        yield (
+            (operation['base'], operation['target_attrname']),
+            (operation.get('feature'), operation['role'], operation['type']),
+            _code_hash(operation.get('new_value')),
+        )
+
+
+def _trace_layers(reader):
+    for record_number in range(len(reader)):
+        operation = reader.metadata(record_number)
+        yield (
+            (operation['base'], operation['target_attrname']),
+            (operation['feature'], operation['role'], operation['type']),
+            reader.value_hash(record_number),
+        )
+
+
+def _layers(product):
+    """
+    returns the kind of ``product``,
+    ``(target, attribute) -> [(layer, occurrence), ...]`` and
+    ``(target, attribute, layer, occurrence) -> source hash``
+    """
+    if isinstance(product, Plan):
+        kind, layers = 'plan', _plan_layers(product)
+    elif hasattr(product, 'value_hash'):
+        kind, layers = 'trace', _trace_layers(product)
+    else:
+        kind, layers = 'log', _log_layers(product)
+    by_attribute = {}
+    hashes = {}
+    occurrences = {}
+    for key, layer, source_hash in layers:
+        # the same role may be applied twice (e.g. with force=True)
+        occurrence = occurrences[key + (layer,)] = occurrences.get(key + (layer,), -1) + 1
+        by_attribute.setdefault(key, []).append((layer, occurrence))
+        hashes[key + (layer, occurrence)] = source_hash
+    return kind, by_attribute, hashes
+
+
+def _diff_attribute(key, old_layers, new_layers, old_hashes, new_hashes):
+    old_set = set(old_layers)
+    new_set = set(new_layers)
+    added = [layer for layer, occurrence in new_layers if (layer, occurrence) not in old_set]
+    removed = [layer for layer, occurrence in old_layers if (layer, occurrence) not in new_set]
+    old_common = [layer for layer in old_layers if layer in new_set]
+    new_common = [layer for layer in new_layers if layer in old_set]
+    reordered = None
+    if old_common != new_common:
+        reordered = (
+            [layer for layer, _ in old_common], [layer for layer, _ in new_common]
+        )
+    changed = []
+    for layer in new_common:
+        old_hash = old_hashes.get(key + layer)
+        new_hash = new_hashes.get(key + layer)
+        if old_hash is not None and new_hash is not None and old_hash != new_hash:
+            changed.append(layer[0])
+    if added or removed or reordered or changed:
+        return AttributeDiff(key[0], key[1], added, removed, reordered, changed)
+    return None
+
+
+class ProductDiff(object):
+    """
+    the ``AttributeDiff`` of every attribute that differs, sorted by
+    target and attribute
+    """
+
+    def __init__(self, attributes):
+        self.attributes = attributes
+
+    def __len__(self):
+        return len(self.attributes)
+
+    def __iter__(self):
+        return iter(self.attributes)
+
+    def __bool__(self):
+        return bool(self.attributes)
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return '<ProductDiff: %d attribute(s)>' % len(self.attributes)
+
+    def format(self):
+        lines = []
+        for attribute_diff in self.attributes:
+            lines.append('%s.%s' % (attribute_diff.target, attribute_diff.attribute))
+            for sign, layers in (('+', attribute_diff.added), ('-', attribute_diff.removed),
+                                 ('~', attribute_diff.changed)):
+                for feature, role, operation in layers:
+                    lines.append('  %s %s by %s (%s)' % (sign, operation, role, feature))
+            if attribute_diff.reordered:
+                old_order, new_order = attribute_diff.reordered
+                lines.append('  order: %s -> %s' % (
+                    ', '.join(role for _, role, _ in old_order),
+                    ', '.join(role for _, role, _ in new_order),
+                ))
+        return '\n'.join(lines)
+
+
+def diff(old, new):
+    """
+    returns the ``ProductDiff`` of two products, each given as ``Plan``,
+    operation log or ``TraceReader``
+    """
+    old_kind, old_layers, old_hashes = _layers(old)
+    new_kind, new_layers, new_hashes = _layers(new)
+    if old_kind != new_kind:
+        # source hashes of different kinds of products are not comparable
+        old_hashes = new_hashes = {}
+    attributes = []
+    for key in sorted(set(old_layers) | set(new_layers)):
+        attribute_diff = _diff_attribute(
+            key, old_layers.get(key, []), new_layers.get(key, []), old_hashes, new_hashes
+        )
+        if attribute_diff is not None:
+            attributes.append(attribute_diff)
+    return ProductDiff(attributes)
+
+
+def diff_equations(old_filename, new_filename, paths=None, cache=None):
+    """
+    diffs the static plans of two equation files
+    """
+    return diff(
+        analyze_equation(old_filename, paths, cache),
+        analyze_equation(new_filename, paths, cache),
+    )
+
+
+def diff_traces(old_filename, new_filename):
+    """
+    diffs two binary trace files
+    """
+    from .tracing.binary import TraceReader
+    with TraceReader(old_filename) as old:
+        with TraceReader(new_filename) as new:
+            return diff(old, new)
@@ -0,0 +1,147 @@
+"""
+fingerprint.py - stable identifiers of products
+
+A product is identified by the ordered list of its features, the sources
+of these features and the featuremonkey version composing them.
+``fingerprint`` hashes all of that without importing anything, so it can
+key build caches, bytecode bundles or pre-warmed images::
+
+    from featuremonkey.fingerprint import fingerprint
+
+    key = fingerprint('product.equation')
+
+Hashing every source file of a big product on every build is slow.
+File hashes are cached by path, modification time and size, in memory and
+optionally in a json file, so only changed files are read again::
+
+    cache = FileHashCache('.featuremonkey-hashes.json')
+    key = fingerprint('product.equation', cache=cache)
+    cache.save()
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import io
+import json
+import os
+
+from .composer import CompositionError, get_features_from_equation_file
+from .helpers import _find_module_file
+
+
+# directories never containing feature sources
+_SKIPPED_DIRECTORIES = ('__pycache__', '.git', '.hg', '.svn')
+_SKIPPED_EXTENSIONS = ('.pyc', '.pyo')
+
+
+class FileHashCache(object):
+    """
+    sha1 hashes of files, keyed by path and invalidated by
+    modification time and size.
+
+    if ``filename`` is given, the cache is loaded from it and ``save``
+    writes it back.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        # path -> [mtime, size, digest]
+        self._hashes = {}
+        # number of files actually read
+        self.misses = 0
+        if filename and os.path.isfile(filename):
+            try:
+                with io.open(filename, 'r', encoding='utf-8') as cached:
+                    self._hashes = json.load(cached)
+            except (IOError, OSError, ValueError):
+                self._hashes = {}
+
+    def hash_file(self, path, stat=None):
+        if stat is None:
+            stat = os.stat(path)
+        mtime = getattr(stat, 'st_mtime_ns', stat.st_mtime)
+        entry = self._hashes.get(path)
+        if entry is not None and entry[0] == mtime and entry[1] == stat.st_size:
+            return entry[2]
+        self.misses += 1
+        digest = hashlib.sha1()
+        with io.open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(65536), b''):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        self._hashes[path] = [mtime, stat.st_size, digest]
+        return digest
+
+    def save(self):
+        if not self.filename:
+            return
+        with io.open(self.filename, 'w', encoding='utf-8') as cached:
+            cached.write(json.dumps(self._hashes, ensure_ascii=False))
+
+
+_default_cache = FileHashCache()
+
+
+def _walk_sources(directory):
+    """
+    yields ``(relative path, absolute path, stat)`` of all files below ``directory``
+    """
+    for root, directories, files in os.walk(directory):
+        directories[:] = [name for name in directories if name not in _SKIPPED_DIRECTORIES]
+        relative_root = os.path.relpath(root, directory)
+        for name in files:
+            if name.endswith(_SKIPPED_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            relative = name if relative_root == os.curdir else os.path.join(relative_root, name)
+            yield relative.replace(os.sep, '/'), path, os.stat(path)
+
+
+def feature_sources(feature_name, paths=None):
+    """
+    returns the ``(relative path, absolute path, stat)`` of the source
+    files of feature ``feature_name`` located on ``paths`` (default: ``sys.path``)
+    """
+    filename = _find_module_file(feature_name, paths)
+    if filename is None:
+        raise CompositionError(
+            'Cannot fingerprint feature "%s": not found' % feature_name
+        )
+    if os.path.basename(filename) == '__init__.py':
+        return sorted(_walk_sources(os.path.dirname(filename)))
+    return [(os.path.basename(filename), filename, os.stat(filename))]
+
+
+def feature_fingerprint(feature_name, paths=None, cache=None):
+    """
+    returns the sha1 of the sources of feature ``feature_name``
+    """
+    if cache is None:
+        cache = _default_cache
+    digest = hashlib.sha1()
+    for relative, path, stat in feature_sources(feature_name, paths):
+        digest.update(('%s\0%s\n' % (relative, cache.hash_file(path, stat))).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def fingerprint(filename, paths=None, cache=None):
+    """
+    returns the fingerprint of the product described by equation file
+    ``filename``: the sha1 of the featuremonkey version and the ordered
+    features with the hashes of their sources
+    """
+    return product_fingerprint(get_features_from_equation_file(filename), paths, cache)
+
+
+def product_fingerprint(features, paths=None, cache=None):
+    """
+    like ``fingerprint`` but for a list of feature names
+    """
+    from . import __version__
+    digest = hashlib.sha1(('featuremonkey %s\n' % __version__).encode('utf-8'))
+    for feature_name in features:
+        digest.update(('%s\0%s\n' % (
+            feature_name, feature_fingerprint(feature_name, paths, cache)
+        )).encode('utf-8'))
+    return digest.hexdigest()
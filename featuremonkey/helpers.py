@@ -2,13 +2,24 @@
 private helpers
 """
 
-import inspect
+import os
 import sys
+import types
 
-from functools import wraps
+
+# inspect.isclass/ismodule without importing inspect
+if sys.version_info < (3,):
+    _CLASS_TYPES = (type, types.ClassType)
+else:
+    _CLASS_TYPES = (type,)
+
+_STRING_TYPES = (str, type(u''))
 
 
 def _delegate(to):
+    # functools (and with it collections) is only needed once composing starts
+    from functools import wraps
+
     @wraps(to)
     def original_wrapper(throwaway, *args, **kws):
         return to(*args, **kws)
@@ -17,11 +28,45 @@ def _delegate(to):
 
 
 def _is_class_instance(obj):
-    return not inspect.isclass(obj) and not inspect.ismodule(obj)
+    return not isinstance(obj, _CLASS_TYPES) and not isinstance(obj, types.ModuleType)
+
+
+def _get_raw_attribute(base, name):
+    """
+    returns attribute ``name`` of ``base`` as stored in the ``__dict__``
+    that defines it, i.e. without invoking descriptors.
+    Classes are searched along the mro, so inherited static and class methods
+    are found, too. Returns ``None`` if there is no such entry.
+    """
+    if isinstance(base, types.ModuleType):
+        return base.__dict__.get(name)
+    if _is_class_instance(base):
+        instance_dict = getattr(base, '__dict__', {})
+        if name in instance_dict:
+            return instance_dict[name]
+        base = base.__class__
+    for cls in getattr(base, '__mro__', (base,)):
+        if name in cls.__dict__:
+            return cls.__dict__[name]
+    return None
+
+
+def _get_role_key(role):
+    """
+    identity of a role: modules and classes stand for themselves,
+    role instances without state are identified by their class and
+    configured role instances by identity, as e.g. Timeout(5) and
+    Timeout(10) differ. keep configured roles alive while using their key.
+    """
+    if isinstance(role, types.ModuleType) or isinstance(role, _CLASS_TYPES):
+        return role
+    if getattr(role, '__dict__', None) == {}:
+        return role.__class__
+    return id(role)
 
 
 def _get_role_name(role):
-    if inspect.ismodule(role):
+    if isinstance(role, types.ModuleType):
         return role.__name__
     return role.__class__.__name__
 
@@ -31,6 +76,143 @@ def _get_base_name(base):
     return "%s:%s" % (name, base.__class__.__name__)
 
 
+def _find_module_file(module_name, paths=None):
+    """
+    locates the source file of module ``module_name`` without importing
+    anything. ``paths`` defaults to ``sys.path``.
+    returns the path of the ``.py`` file (``__init__.py`` for packages)
+    or ``None``. only plain file system packages are supported.
+    """
+    parts = module_name.split('.')
+    for root in (sys.path if paths is None else paths):
+        base = os.path.join(root or os.curdir, *parts)
+        init = os.path.join(base, '__init__.py')
+        if os.path.isfile(init):
+            return init
+        if os.path.isfile(base + '.py'):
+            return base + '.py'
+    return None
+
+
+def _get_object_ref(obj):
+    """
+    returns a reference to the module, class or (role) instance ``obj``
+    that can be resolved in another process by ``_resolve_object_ref``.
+    strings are taken as module names.
+    returns ``None`` if ``obj`` cannot be referenced by name or, if it is an
+    instance with state, cannot be pickled.
+    """
+    if isinstance(obj, types.ModuleType):
+        return ('module', obj.__name__)
+    if isinstance(obj, _STRING_TYPES):
+        return ('module', obj)
+    if isinstance(obj, _CLASS_TYPES):
+        kind, cls = 'class', obj
+    else:
+        kind, cls = 'instance', obj.__class__
+    qualname = getattr(cls, '__qualname__', cls.__name__)
+    if '<' in qualname or getattr(cls, '_featuremonkey_base_class', None):
+        # defined in a function or generated by the composer
+        return None
+    if kind == 'instance' and getattr(obj, '__dict__', None) != {}:
+        # a configured role, e.g. Timeout(5): carry its state
+        import pickle
+        try:
+            return (kind, cls.__module__, qualname, pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return None
+    return (kind, cls.__module__, qualname)
+
+
+def _resolve_object_ref(ref):
+    """
+    returns the object referenced by ``ref`` (see ``_get_object_ref``).
+    referenced instances are recreated by calling their class without arguments
+    or, if they had state, unpickled.
+    """
+    import importlib
+    module = importlib.import_module(ref[1])
+    if ref[0] == 'module':
+        return module
+    obj = module
+    for name in ref[2].split('.'):
+        obj = getattr(obj, name)
+    if ref[0] == 'instance':
+        if len(ref) > 3:
+            import pickle
+            return pickle.loads(ref[3])
+        return obj()
+    return obj
+
+
+def _set_pickle_identity(func, base, attrname):
+    """
+    makes function ``func`` stored as ``attrname`` of module or class ``base``
+    picklable by reference: functions that pickle cannot find by their
+    qualified name (closures, lambdas) are renamed to where they are stored.
+    """
+    qualname = getattr(func, '__qualname__', None)
+    if not isinstance(func, types.FunctionType) or qualname is None or '<' not in qualname:
+        return
+    if isinstance(base, types.ModuleType):
+        module, qualname = base.__name__, attrname
+    elif isinstance(base, _CLASS_TYPES):
+        cls_qualname = getattr(base, '__qualname__', base.__name__)
+        if '<' in cls_qualname or getattr(base, '_featuremonkey_base_class', None):
+            return
+        module, qualname = base.__module__, cls_qualname + '.' + attrname
+    else:
+        return
+    func.__module__ = module
+    func.__qualname__ = qualname
+
+
+# attribute of composed functions: the layers of the attribute as
+# ((feature, role, operation, function), ...), the function itself last
+LAYER_CHAIN_ATTRIBUTE = '_featuremonkey_chain'
+
+
+def _layer_function(raw):
+    """
+    returns the function of the raw attribute ``raw`` (see ``_get_raw_attribute``)
+    """
+    if isinstance(raw, (staticmethod, classmethod)):
+        return _extract_staticmethod(raw)
+    return getattr(raw, '__func__', raw)
+
+
+def _get_layer_chain(base, name):
+    """
+    returns the layers of attribute ``name`` of ``base``.
+    an attribute not composed by featuremonkey is its own original layer.
+    """
+    raw = _get_raw_attribute(base, name)
+    if raw is None:
+        return ()
+    function = _layer_function(raw)
+    chain = getattr(function, LAYER_CHAIN_ATTRIBUTE, None)
+    # functools.wraps copies the chain of the wrapped function
+    if chain and chain[-1][3] is function:
+        return chain
+    return ((None, None, 'original', function),)
+
+
+def _set_layer_chain(base, name, below, operation):
+    """
+    records the new top layer of attribute ``name`` of ``base``
+    on top of the layers ``below``
+    """
+    function = _layer_function(_get_raw_attribute(base, name))
+    chain = below + ((
+        operation['feature'], operation['role'], operation['type'], function
+    ),)
+    try:
+        setattr(function, LAYER_CHAIN_ATTRIBUTE, chain)
+    except (AttributeError, TypeError):
+        # e.g. builtins
+        pass
+
+
 def _get_method(method, base):
     if _is_class_instance(base):
         return method.__get__(base, base.__class__)
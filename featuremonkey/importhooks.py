@@ -79,6 +79,17 @@ class LazyComposerHook(ImportHookBase):
         )
         cls._install()
 
+    @classmethod
+    def pending(cls):
+        '''
+        returns ``(module name, composer)`` of the queued compositions
+        '''
+        return [
+            (module_name, composer)
+            for module_name, layers in sorted(cls._to_compose.items())
+            for _, composer in layers
+        ]
+
 
     def find_module(self, fullname, path=None):
         if fullname in self._to_compose:
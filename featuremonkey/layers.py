@@ -0,0 +1,106 @@
+"""
+layers.py - introspection of composed attributes
+
+A composed function or method is the closure of its top refinement. The
+composer records the layers below it on the function, so they can be
+listed and called directly, e.g. to skip an expensive auditing layer in
+a bulk job::
+
+    from featuremonkey.layers import layers, call_below, original
+
+    for layer in layers(Order, 'save'):
+        print(layer.feature, layer.role, layer.operation)
+
+    # runs the layers below those of the audit feature
+    call_below(order, 'save', 'auditfeature')
+    # runs the base implementation only
+    original(order, 'save')()
+
+Layers are listed bottom up: the original (or introduced) implementation
+first, the outermost refinement last. ``obj`` can be a module, a class or
+an instance, methods are bound like the attribute itself would be.
+The metadata costs nothing per call; it is only read by these functions.
+
+Attributes of variants (``featuremonkey.variants``) are not covered.
+"""
+
+from __future__ import absolute_import
+
+import types
+
+from collections import namedtuple
+
+from .composer import CompositionError
+from .helpers import _get_base_name, _get_layer_chain, _get_raw_attribute, _is_class_instance
+
+
+Layer = namedtuple('Layer', 'feature role operation function')
+
+
+def layers(obj, name):
+    """
+    returns the ``Layer`` objects of attribute ``name`` of ``obj``, bottom up.
+    ``function`` is the unbound function of the layer.
+    """
+    chain = _get_layer_chain(obj, name)
+    if not chain:
+        raise AttributeError('%s has no attribute %r' % (_get_base_name(obj), name))
+    return [Layer(*layer) for layer in chain]
+
+
+def _bind(obj, name, function):
+    """
+    binds ``function`` to ``obj`` like attribute ``name`` is bound
+    """
+    raw = _get_raw_attribute(obj, name)
+    if isinstance(obj, types.ModuleType) or isinstance(raw, staticmethod):
+        return function
+    cls = obj if not _is_class_instance(obj) else obj.__class__
+    if isinstance(raw, classmethod):
+        return types.MethodType(function, cls)
+    if isinstance(raw, types.MethodType):
+        # refined or introduced on the instance
+        return types.MethodType(function, raw.__self__)
+    if _is_class_instance(obj):
+        return types.MethodType(function, obj)
+    return function
+
+
+def original(obj, name):
+    """
+    returns the bottom layer of attribute ``name`` of ``obj``:
+    the original or introduced implementation
+    """
+    return _bind(obj, name, layers(obj, name)[0].function)
+
+
+def layer_below(obj, name, feature):
+    """
+    returns the layer of attribute ``name`` of ``obj`` right below
+    the lowest layer added by ``feature``
+    """
+    chain = layers(obj, name)
+    for index, layer in enumerate(chain):
+        if layer.feature == feature and layer.operation != 'original':
+            break
+    else:
+        raise CompositionError(
+            'Feature "%s" has no layer of "%s" of "%s"!' % (
+                feature, name, _get_base_name(obj)
+            )
+        )
+    if index == 0:
+        raise CompositionError(
+            'Feature "%s" introduced "%s" of "%s", there is no layer below!' % (
+                feature, name, _get_base_name(obj)
+            )
+        )
+    return _bind(obj, name, chain[index - 1].function)
+
+
+def call_below(obj, name, feature, *args, **kws):
+    """
+    calls the layer of attribute ``name`` of ``obj`` right below
+    the layers of ``feature`` with ``args`` and ``kws``
+    """
+    return layer_below(obj, name, feature)(*args, **kws)
@@ -0,0 +1,166 @@
+"""
+merging.py - in-place merges of container attributes
+
+Extending a list or dict with ``refine_`` copies it once per feature::
+
+    refine_INSTALLED_APPS = lambda original: original + ['myapp']
+
+With many features extending the same settings that is quadratic.
+``merge_`` transformations update dicts, lists and sets in place instead::
+
+    from featuremonkey import merge
+
+    class SettingsRole(object):
+        merge_INSTALLED_APPS = ['myapp']
+        merge_ROUTES = {'/my': 'myapp.views.index'}
+        merge_MIDDLEWARE = merge(['myapp.Middleware'], after='auth.Middleware')
+        merge_DEFAULTS = merge({'timeout': 10}, conflict='override')
+
+A plain container merges with ``conflict='error'``. A conflict is a dict key
+that exists with a different value or a list item that exists already.
+
+- ``'error'`` raises ``CompositionError``
+- ``'override'`` replaces the value (dicts) or moves the item (lists)
+- ``'keep'`` leaves the existing entry alone
+
+Sets simply take the new items. Lists accept ordering hints: new items are
+inserted ``before`` or ``after`` an existing item instead of appended.
+A merge that fails leaves the container unchanged.
+The composition trace records the delta of a merge, not the whole container.
+"""
+
+from __future__ import absolute_import
+
+from .composer import CompositionError
+
+
+CONFLICT_POLICIES = ('error', 'override', 'keep')
+
+
+class merge(object):
+    """
+    a ``merge_`` transformation with options
+    """
+
+    def __init__(self, value, conflict='error', before=None, after=None):
+        if conflict not in CONFLICT_POLICIES:
+            raise ValueError(
+                'unknown conflict policy %r, use one of %s' % (
+                    conflict, ', '.join(CONFLICT_POLICIES)
+                )
+            )
+        if before is not None and after is not None:
+            raise ValueError('use either before or after')
+        if (before is not None or after is not None) and not isinstance(value, list):
+            raise ValueError('ordering hints are only supported for lists')
+        self.value = value
+        self.conflict = conflict
+        self.before = before
+        self.after = after
+
+    def __repr__(self):
+        return 'merge(%r, conflict=%r)' % (self.value, self.conflict)
+
+
+def _merge_dict(target, spec, describe):
+    # all conflicts are checked before target is changed
+    delta = {}
+    updates = {}
+    for key, value in spec.value.items():
+        if key in target:
+            if target[key] == value:
+                continue
+            if spec.conflict == 'error':
+                raise CompositionError(
+                    '%s Key %r exists already with a different value!' % (describe(), key)
+                )
+            if spec.conflict == 'keep':
+                delta.setdefault('kept', []).append(key)
+                continue
+            delta.setdefault('replaced', {})[key] = value
+        else:
+            delta.setdefault('added', {})[key] = value
+        updates[key] = value
+    target.update(updates)
+    return delta
+
+
+def _merge_list(target, spec, describe):
+    # all conflicts and the anchor are checked before target is changed
+    delta = {}
+    if spec.before is not None or spec.after is not None:
+        anchor = spec.before if spec.before is not None else spec.after
+        if anchor not in target:
+            raise CompositionError(
+                '%s Ordering anchor %r does not exist!' % (describe(), anchor)
+            )
+    new_items = []
+    moved = []
+    for item in spec.value:
+        if item in target:
+            if spec.conflict == 'error':
+                raise CompositionError('%s Item %r exists already!' % (describe(), item))
+            if spec.conflict == 'keep':
+                delta.setdefault('kept', []).append(item)
+                continue
+            if item in (spec.before, spec.after):
+                raise CompositionError(
+                    '%s Cannot move the ordering anchor %r!' % (describe(), item)
+                )
+            moved.append(item)
+        new_items.append(item)
+    for item in moved:
+        target.remove(item)
+    if moved:
+        delta['moved'] = moved
+    if spec.before is not None:
+        position = target.index(spec.before)
+    elif spec.after is not None:
+        position = target.index(spec.after) + 1
+    else:
+        position = len(target)
+    target[position:position] = new_items
+    if new_items:
+        delta['inserted'] = [position, new_items]
+    return delta
+
+
+def _merge_set(target, spec, describe):
+    added = [item for item in spec.value if item not in target]
+    target.update(added)
+    return dict(added=added) if added else {}
+
+
+_MERGERS = (
+    (dict, _merge_dict),
+    (list, _merge_list),
+    ((set, frozenset), _merge_set),
+)
+
+
+def apply_merge(target, spec, describe):
+    """
+    merges ``spec`` (a ``merge`` or a plain container) into ``target``
+    in place and returns the delta.
+
+    ``describe`` returns the error message prefix.
+    internal - used by the composer.
+    """
+    if not isinstance(spec, merge):
+        spec = merge(spec)
+    for types, merger in _MERGERS:
+        if isinstance(spec.value, types):
+            if not isinstance(target, types):
+                raise CompositionError(
+                    '%s Cannot merge %s into %s!' % (
+                        describe(), type(spec.value).__name__, type(target).__name__
+                    )
+                )
+            if isinstance(target, frozenset):
+                break
+            return merger(target, spec, describe)
+    raise CompositionError(
+        '%s Only dicts, lists and sets can be merged in place, got %s into %s!' % (
+            describe(), type(spec.value).__name__, type(target).__name__
+        )
+    )
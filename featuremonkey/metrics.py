@@ -0,0 +1,251 @@
+"""
+metrics.py - statistics about the composed product
+
+Every composer keeps ``stats`` while it composes: the refinement chain
+depth of every attribute, introductions per target, the number of composed
+instances and the time spent per kind of operation::
+
+    import featuremonkey
+    featuremonkey.select_equation('product.equation')
+
+    stats = featuremonkey._get_default_composer().stats
+    stats.chain_depth('app.views:module', 'index')
+    print(stats.report())
+
+Targets are named like in the composition trace, e.g. ``'app.views:module'``
+or ``'MyClass:type'``.
+
+Deep chains on frequently called attributes cost time on every call.
+``watch`` warns with a ``ChainDepthWarning`` as soon as a chain on a watched
+attribute gets deeper than allowed::
+
+    stats.watch(['app.views:module.index', '*:type.render'], max_depth=3)
+
+The same check is available from the command line, for use in builds::
+
+    featuremonkey stats product.equation --watch '*.render' --max-depth 3
+
+which prints the report and exits with status 1 if a watched chain is too deep.
+"""
+
+from __future__ import absolute_import, print_function
+
+import fnmatch
+import time
+import warnings
+
+from .helpers import _STRING_TYPES
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+class ChainDepthWarning(UserWarning):
+    pass
+
+
+class AttributeStats(object):
+    """
+    what happened to a single attribute of a target
+    """
+    __slots__ = ('introductions', 'refinements', 'time')
+
+    def __init__(self):
+        self.introductions = 0
+        self.refinements = 0
+        self.time = 0.0
+
+    @property
+    def depth(self):
+        """
+        the number of refinement layers on top of the original
+        """
+        return self.refinements
+
+
+class CompositionStats(object):
+    """
+    structured statistics collected by a ``Composer``
+    """
+
+    def __init__(self):
+        # (target, attribute) -> AttributeStats
+        self.attributes = {}
+        # operation type -> [count, seconds]; child compositions include
+        # the time of the nested compositions
+        self.operations = {}
+        self.instance_compositions = 0
+        self._watched = []
+        self._layer_cost = None
+
+    def record(self, operation_type, target, attribute, elapsed):
+        """
+        records one operation. internal - called by the composer.
+        """
+        timing = self.operations.get(operation_type)
+        if timing is None:
+            timing = self.operations[operation_type] = [0, 0.0]
+        timing[0] += 1
+        timing[1] += elapsed
+        if operation_type == 'child':
+            return
+        key = (target, attribute)
+        stats = self.attributes.get(key)
+        if stats is None:
+            stats = self.attributes[key] = AttributeStats()
+        stats.time += elapsed
+        if operation_type == 'introduction':
+            stats.introductions += 1
+        elif operation_type == 'refinement':
+            stats.refinements += 1
+            if self._watched:
+                self._check(key, stats.depth)
+
+    def record_instances(self, count):
+        self.instance_compositions += count
+
+    def clear(self):
+        watched = self._watched
+        self.__init__()
+        self._watched = watched
+
+    def watch(self, patterns, max_depth):
+        """
+        warn if the refinement chain of an attribute matching one of
+        ``patterns`` gets deeper than ``max_depth``.
+
+        patterns are matched against ``'<target>.<attribute>'`` using
+        shell-style wildcards. Chains that are already too deep are
+        reported right away.
+        """
+        if isinstance(patterns, _STRING_TYPES):
+            patterns = [patterns]
+        self._watched.append((tuple(patterns), max_depth))
+        for key, stats in self.attributes.items():
+            self._check(key, stats.depth)
+
+    def violations(self):
+        """
+        returns ``(target, attribute, depth, max_depth)`` for every watched
+        attribute whose chain is deeper than allowed
+        """
+        result = []
+        for key, stats in sorted(self.attributes.items()):
+            max_depth = self._max_depth(key)
+            if max_depth is not None and stats.depth > max_depth:
+                result.append(key + (stats.depth, max_depth))
+        return result
+
+    def _max_depth(self, key):
+        name = '%s.%s' % key
+        limits = [
+            max_depth for patterns, max_depth in self._watched
+            if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+        ]
+        return min(limits) if limits else None
+
+    def _check(self, key, depth):
+        max_depth = self._max_depth(key)
+        if max_depth is not None and depth > max_depth:
+            warnings.warn(ChainDepthWarning(
+                'refinement chain of %s.%s is %d layers deep (at most %d allowed)' % (
+                    key + (depth, max_depth)
+                )
+            ), stacklevel=2)
+
+    def chain_depth(self, target, attribute):
+        stats = self.attributes.get((target, attribute))
+        return stats.depth if stats is not None else 0
+
+    def deepest(self, count=10):
+        """
+        returns the ``count`` deepest chains as ``(target, attribute, depth)``
+        """
+        chains = sorted(
+            (key for key, stats in self.attributes.items() if stats.refinements),
+            key=lambda key: (-self.attributes[key].depth, key)
+        )
+        return [key + (self.attributes[key].depth,) for key in chains[:count]]
+
+    def introductions(self):
+        """
+        returns a dict mapping each target to its number of introductions
+        """
+        result = {}
+        for (target, _), stats in self.attributes.items():
+            if stats.introductions:
+                result[target] = result.get(target, 0) + stats.introductions
+        return result
+
+    def refinements(self):
+        """
+        returns a dict mapping each target to its number of refinements
+        """
+        result = {}
+        for (target, _), stats in self.attributes.items():
+            if stats.refinements:
+                result[target] = result.get(target, 0) + stats.refinements
+        return result
+
+    def layer_cost(self):
+        """
+        estimated cost of a single wrapper layer per call in seconds,
+        measured once on this machine
+        """
+        if self._layer_cost is None:
+            self._layer_cost = _measure_layer_cost()
+        return self._layer_cost
+
+    def overhead(self, target, attribute):
+        """
+        estimated time a call of the attribute spends in wrapper layers
+        """
+        return self.chain_depth(target, attribute) * self.layer_cost()
+
+    def report(self, count=10):
+        """
+        returns a human readable summary
+        """
+        lines = ['operations:']
+        for operation_type, (number, seconds) in sorted(self.operations.items()):
+            lines.append('  %-14s %6d  %9.3f ms' % (operation_type, number, seconds * 1000))
+        lines.append('instance compositions: %d' % self.instance_compositions)
+        deepest = self.deepest(count)
+        if deepest:
+            layer_cost = self.layer_cost()
+            lines.append('deepest refinement chains (est. overhead per call):')
+            for target, attribute, depth in deepest:
+                lines.append('  %3d  %s.%s  %.2f us' % (
+                    depth, target, attribute, depth * layer_cost * 1e6
+                ))
+        for title, counts in (
+            ('most introductions:', self.introductions()),
+            ('most refinements:', self.refinements()),
+        ):
+            if counts:
+                lines.append(title)
+                for target in sorted(counts, key=lambda t: (-counts[t], t))[:count]:
+                    lines.append('  %4d  %s' % (counts[target], target))
+        violations = self.violations()
+        if violations:
+            lines.append('chains deeper than allowed:')
+            for target, attribute, depth, max_depth in violations:
+                lines.append('  %s.%s: %d > %d' % (target, attribute, depth, max_depth))
+        return '\n'.join(lines)
+
+
+def _measure_layer_cost(number=100000):
+
+    def original(*args, **kws):
+        return None
+
+    def layer(*args, **kws):
+        return original(*args, **kws)
+
+    def measure(func):
+        start = _timer()
+        for _ in range(number):
+            func()
+        return _timer() - start
+
+    return max(measure(layer) - measure(original), 0.0) / number
+
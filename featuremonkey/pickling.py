@@ -0,0 +1,156 @@
+"""
+pickling.py - pickle support for composed objects
+
+Refinements are closures created by ``transformation(original)``, so
+composed functions, methods and instances cannot be pickled by default.
+featuremonkey makes them picklable *by reference*:
+
+- functions and methods refined or introduced on modules and classes
+  are renamed to the attribute they are stored in (module and qualified
+  name), so pickle finds them there - in the composed product of the
+  unpickling process.
+- instances composed with ``compose`` remember the transformations
+  (including pointcuts) that put callables into their ``__dict__`` and get their own ``__reduce_ex__``.
+  Such instances are pickled without these callables and the
+  transformations are re-applied when unpickling.
+- instances composed with ``compose_instances`` are pickled with their
+  base class and roles; unpickling switches them to the generated subclass
+  of the unpickling process.
+
+Roles need to be importable by name for this to work, i.e. modules or
+classes defined at module level; role instances are pickled with their
+state, so configured roles like ``Timeout(5)`` keep their configuration.
+"""
+
+from __future__ import absolute_import
+
+import pickle
+import types
+
+from .helpers import _CLASS_TYPES, _get_object_ref, _resolve_object_ref
+
+
+LAYERS_ATTRIBUTE = '_featuremonkey_layers'
+
+
+def _get_default_composer():
+    import featuremonkey
+    return featuremonkey._get_default_composer()
+
+
+def _role_refs(roles):
+    """
+    returns picklable references to ``roles``: modules by name,
+    classes and role instances (with their state) as themselves
+    """
+    refs = []
+    for role in roles:
+        if isinstance(role, types.ModuleType):
+            refs.append(_get_object_ref(role))
+            continue
+        if _get_object_ref(role if isinstance(role, _CLASS_TYPES) else role.__class__) is None:
+            raise pickle.PicklingError(
+                'Cannot pickle composed object: role %r cannot be referenced by name' % role
+            )
+        refs.append(('object', role))
+    return refs
+
+
+def _resolve_role_ref(ref):
+    if ref[0] == 'object':
+        return ref[1]
+    return _resolve_object_ref(ref)
+
+
+def record_instance_layers(instance, role, layers):
+    """
+    remembers that the transformations of ``role`` put callables into the
+    ``__dict__`` of ``instance`` and sets the reducer of the instance.
+    ``layers`` are ``(attrname, target_attrname)`` pairs; the target of a
+    ``pointcut_`` is the attribute it matched.
+    pickle and copy find the reducer before the one of the class,
+    which other instances keep using.
+
+    internal - called by the composer.
+    """
+    recorded = instance.__dict__.setdefault(LAYERS_ATTRIBUTE, [])
+    recorded.extend((role, attrname, target) for attrname, target in layers)
+    instance.__dict__['__reduce_ex__'] = types.MethodType(_reduce_composed_instance, instance)
+
+
+def _reduce_composed_instance(obj, protocol):
+    layers = obj.__dict__[LAYERS_ATTRIBUTE]
+    refs = _role_refs([role for role, _, _ in layers])
+    state = dict(obj.__dict__)
+    del state[LAYERS_ATTRIBUTE]
+    del state['__reduce_ex__']
+    for _, _, target in layers:
+        state.pop(target, None)
+    return (
+        _rebuild_composed_instance,
+        (obj.__class__, state, [
+            (ref, attrname, target) for ref, (_, attrname, target) in zip(refs, layers)
+        ]),
+    )
+
+
+def _rebuild_composed_instance(cls, state, layers):
+    obj = cls.__new__(cls)
+    obj.__dict__.update(state)
+    composer = _get_default_composer()
+    for ref, attrname, target in layers:
+        role = _resolve_role_ref(ref)
+        if attrname.startswith('pointcut_'):
+            composer._apply_transformation(
+                role, obj, getattr(role, attrname).refinement, 'refine_' + target
+            )
+        else:
+            composer._apply_transformation(role, obj, getattr(role, attrname), attrname)
+        record_instance_layers(obj, role, [(attrname, target)])
+    return obj
+
+
+def _get_state(obj):
+    getstate = getattr(obj, '__getstate__', None)
+    if getstate is not None:
+        return getstate()
+    state = dict(getattr(obj, '__dict__', {}))
+    slots = {}
+    for cls in obj.__class__.__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            if hasattr(obj, name) and name not in ('__dict__', '__weakref__'):
+                slots[name] = getattr(obj, name)
+    return (state, slots) if slots else state
+
+
+def _set_state(obj, state):
+    setstate = getattr(obj, '__setstate__', None)
+    if setstate is not None:
+        setstate(state)
+        return
+    slots = {}
+    if isinstance(state, tuple):
+        state, slots = state
+    if state:
+        obj.__dict__.update(state)
+    for name, value in (slots or {}).items():
+        setattr(obj, name, value)
+
+
+def reduce_subclass_instance(obj, protocol=2):
+    """
+    ``__reduce_ex__`` of the subclasses generated by ``compose_instances``
+    """
+    cls = obj.__class__
+    return (
+        _rebuild_subclass_instance,
+        (cls._featuremonkey_base_class, _role_refs(cls._featuremonkey_roles), _get_state(obj)),
+    )
+
+
+def _rebuild_subclass_instance(base_class, role_refs, state):
+    roles = [_resolve_role_ref(ref) for ref in role_refs]
+    obj = base_class.__new__(base_class)
+    obj, = _get_default_composer().compose_instances(roles, [obj])
+    _set_state(obj, state)
+    return obj
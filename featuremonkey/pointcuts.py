@@ -0,0 +1,174 @@
+"""
+pointcuts.py - refinements of many attributes at once
+
+Cross-cutting features (timing, permission checks, metrics) refine lots of
+methods the same way. Instead of a ``refine_<name>`` per method, a role
+declares a ``pointcut_`` transformation selecting the callables to refine::
+
+    from featuremonkey import pointcut
+
+    def timed(original):
+
+        def wrapper(*args, **kws):
+            with timer(original.__name__):
+                return original(*args, **kws)
+
+        return wrapper
+
+    class TimingRole(object):
+        pointcut_timing = pointcut(timed, names=['get_*', 'save'])
+        pointcut_audit = pointcut(audited, marker='audited')
+        pointcut_slow = pointcut(cached, predicate=lambda name, value: name in SLOW)
+
+A pointcut matches a callable if every given criterion matches:
+
+- ``names``: ``fnmatch`` patterns of the attribute name
+- ``marker``: the callable (or a layer below it) was decorated with ``@mark(marker)``
+- ``predicate``: ``predicate(name, value)`` is true
+
+Only functions, methods, staticmethods and classmethods are matched; names
+starting with ``_`` only by patterns starting with ``_``. In modules,
+functions imported from other modules are skipped. Each match is refined
+like by ``refine_<name>``, so method kinds, tracing and layers are handled
+the same way.
+
+All pointcuts of a role are matched in a single scan over an index of the
+target's callables, after the role's other transformations.
+"""
+
+from __future__ import absolute_import
+
+import fnmatch
+import re
+import types
+
+from .helpers import _get_layer_chain, _is_class_instance
+
+
+# attribute of functions decorated with ``mark``
+MARKERS_ATTRIBUTE = '_featuremonkey_markers'
+
+_WILDCARDS = re.compile(r'[*?\[]')
+_ROUTINES = (
+    types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    staticmethod, classmethod,
+)
+
+
+def mark(*markers):
+    """
+    decorator marking a function for pointcuts with ``marker=...``
+    """
+
+    def decorate(func):
+        target = getattr(func, '__func__', func)
+        existing = getattr(target, MARKERS_ATTRIBUTE, frozenset())
+        setattr(target, MARKERS_ATTRIBUTE, existing | frozenset(markers))
+        return func
+
+    return decorate
+
+
+class pointcut(object):
+    """
+    a ``pointcut_`` transformation applying ``refinement`` to every
+    matching callable of the target
+    """
+
+    def __init__(self, refinement, names=None, marker=None, predicate=None):
+        if names is None and marker is None and predicate is None:
+            raise ValueError('a pointcut needs names, a marker or a predicate')
+        if isinstance(names, (str, type(u''))):
+            names = [names]
+        self.refinement = refinement
+        self.names = names
+        self.marker = marker
+        self.predicate = predicate
+        # names without wildcards are looked up instead of scanned for
+        self.exact_names = None
+        if names is not None and not any(_WILDCARDS.search(name) for name in names):
+            self.exact_names = list(names)
+        self._match_name = None
+        if names is not None:
+            self._match_name = re.compile('|'.join(
+                '(?:%s)' % fnmatch.translate(name) for name in names
+            ) or '(?!)').match
+        self._private = names is not None and any(name.startswith('_') for name in names)
+
+    def __repr__(self):
+        return 'pointcut(%r, names=%r, marker=%r)' % (self.refinement, self.names, self.marker)
+
+    def matches(self, base, name):
+        if name.startswith('_') and not self._private:
+            return False
+        if self._match_name is not None and self._match_name(name) is None:
+            return False
+        if self.marker is not None and not _has_marker(base, name, self.marker):
+            return False
+        if self.predicate is not None and not self.predicate(name, getattr(base, name)):
+            return False
+        return True
+
+
+def _has_marker(base, name, marker):
+    for layer in _get_layer_chain(base, name):
+        if marker in getattr(layer[3], MARKERS_ATTRIBUTE, ()):
+            return True
+    return False
+
+
+def _attribute_index(base):
+    """
+    returns ``name -> raw attribute`` of the routines of ``base``
+    """
+    index = {}
+    if isinstance(base, types.ModuleType):
+        for name, raw in base.__dict__.items():
+            if (isinstance(raw, _ROUTINES)
+                    and getattr(raw, '__module__', base.__name__) == base.__name__):
+                index[name] = raw
+        return index
+    instance = None
+    if _is_class_instance(base):
+        instance, base = base, base.__class__
+    for cls in reversed(getattr(base, '__mro__', (base,))):
+        if cls is object:
+            continue
+        for name, raw in cls.__dict__.items():
+            if isinstance(raw, _ROUTINES):
+                index[name] = raw
+            else:
+                # shadowed by a non-callable
+                index.pop(name, None)
+    if instance is not None:
+        for name, raw in getattr(instance, '__dict__', {}).items():
+            if isinstance(raw, _ROUTINES):
+                index[name] = raw
+            else:
+                index.pop(name, None)
+    return index
+
+
+def match_pointcuts(base, pointcuts):
+    """
+    returns the ``(name, pointcut)`` pairs of the callables of ``base``
+    matched by ``pointcuts`` in name and pointcut order.
+    internal - used by the composer.
+    """
+    index = _attribute_index(base)
+    scanned = [
+        (position, cut) for position, cut in enumerate(pointcuts) if cut.exact_names is None
+    ]
+    matches = []
+    for position, cut in enumerate(pointcuts):
+        for name in cut.exact_names or ():
+            if name in index and cut.matches(base, name):
+                matches.append((name, position))
+    if scanned:
+        # one pass over the index for all pointcuts with patterns
+        for name in index:
+            for position, cut in scanned:
+                if cut.matches(base, name):
+                    matches.append((name, position))
+    matches.sort()
+    return [(name, pointcuts[position]) for name, position in matches]
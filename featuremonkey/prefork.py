@@ -0,0 +1,182 @@
+"""
+prefork.py - composing once in a pre-forking master
+
+Servers like gunicorn compose the product in the master and fork the
+workers afterwards. Forked workers share the memory of the master until
+they write to it, and merely touching an object writes to its reference
+count and garbage collector header. The wrapper closures, roles and trace
+snapshots of the composition end up copied into every worker.
+
+``finalize`` prepares a composed product for forking::
+
+    import featuremonkey
+    from featuremonkey import prefork
+
+    featuremonkey.select_equation('product.equation')
+    prefork.finalize()
+    # fork the workers now
+
+It composes everything still queued by ``compose_later`` (importing the
+base modules), resolves the chains of product variants, collects the
+garbage of the composition and moves all remaining objects into the
+permanent generation with ``gc.freeze()`` (Python 3.7+), so the garbage
+collector of the workers never touches them. Disabling the collector
+early in the master (``gc.disable()``) and enabling it in the workers
+avoids holes in the frozen pages.
+
+``benchmark`` (also ``featuremonkey prefork``) forks workers after the
+composition and reports their shared and private memory (Linux only).
+"""
+
+from __future__ import absolute_import
+
+import gc
+import importlib
+import os
+
+from collections import namedtuple
+
+from .importhooks import LazyComposerHook
+
+
+PreforkReport = namedtuple('PreforkReport', 'composed_modules resolved collected frozen')
+MemoryUsage = namedtuple('MemoryUsage', 'rss pss shared private')
+
+
+def _get_composer(composer):
+    if composer is None:
+        import featuremonkey
+        composer = featuremonkey._get_default_composer()
+    return composer
+
+
+def complete_pending(composer=None):
+    """
+    imports the modules ``compose_later`` compositions of ``composer``
+    (default: the default composer) are waiting for.
+    returns the names of the imported modules.
+    """
+    composer = _get_composer(composer)
+    module_names = [
+        module_name for module_name, deferred in LazyComposerHook.pending()
+        if getattr(deferred, 'composer', deferred) is composer
+    ]
+    for module_name in module_names:
+        # composed by the import hook
+        importlib.import_module(module_name)
+    return module_names
+
+
+def finalize(composer=None, complete=True, resolve=True, clear_trace=False, freeze=True):
+    """
+    prepares the product composed by ``composer`` (default: the default
+    composer) for forking and returns a ``PreforkReport``.
+
+    ``complete``: compose what ``compose_later`` queued
+    ``resolve``: build the chains of all product variants
+    (see ``featuremonkey.variants``)
+    ``clear_trace``: drop the operation log of the composition tracer
+    ``freeze``: ``gc.freeze()`` everything, where available
+    """
+    composer = _get_composer(composer)
+    composed_modules = complete_pending(composer) if complete else []
+    resolved = 0
+    resolve_variants = getattr(composer, 'resolve_variants', None)
+    if resolve and resolve_variants is not None:
+        resolved = resolve_variants()
+    if clear_trace:
+        operation_log = getattr(composer.composition_tracer, 'operation_log', None)
+        if operation_log:
+            del operation_log[:]
+    collected = gc.collect()
+    frozen = False
+    if freeze and hasattr(gc, 'freeze'):
+        gc.freeze()
+        frozen = True
+    return PreforkReport(composed_modules, resolved, collected, frozen)
+
+
+def memory_usage(pid=None):
+    """
+    returns the ``MemoryUsage`` of process ``pid`` (default: this process)
+    in kB or ``None`` if the platform does not tell
+    """
+    proc = '/proc/%s' % (pid or 'self')
+    fields = dict(Rss=0, Pss=0, Shared_Clean=0, Shared_Dirty=0, Private_Clean=0, Private_Dirty=0)
+    for name in ('smaps_rollup', 'smaps'):
+        try:
+            with open(os.path.join(proc, name)) as smaps:
+                for line in smaps:
+                    key, _, value = line.partition(':')
+                    if key in fields:
+                        fields[key] += int(value.split()[0])
+            break
+        except (IOError, OSError):
+            continue
+    else:
+        return None
+    return MemoryUsage(
+        fields['Rss'], fields['Pss'],
+        fields['Shared_Clean'] + fields['Shared_Dirty'],
+        fields['Private_Clean'] + fields['Private_Dirty'],
+    )
+
+
+def benchmark(workers=4, work=None, composer=None, **options):
+    """
+    finalizes the product of ``composer`` (``options`` are passed to
+    ``finalize``), forks ``workers`` processes and returns their
+    ``MemoryUsage``. each worker runs ``work()`` (default: a full garbage
+    collection, touching every object the collector tracks) before
+    measuring. raises ``RuntimeError`` if a worker fails.
+    """
+    if not hasattr(os, 'fork') or memory_usage() is None:
+        raise RuntimeError('the prefork benchmark requires os.fork and /proc/<pid>/smaps')
+    finalize(composer, **options)
+    children = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                os.close(read_fd)
+                if work is None:
+                    gc.collect()
+                else:
+                    work()
+                usage = memory_usage()
+                os.write(write_fd, (' '.join(str(value) for value in usage)).encode('ascii'))
+                status = 0
+            except BaseException as e:
+                os.write(write_fd, ('%s: %s' % (e.__class__.__name__, e)).encode('utf-8'))
+            finally:
+                os._exit(status)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+    results = []
+    failures = []
+    for number, (pid, read_fd) in enumerate(children):
+        with os.fdopen(read_fd, 'rb') as pipe:
+            data = pipe.read()
+        _, status = os.waitpid(pid, 0)
+        if status == 0 and data:
+            results.append(MemoryUsage(*(int(value) for value in data.split())))
+        else:
+            failures.append('worker %d: %s' % (
+                number, data.decode('utf-8', 'replace') or 'exit status %d' % status
+            ))
+    if failures:
+        raise RuntimeError(
+            '%d of %d prefork benchmark workers failed:\n%s' % (
+                len(failures), workers, '\n'.join(failures)
+            )
+        )
+    return results
+
+
+def format_usage(results):
+    lines = ['%6s %10s %10s %10s %10s' % ('worker', 'rss kB', 'pss kB', 'shared kB', 'private kB')]
+    for number, usage in enumerate(results):
+        lines.append('%6d %10d %10d %10d %10d' % ((number,) + tuple(usage)))
+    return '\n'.join(lines)
@@ -0,0 +1,320 @@
+"""
+registry.py - discovering features without importing them
+
+``Composer.select`` finds a feature by importing it. Listing the features
+available to a product, or checking an equation before composing it, would
+import every candidate. The ``FeatureRegistry`` discovers features in
+configured root directories and in the ``featuremonkey.features`` entry
+point group instead and keeps an index of them::
+
+    from featuremonkey.registry import FeatureRegistry
+
+    registry = FeatureRegistry(['features/'], index_file='.featuremonkey-index.json')
+    for name in registry.names():
+        info = registry.resolve(name)
+        print(info.name, info.path, info.targets, info.dependencies)
+    registry.save()
+
+A feature is a top-level package of a root. Features in subpackages
+(``myfeature.variant``) are looked up below the root of their top-level
+package when first resolved. The index entry of a feature records the
+path, whether it has a ``feature.py``, the targets its ``select`` composes
+(see ``featuremonkey.static``) and its dependencies, declared in
+``feature.py`` as a list of feature names::
+
+    requires = ['basefeature']
+
+Entries are invalidated by the modification times of the root directory,
+the feature directory and ``feature.py``: adding or removing features and
+changing ``feature.py`` are noticed, changing another module of a feature
+is not (call ``refresh``).
+
+Entry points name the feature package, e.g.
+``myfeature = myproject.features.myfeature``.
+
+A composer with a registry resolves features before importing them::
+
+    composer.registry = registry
+
+Unknown features raise ``FeatureNotFound``, features without ``feature.py``
+``BrokenFeature``.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import ast
+import io
+import json
+import os
+
+from collections import namedtuple
+
+from .composer import BrokenFeature, FeatureNotFound
+from .helpers import _find_module_file
+from .static import StaticAnalyzer
+
+
+ENTRY_POINT_GROUP = 'featuremonkey.features'
+# part of the index: bump when the entry format changes
+INDEX_VERSION = 1
+
+FeatureInfo = namedtuple(
+    'FeatureInfo', 'name path root has_feature_py targets dependencies'
+)
+
+
+def _mtime(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return getattr(stat, 'st_mtime_ns', stat.st_mtime)
+
+
+def _declared_dependencies(filename):
+    """
+    returns the feature names of the module level ``requires``
+    list of ``filename``
+    """
+    with io.open(filename, 'rb') as source:
+        try:
+            tree = ast.parse(source.read(), filename)
+        except SyntaxError:
+            return []
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        if not any(isinstance(target, ast.Name) and target.id == 'requires'
+                   for target in node.targets):
+            continue
+        try:
+            value = ast.literal_eval(node.value)
+        except ValueError:
+            return []
+        if isinstance(value, (list, tuple)):
+            return [str(name) for name in value]
+    return []
+
+
+def _module_root(module_name, path):
+    """
+    returns the ``sys.path`` entry module ``module_name`` at ``path`` lives in
+    """
+    levels = module_name.count('.') + 1
+    if os.path.basename(path) == '__init__.py':
+        levels += 1
+    for _ in range(levels):
+        path = os.path.dirname(path)
+    return path
+
+
+def _entry_points(group):
+    """
+    returns ``(name, module name)`` of the entry points in ``group``
+    """
+    try:
+        from importlib import metadata
+    except ImportError:
+        return []
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, 'select'):
+        selected = entry_points.select(group=group)
+    else:
+        selected = entry_points.get(group, ())
+    return [
+        (entry_point.name, entry_point.value.partition(':')[0].strip())
+        for entry_point in selected
+    ]
+
+
+class FeatureRegistry(object):
+    """
+    index of the features located in ``roots`` (directories) and
+    announced in the ``entry_point_group`` entry point group.
+
+    if ``index_file`` is given, the index is loaded from it and
+    ``save`` writes it back.
+    """
+
+    def __init__(self, roots=None, entry_point_group=ENTRY_POINT_GROUP,
+                 index_file=None):
+        self.roots = [os.path.abspath(root) for root in (roots or [])]
+        self.entry_point_group = entry_point_group
+        self.index_file = index_file
+        # root -> {'mtime': ..., 'features': {name: entry}}
+        self._index = {}
+        # number of features (re-)analyzed
+        self.misses = 0
+        self._features = None
+        if index_file and os.path.isfile(index_file):
+            try:
+                with io.open(index_file, 'r', encoding='utf-8') as cached:
+                    index = json.load(cached)
+            except (IOError, OSError, ValueError):
+                index = {}
+            if index.get('version') == INDEX_VERSION:
+                self._index = index['roots']
+
+    def _entry(self, name, root, path):
+        """
+        returns the index entry of feature ``name`` at ``path``,
+        analyzing it unless the cached entry is up to date
+        """
+        directory = os.path.dirname(path)
+        feature_py = os.path.join(directory, 'feature.py')
+        mtimes = [_mtime(directory), _mtime(feature_py)]
+        cached = self._index.setdefault(root, {}).setdefault('features', {}).get(name)
+        if cached is not None and cached['path'] == path and cached['mtimes'] == mtimes:
+            return cached
+        self.misses += 1
+        has_feature_py = mtimes[1] is not None
+        targets = dependencies = []
+        if has_feature_py:
+            plan = StaticAnalyzer([root]).analyze_feature(name)
+            targets = sorted(set(entry.target for entry in plan.entries))
+            dependencies = _declared_dependencies(feature_py)
+        entry = self._index[root]['features'][name] = dict(
+            path=path, mtimes=mtimes, has_feature_py=has_feature_py,
+            targets=targets, dependencies=dependencies,
+        )
+        return entry
+
+    def _scan_root(self, root):
+        """
+        returns ``name -> path`` of the feature packages in ``root``
+        """
+        cached = self._index.get(root)
+        mtime = _mtime(root)
+        if cached is not None and cached.get('mtime') == mtime:
+            return dict(
+                (name, entry['path']) for name, entry in cached['features'].items()
+            )
+        found = {}
+        if mtime is not None:
+            for name in os.listdir(root):
+                init = os.path.join(root, name, '__init__.py')
+                if os.path.isfile(init):
+                    found[name] = init
+        features = self._index.setdefault(root, {}).setdefault('features', {})
+        for name in list(features):
+            if name not in found:
+                del features[name]
+        self._index[root]['mtime'] = mtime
+        return found
+
+    def _discover(self):
+        features = {}
+        for root in self.roots:
+            for name, path in sorted(self._scan_root(root).items()):
+                # earlier roots win like on sys.path
+                if name not in features:
+                    features[name] = FeatureInfo(
+                        name=name, root=root, **self._info(name, root, path)
+                    )
+        for name, module_name in _entry_points(self.entry_point_group):
+            if module_name in features:
+                continue
+            path = _find_module_file(module_name)
+            if path is None:
+                continue
+            ep_root = _module_root(module_name, path)
+            features[module_name] = FeatureInfo(
+                name=module_name, root=ep_root, **self._info(module_name, ep_root, path)
+            )
+        return features
+
+    def _info(self, name, root, path):
+        entry = self._entry(name, root, path)
+        return dict(
+            path=path,
+            has_feature_py=entry['has_feature_py'],
+            targets=tuple(entry['targets']),
+            dependencies=tuple(entry['dependencies']),
+        )
+
+    def _load_features(self):
+        """
+        discovers the features unless done already and returns them
+        """
+        if self._features is None:
+            self._features = self._discover()
+        return self._features
+
+    @property
+    def features(self):
+        """
+        dict mapping feature names to ``FeatureInfo``
+        """
+        return self._load_features()
+
+    def _lookup(self, name):
+        """
+        returns the ``FeatureInfo`` of feature ``name`` or ``None``.
+        features in subpackages (``a.b``) are not indexed upfront: they are
+        located below the root of the closest known package containing them,
+        without importing anything, and added to the features.
+        """
+        features = self._load_features()
+        if name in features:
+            return features[name]
+        parts = name.split('.')
+        for length in range(len(parts) - 1, 0, -1):
+            package = features.get('.'.join(parts[:length]))
+            if package is not None:
+                break
+        else:
+            return None
+        path = _find_module_file(name, [package.root])
+        if path is None or os.path.basename(path) != '__init__.py':
+            return None
+        root = _module_root(name, path)
+        info = features[name] = FeatureInfo(name=name, root=root, **self._info(name, root, path))
+        return info
+
+    def refresh(self):
+        """
+        forgets the index, all features are analyzed again on next use
+        """
+        self._index = {}
+        self._features = None
+
+    def names(self):
+        return sorted(self.features)
+
+    def __contains__(self, name):
+        return self._lookup(name) is not None
+
+    def resolve(self, name):
+        """
+        returns the ``FeatureInfo`` of feature ``name`` or raises ``FeatureNotFound``
+        """
+        info = self._lookup(name)
+        if info is None:
+            raise FeatureNotFound('Feature "%s" not found in the registry!' % name)
+        return info
+
+    def check(self, names):
+        """
+        raises ``FeatureNotFound`` or ``BrokenFeature`` if any of the
+        features ``names`` or the features they require is unavailable
+        """
+        for name in names:
+            info = self.resolve(name)
+            if not info.has_feature_py:
+                raise BrokenFeature('Feature "%s" has no feature.py!' % name)
+            for dependency in info.dependencies:
+                if dependency not in self:
+                    raise FeatureNotFound(
+                        'Feature "%s" requires feature "%s", which is not found!' % (
+                            name, dependency
+                        )
+                    )
+
+    def save(self):
+        if not self.index_file:
+            return
+        self._load_features()
+        with io.open(self.index_file, 'w', encoding='utf-8') as cached:
+            cached.write(json.dumps(
+                dict(version=INDEX_VERSION, roots=self._index), ensure_ascii=False
+            ))
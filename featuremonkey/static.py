@@ -0,0 +1,623 @@
+"""
+static.py - composition plans from source code, without importing
+
+Knowing which transformations a product applies normally requires importing
+and selecting every feature. The ``StaticAnalyzer`` parses ``feature.py``
+and the role modules and classes instead. It finds ``introduce_``,
+``refine_``, ``merge_``, ``child_`` and ``pointcut_`` members and the
+targets of ``compose``, ``compose_later`` and ``compose_package`` calls
+in ``select`` and builds a best-effort composition plan. Features selected
+by ``composer.select('name')`` inside ``select`` are analyzed in place, like
+the composer selects them::
+
+    from featuremonkey.static import analyze_equation
+
+    plan = analyze_equation('product.equation')
+    for entry in plan.entries:
+        print(entry.feature, entry.role, entry.target, entry.attribute)
+    for problem in plan.unresolved:
+        print(problem)
+
+Everything that cannot be resolved statically (roles computed at runtime,
+compositions in loops or conditions, inherited transformations, ...)
+is reported in ``plan.unresolved``.
+
+Parsing results are cached by file content hash, in memory and optionally
+in a cache directory, so repeated analyses only parse changed files.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import ast
+import hashlib
+import io
+import json
+import os
+
+from collections import namedtuple
+
+from .composer import _iter_package_modules, get_features_from_equation_file
+from .helpers import _find_module_file
+
+
+PREFIXES = ('introduce_', 'refine_', 'child_', 'merge_', 'pointcut_')
+OPERATIONS = {
+    'introduce_': 'introduction',
+    'refine_': 'refinement',
+    'child_': 'child',
+    'merge_': 'merge',
+}
+# part of the cache key: bump when the summary format changes
+SUMMARY_VERSION = b'5'
+COMPOSER_METHODS = ('compose', 'compose_later', 'compose_package', 'select')
+
+PlanEntry = namedtuple(
+    'PlanEntry', 'feature role target attribute operation source_hash'
+)
+Unresolved = namedtuple('Unresolved', 'feature filename lineno reason')
+
+
+class Plan(object):
+    """
+    result of a static analysis.
+
+    ``entries`` are ``PlanEntry`` tuples in composition order.
+    ``target`` uses the naming of the composer
+    (e.g. ``'app.views:module'``, ``'MyClass:type'``).
+    ``unresolved`` lists the ``Unresolved`` cases the plan may be missing.
+    """
+
+    def __init__(self, entries=None, unresolved=None):
+        self.entries = entries or []
+        self.unresolved = unresolved or []
+
+    def extend(self, other):
+        self.entries.extend(other.entries)
+        self.unresolved.extend(other.unresolved)
+
+    def __repr__(self):
+        return '<Plan: %d entries, %d unresolved>' % (
+            len(self.entries), len(self.unresolved)
+        )
+
+
+class AnalysisCache(object):
+    """
+    cache of parsed file summaries keyed by the sha1 of the file content.
+
+    if ``directory`` is given, summaries are also stored there as json,
+    so they survive the process.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._summaries = {}
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest + '.json')
+
+    def get(self, digest):
+        summary = self._summaries.get(digest)
+        if summary is None and self.directory:
+            try:
+                with io.open(self._path(digest), 'r', encoding='utf-8') as cached:
+                    summary = self._summaries[digest] = json.load(cached)
+            except (IOError, OSError, ValueError):
+                return None
+        return summary
+
+    def set(self, digest, summary):
+        self._summaries[digest] = summary
+        if self.directory:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            with io.open(self._path(digest), 'w', encoding='utf-8') as cached:
+                cached.write(json.dumps(summary, ensure_ascii=False))
+
+
+_default_cache = AnalysisCache()
+
+
+def _const_str(node):
+    if node.__class__.__name__ == 'Constant' and isinstance(node.value, type('')):
+        return node.value
+    if node.__class__.__name__ == 'Str':
+        # python < 3.8
+        return node.s
+    return None
+
+
+def _dotted_name(node):
+    """
+    returns ``'a.b.c'`` for the expression ``a.b.c`` or ``None``
+    """
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        parent = _dotted_name(node.value)
+        if parent is not None:
+            return parent + '.' + node.attr
+    return None
+
+
+def _describe(node):
+    """
+    describes an expression used as fst, target or child value as
+    ``[kind, value]`` with kind one of ``name``, ``instance``, ``str``
+    or ``dynamic``.
+    """
+    text = _const_str(node)
+    if text is not None:
+        return ['str', text]
+    name = _dotted_name(node)
+    if name is not None:
+        return ['name', name]
+    if isinstance(node, ast.Call) and not node.args and not node.keywords:
+        name = _dotted_name(node.func)
+        if name is not None:
+            return ['instance', name]
+    return ['dynamic', node.__class__.__name__]
+
+
+def _source_hash(node):
+    return hashlib.sha1(ast.dump(node).encode('utf-8')).hexdigest()
+
+
+def _summarize_imports(nodes):
+    imports = []
+    for node in nodes:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    imports.append([alias.asname, alias.name, None, 0])
+                else:
+                    head = alias.name.split('.')[0]
+                    imports.append([head, head, None, 0])
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                imports.append([
+                    alias.asname or alias.name, node.module or '', alias.name, node.level or 0
+                ])
+    return imports
+
+
+def _summarize_members(body, prefix_name, classes):
+    """
+    summarizes the transformations defined in ``body`` (module or class body).
+    nested classes are added to ``classes`` under their dotted name.
+    returns ``(transformations, dynamic reasons)``
+    """
+    transformations = []
+    dynamic = []
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            names = [node.name]
+        elif isinstance(node, ast.Assign):
+            names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+            if len(names) != len(node.targets):
+                names = []
+                dynamic.append([node.lineno, 'assignment to a computed name'])
+        elif isinstance(node, (ast.Import, ast.ImportFrom, ast.Expr, ast.Pass)):
+            continue
+        elif prefix_name is not None:
+            dynamic.append([
+                node.lineno, '%s statement in class body' % node.__class__.__name__
+            ])
+            continue
+        else:
+            continue
+        for name in names:
+            prefix = [p for p in PREFIXES if name.startswith(p)]
+            if not prefix:
+                if isinstance(node, ast.ClassDef):
+                    _summarize_class(node, _join(prefix_name, node.name), classes)
+                continue
+            prefix = prefix[0]
+            child = None
+            if prefix == 'child_':
+                if isinstance(node, ast.ClassDef):
+                    child = ['class', _join(prefix_name, node.name)]
+                    _summarize_class(node, child[1], classes)
+                elif isinstance(node, ast.Assign):
+                    child = _describe(node.value)
+                else:
+                    child = ['dynamic', 'child_ computed by a function']
+            transformations.append([
+                prefix, name[len(prefix):], node.lineno, _source_hash(node), child
+            ])
+    return transformations, dynamic
+
+
+def _join(prefix_name, name):
+    return prefix_name + '.' + name if prefix_name else name
+
+
+def _summarize_class(node, name, classes):
+    transformations, dynamic = _summarize_members(node.body, name, classes)
+    bases = [_dotted_name(base) or '?' for base in node.bases]
+    bases = [base for base in bases if base != 'object']
+    if bases:
+        dynamic.append([node.lineno, 'inherits from %s' % ', '.join(bases)])
+    classes[name] = dict(
+        lineno=node.lineno,
+        transformations=transformations,
+        dynamic=dynamic,
+    )
+
+
+class _SelectVisitor(ast.NodeVisitor):
+    """
+    collects composer calls inside a select function
+    """
+
+    def __init__(self, composer_name):
+        self.composer_name = composer_name
+        self.calls = []
+        self.dynamic = []
+        self.imports = []
+        self._conditional = 0
+
+    def _visit_conditional(self, node):
+        self._conditional += 1
+        self.generic_visit(node)
+        self._conditional -= 1
+
+    visit_If = visit_For = visit_While = visit_Try = visit_TryExcept = _visit_conditional
+
+    def visit_Import(self, node):
+        self.imports.extend(_summarize_imports([node]))
+
+    visit_ImportFrom = visit_Import
+
+    def visit_Call(self, node):
+        func = node.func
+        if (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name)
+                and func.value.id == self.composer_name):
+            if func.attr in COMPOSER_METHODS and not node.keywords:
+                self.calls.append([
+                    func.attr,
+                    [_describe(arg) for arg in node.args],
+                    node.lineno,
+                    bool(self._conditional),
+                ])
+            else:
+                self.dynamic.append([node.lineno, 'unsupported composer call %s' % func.attr])
+        elif isinstance(func, ast.Name) and any(
+            isinstance(arg, ast.Name) and arg.id == self.composer_name for arg in node.args
+        ):
+            self.dynamic.append([node.lineno, 'composer passed to %s()' % func.id])
+        self.generic_visit(node)
+
+
+def summarize_source(source):
+    """
+    returns the json-serializable summary of a module's source code
+    used by the analyzer
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        # reported as unresolved, the rest of the plan is still built
+        return dict(
+            imports=[], transformations=[], classes={}, select=None,
+            syntax_error=[e.lineno, e.msg],
+        )
+    classes = {}
+    transformations, _ = _summarize_members(tree.body, None, classes)
+    summary = dict(
+        imports=_summarize_imports(tree.body),
+        transformations=transformations,
+        classes=classes,
+        select=None,
+        syntax_error=None,
+    )
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == 'select':
+            args = [getattr(arg, 'arg', getattr(arg, 'id', None)) for arg in node.args.args]
+            visitor = _SelectVisitor(args[0] if args else None)
+            for statement in node.body:
+                visitor.visit(statement)
+            summary['select'] = dict(
+                lineno=node.lineno,
+                args=args,
+                calls=visitor.calls,
+                dynamic=visitor.dynamic,
+                imports=visitor.imports,
+            )
+    return summary
+
+
+class StaticAnalyzer(object):
+    """
+    builds composition plans from source code.
+
+    ``paths`` are the directories to search modules in (default: ``sys.path``),
+    ``cache`` is an ``AnalysisCache`` (default: a process wide in-memory cache).
+    """
+
+    def __init__(self, paths=None, cache=None):
+        self.paths = paths
+        self.cache = _default_cache if cache is None else cache
+        self._files = {}
+
+    def _find(self, module_name):
+        try:
+            return self._files[module_name]
+        except KeyError:
+            filename = self._files[module_name] = _find_module_file(module_name, self.paths)
+            return filename
+
+    def summary(self, filename):
+        """
+        returns the cached summary of ``filename``
+        """
+        with io.open(filename, 'rb') as source_file:
+            source = source_file.read()
+        digest = hashlib.sha1(SUMMARY_VERSION + b'\0' + source).hexdigest()
+        summary = self.cache.get(digest)
+        if summary is None:
+            summary = summarize_source(source)
+            self.cache.set(digest, summary)
+        return summary
+
+    def _module_summary(self, module_name):
+        filename = self._find(module_name)
+        if filename is None:
+            return None, None
+        return filename, self.summary(filename)
+
+    @staticmethod
+    def _syntax_error(plan, feature_name, filename, summary):
+        """
+        records the syntax error of ``summary``, if any, and tells whether there was one
+        """
+        if not summary or not summary['syntax_error']:
+            return False
+        lineno, message = summary['syntax_error']
+        plan.unresolved.append(Unresolved(
+            feature_name, filename, lineno, 'syntax error: %s' % message
+        ))
+        return True
+
+    @staticmethod
+    def _package_of(module_name, filename):
+        if os.path.basename(filename) == '__init__.py':
+            return module_name
+        return module_name.rpartition('.')[0]
+
+    def _bindings(self, module_name, filename, imports):
+        bindings = {}
+        package = self._package_of(module_name, filename)
+        for local_name, module, attr, level in imports:
+            if level:
+                parts = package.split('.')
+                base = '.'.join(parts[:len(parts) - level + 1])
+                module = base + '.' + module if module else base
+            if attr is None:
+                bindings[local_name] = module
+            else:
+                bindings[local_name] = module + '.' + attr
+        return bindings
+
+    def _resolve(self, dotted, bindings, module_name):
+        """
+        resolves a dotted reference to ``('module', name)`` or
+        ``('attribute', module, attribute path)`` or ``None``
+        """
+        head, _, rest = dotted.partition('.')
+        if head in bindings:
+            full = bindings[head] + ('.' + rest if rest else '')
+        else:
+            # defined in the module itself
+            full = module_name + '.' + dotted
+        parts = full.split('.')
+        for end in range(len(parts), 0, -1):
+            candidate = '.'.join(parts[:end])
+            if self._find(candidate) is not None:
+                if end == len(parts):
+                    return ('module', candidate)
+                return ('attribute', candidate, '.'.join(parts[end:]))
+        return None
+
+    def analyze_feature(self, feature_name, selected=None):
+        """
+        returns the ``Plan`` of a single feature, including the features
+        it selects. features in the set ``selected`` are not analyzed again,
+        like the composer does not select them again.
+        """
+        if selected is None:
+            selected = set()
+        selected.add(feature_name)
+        plan = Plan()
+        filename, summary = self._module_summary(feature_name + '.feature')
+        if summary is None:
+            plan.unresolved.append(Unresolved(
+                feature_name, None, None, 'feature.py not found'
+            ))
+            return plan
+        if self._syntax_error(plan, feature_name, filename, summary):
+            return plan
+        select = summary['select']
+        if select is None:
+            plan.unresolved.append(Unresolved(
+                feature_name, filename, None, 'feature.py defines no select function'
+            ))
+            return plan
+        for lineno, reason in select['dynamic']:
+            plan.unresolved.append(Unresolved(feature_name, filename, lineno, reason))
+        module_name = feature_name + '.feature'
+        bindings = self._bindings(module_name, filename, summary['imports'])
+        bindings.update(self._bindings(module_name, filename, select['imports']))
+        for method, args, lineno, conditional in select['calls']:
+            context = (feature_name, filename, lineno)
+            if conditional:
+                plan.unresolved.append(Unresolved(
+                    feature_name, filename, lineno,
+                    '%s inside a condition or loop' % method
+                ))
+            if method == 'compose_package':
+                self._plan_package(plan, context, args)
+                continue
+            if method == 'select':
+                self._plan_select(plan, context, args, selected)
+                continue
+            if len(args) < 2:
+                continue
+            if method == 'compose_later':
+                target = args[-1][1] if args[-1][0] == 'str' else None
+                target = ('module', target) if target else None
+            else:
+                target = self._resolve_arg(args[-1], bindings, module_name)
+            if target is None:
+                plan.unresolved.append(Unresolved(
+                    feature_name, filename, lineno, 'cannot resolve target of %s' % method
+                ))
+                continue
+            # fsts are applied right to left
+            for arg in reversed(args[:-1]):
+                role = self._resolve_arg(arg, bindings, module_name)
+                if role is None:
+                    plan.unresolved.append(Unresolved(
+                        feature_name, filename, lineno, 'cannot resolve fst of %s' % method
+                    ))
+                    continue
+                self._plan_role(plan, context, role, target)
+        return plan
+
+    def _resolve_arg(self, arg, bindings, module_name):
+        kind, value = arg
+        if kind == 'str':
+            return ('module', value)
+        if kind in ('name', 'instance'):
+            return self._resolve(value, bindings, module_name)
+        return None
+
+    def _plan_select(self, plan, context, args, selected):
+        feature_name, filename, lineno = context
+        for kind, value in args:
+            if kind != 'str':
+                plan.unresolved.append(Unresolved(
+                    feature_name, filename, lineno, 'select needs literal feature names'
+                ))
+            elif value not in selected:
+                plan.extend(self.analyze_feature(value, selected))
+
+    def _plan_package(self, plan, context, args):
+        feature_name, filename, lineno = context
+        if len(args) != 2 or args[0][0] != 'str' or args[1][0] != 'str':
+            plan.unresolved.append(Unresolved(
+                feature_name, filename, lineno, 'compose_package needs literal package names'
+            ))
+            return
+        feature_package, base_package = args[0][1], args[1][1]
+        package_file = self._find(feature_package)
+        if package_file is None:
+            plan.unresolved.append(Unresolved(
+                feature_name, filename, lineno, 'package %s not found' % feature_package
+            ))
+            return
+        paths = [os.path.dirname(package_file)]
+        for relative_name in _iter_package_modules(paths):
+            suffix = '.' + relative_name if relative_name else ''
+            self._plan_role(
+                plan, context,
+                ('module', feature_package + suffix),
+                ('module', base_package + suffix),
+            )
+
+    @staticmethod
+    def _target_name(target):
+        if target[0] == 'module':
+            return '%s:module' % target[1]
+        return '%s:type' % target[2].split('.')[-1]
+
+    def _role_transformations(self, plan, context, role):
+        """
+        returns ``(role name, transformations, module name, filename, summary)``
+        """
+        feature_name = context[0]
+        role_file, summary = self._module_summary(role[1])
+        if self._syntax_error(plan, feature_name, role_file, summary):
+            return None
+        if role[0] == 'module':
+            if summary is None:
+                return None
+            return role[1], summary['transformations'], role[1], role_file, summary
+        class_summary = summary and summary['classes'].get(role[2])
+        if class_summary is None:
+            return None
+        for dynamic_lineno, reason in class_summary['dynamic']:
+            plan.unresolved.append(Unresolved(feature_name, role_file, dynamic_lineno, reason))
+        return (
+            role[2].split('.')[-1], class_summary['transformations'],
+            role[1], role_file, summary
+        )
+
+    def _plan_role(self, plan, context, role, target):
+        feature_name = context[0]
+        resolved = self._role_transformations(plan, context, role)
+        if resolved is None:
+            plan.unresolved.append(Unresolved(
+                feature_name, context[1], context[2], 'cannot analyze fst %s' % '.'.join(role[1:])
+            ))
+            return
+        role_name, transformations, role_module, role_file, summary = resolved
+        target_name = self._target_name(target)
+        # the composer applies transformations in dir() order
+        transformations = sorted(transformations, key=lambda t: t[0] + t[1])
+        for prefix, attribute, lineno, source_hash, child in transformations:
+            if prefix == 'pointcut_':
+                # the matching attributes are only known at composition time
+                plan.unresolved.append(Unresolved(
+                    feature_name, role_file, lineno,
+                    'pointcut_%s matches attributes of %s at composition time' % (
+                        attribute, target_name
+                    )
+                ))
+                continue
+            plan.entries.append(PlanEntry(
+                feature_name, role_name, target_name, attribute,
+                OPERATIONS[prefix], source_hash
+            ))
+            if prefix != 'child_':
+                continue
+            child_role = None
+            if child[0] == 'class':
+                child_role = ('attribute', role_module, child[1])
+            elif child[0] in ('name', 'instance'):
+                bindings = self._bindings(role_module, role_file, summary['imports'])
+                child_role = self._resolve(child[1], bindings, role_module)
+            child_target = self._child_target(target, attribute)
+            if child_role is None or child_target is None:
+                plan.unresolved.append(Unresolved(
+                    feature_name, role_file, lineno, 'cannot resolve child_%s' % attribute
+                ))
+                continue
+            self._plan_role(plan, (feature_name, role_file, lineno), child_role, child_target)
+
+    def _child_target(self, target, attribute):
+        if target[0] == 'module':
+            submodule = target[1] + '.' + attribute
+            if self._find(submodule) is not None:
+                return ('module', submodule)
+            return ('attribute', target[1], attribute)
+        return ('attribute', target[1], target[2] + '.' + attribute)
+
+    def analyze(self, features):
+        """
+        returns the ``Plan`` of the feature selection ``features``
+        """
+        plan = Plan()
+        selected = set()
+        for feature_name in features:
+            if feature_name not in selected:
+                plan.extend(self.analyze_feature(feature_name, selected))
+        return plan
+
+
+def analyze_equation(filename, paths=None, cache=None):
+    """
+    returns the static ``Plan`` of the product given by equation file ``filename``
+    """
+    analyzer = StaticAnalyzer(paths=paths, cache=cache)
+    return analyzer.analyze(get_features_from_equation_file(filename))
@@ -0,0 +1,181 @@
+"""
+streams.py - lazy refinements of generator functions
+
+Refining a base function that streams a large result set usually ends up
+as ``list(original(...))``, which holds everything in memory. The stages
+of this module refine such functions lazily instead::
+
+    from featuremonkey.streams import map_items, filter_items, enrich_batches, tee_items
+
+    class ExportFeature(object):
+        refine_rows = map_items(add_total)
+
+    class VisibilityFeature(object):
+        refine_rows = filter_items(lambda row: row['visible'])
+
+    class PricesFeature(object):
+        # fetch_prices(rows) gets lists of up to 100 rows and returns them enriched
+        refine_rows = enrich_batches(fetch_prices, size=100)
+
+    class AuditFeature(object):
+        refine_rows = tee_items(audit_log.append)
+
+Stages refining a function that was refined by stages already are fused
+with them: the composed function runs one loop over the items of the base,
+passing each item through the stages of all features in composition order.
+Memory use is bound by the batch sizes. Several stages of one feature
+are combined with ``pipeline(map_items(f), filter_items(p))``.
+
+Stages work with functions, methods, staticmethods and classmethods
+returning any iterable. Any other refinement in between starts a new loop.
+"""
+
+from __future__ import absolute_import
+
+from functools import wraps
+
+
+# attribute of fused stream functions: (the function itself, source, stages)
+STREAM_ATTRIBUTE = '_featuremonkey_stream'
+
+
+class _Stage(object):
+    """
+    a refinement adding a stage to the stream returned by the original
+    """
+
+    kind = None
+
+    def __init__(self, func, size=None):
+        self.func = func
+        self.size = size
+
+    def __call__(self, original):
+        fused = getattr(original, STREAM_ATTRIBUTE, None)
+        if fused is not None and fused[0] is original:
+            # refining a stream function: extend its loop
+            _, source, stages = fused
+        else:
+            source, stages = original, ()
+        return _stream_function(source, stages + (self,))
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.func)
+
+
+class map_items(_Stage):
+    """
+    replaces each item by ``func(item)``
+    """
+
+    kind = 'map'
+
+
+class filter_items(_Stage):
+    """
+    drops the items ``func(item)`` is false for
+    """
+
+    kind = 'filter'
+
+
+class tee_items(_Stage):
+    """
+    passes each item to ``func(item)`` (e.g. ``list.append`` or a logger)
+    and keeps it in the stream unchanged
+    """
+
+    kind = 'tee'
+
+
+class enrich_batches(_Stage):
+    """
+    collects up to ``size`` items and replaces them by the items of
+    the iterable ``func(batch)`` returns; batches are lists
+    """
+
+    kind = 'batch'
+
+    def __init__(self, func, size=100):
+        if size < 1:
+            raise ValueError('size must be a positive number')
+        _Stage.__init__(self, func, size)
+
+
+class pipeline(object):
+    """
+    a refinement applying ``stages`` in order
+    """
+
+    def __init__(self, *stages):
+        self.stages = stages
+
+    def __call__(self, original):
+        for stage in self.stages:
+            original = stage(original)
+        return original
+
+
+def _stream_function(source, stages):
+
+    @wraps(source)
+    def stream(*args, **kws):
+        return _run(source(*args, **kws), stages)
+
+    setattr(stream, STREAM_ATTRIBUTE, (stream, source, stages))
+    return stream
+
+
+def _run(items, stages):
+    if any(stage.kind == 'batch' for stage in stages):
+        return _run_batched(items, stages)
+    return _run_simple(items, [(stage.kind, stage.func) for stage in stages])
+
+
+def _run_simple(items, stages):
+    # one loop per item through all stages, no intermediate containers
+    for item in items:
+        for kind, func in stages:
+            if kind == 'map':
+                item = func(item)
+            elif kind == 'filter':
+                if not func(item):
+                    break
+            else:
+                func(item)
+        else:
+            yield item
+
+
+def _run_batched(items, stages):
+    # each item is pushed through the stages as a chunk; batch stages
+    # keep their chunks until a batch is full. the remaining batches
+    # are flushed in stage order after the last item.
+    buffers = [[] if stage.kind == 'batch' else None for stage in stages]
+
+    def push(chunk, final):
+        for stage, buffer in zip(stages, buffers):
+            kind = stage.kind
+            if kind == 'map':
+                chunk = [stage.func(item) for item in chunk]
+            elif kind == 'filter':
+                chunk = [item for item in chunk if stage.func(item)]
+            elif kind == 'tee':
+                for item in chunk:
+                    stage.func(item)
+            else:
+                buffer.extend(chunk)
+                chunk = []
+                while len(buffer) >= stage.size or (final and buffer):
+                    batch = buffer[:stage.size]
+                    del buffer[:stage.size]
+                    chunk.extend(stage.func(batch))
+            if not chunk and not final:
+                break
+        return chunk
+
+    for item in items:
+        for result in push([item], False):
+            yield result
+    for result in push([], True):
+        yield result
@@ -1,12 +1,55 @@
 from __future__ import absolute_import
 import unittest
 from featuremonkey.test.composer import *
+from featuremonkey.test.tracing import *
+from featuremonkey.test.importtime import *
+from featuremonkey.test.caching import *
+from featuremonkey.test.validation import *
+from featuremonkey.test.static import *
+from featuremonkey.test.workers import *
+from featuremonkey.test.pickling import *
+from featuremonkey.test.metrics import *
+from featuremonkey.test.fingerprint import *
+from featuremonkey.test.variants import *
+from featuremonkey.test.coverage import *
+from featuremonkey.test.merging import *
+from featuremonkey.test.cli import *
+from featuremonkey.test.registry import *
+from featuremonkey.test.streams import *
+from featuremonkey.test.layers import *
+from featuremonkey.test.prefork import *
+from featuremonkey.test.diff import *
+from featuremonkey.test.pointcuts import *
 
 def suite():
     return unittest.TestSuite([
         unittest.TestLoader().loadTestsFromTestCase(TestObjectComposition),
         unittest.TestLoader().loadTestsFromTestCase(TestClassComposition),
+        unittest.TestLoader().loadTestsFromTestCase(TestInstanceClassComposition),
         unittest.TestLoader().loadTestsFromTestCase(TestModuleComposition),
+        unittest.TestLoader().loadTestsFromTestCase(TestTraceStore),
+        unittest.TestLoader().loadTestsFromTestCase(TestSerializationBudget),
+        unittest.TestLoader().loadTestsFromTestCase(TestBinaryTrace),
+        unittest.TestLoader().loadTestsFromTestCase(TestTraceFilter),
+        unittest.TestLoader().loadTestsFromTestCase(TestImportTime),
+        unittest.TestLoader().loadTestsFromTestCase(TestMemoize),
+        unittest.TestLoader().loadTestsFromTestCase(TestValidation),
+        unittest.TestLoader().loadTestsFromTestCase(TestParallelValidation),
+        unittest.TestLoader().loadTestsFromTestCase(TestStaticAnalysis),
+        unittest.TestLoader().loadTestsFromTestCase(TestWorkers),
+        unittest.TestLoader().loadTestsFromTestCase(TestPickling),
+        unittest.TestLoader().loadTestsFromTestCase(TestMetrics),
+        unittest.TestLoader().loadTestsFromTestCase(TestFingerprint),
+        unittest.TestLoader().loadTestsFromTestCase(TestVariants),
+        unittest.TestLoader().loadTestsFromTestCase(TestCoverage),
+        unittest.TestLoader().loadTestsFromTestCase(TestMerge),
+        unittest.TestLoader().loadTestsFromTestCase(TestCommandLine),
+        unittest.TestLoader().loadTestsFromTestCase(TestFeatureRegistry),
+        unittest.TestLoader().loadTestsFromTestCase(TestStreams),
+        unittest.TestLoader().loadTestsFromTestCase(TestLayers),
+        unittest.TestLoader().loadTestsFromTestCase(TestPrefork),
+        unittest.TestLoader().loadTestsFromTestCase(TestDiff),
+        unittest.TestLoader().loadTestsFromTestCase(TestPointcuts),
     ])
 
 
@@ -0,0 +1,159 @@
+from __future__ import absolute_import
+from featuremonkey.composer import Composer
+from featuremonkey.caching import memoize
+import threading
+import time
+import types
+import unittest
+
+
+def _counting_base():
+
+    class Counting(object):
+        calls = []
+
+        def __init__(self, factor=1):
+            self.factor = factor
+
+        def square(self, x):
+            Counting.calls.append(x)
+            return x * x * self.factor
+
+        @staticmethod
+        def double(x):
+            Counting.calls.append(x)
+            return 2 * x
+
+        @classmethod
+        def name(cls, suffix):
+            Counting.calls.append(suffix)
+            return cls.__name__ + suffix
+
+    return Counting
+
+
+class TestMemoize(unittest.TestCase):
+
+    def setUp(self):
+        self.composer = Composer()
+        self.Counting = _counting_base()
+
+    def _compose(self, target, **refinements):
+        role = type(str('CachingRole'), (object,), dict(
+            ('refine_' + name, refinement) for name, refinement in refinements.items()
+        ))
+        self.composer.compose(role(), target)
+
+    def test_function(self):
+        calls = []
+        module = types.ModuleType(str('cachedmodule'))
+
+        def add(a, b=0):
+            calls.append((a, b))
+            return a + b
+
+        module.add = add
+        self._compose(module, add=memoize())
+        self.assertEqual(3, module.add(1, b=2))
+        self.assertEqual(3, module.add(1, b=2))
+        self.assertEqual(1, module.add(1))
+        self.assertEqual(2, len(calls))
+        self.assertEqual((1, 2, None, 2), tuple(module.add.cache_info()))
+
+    def test_method(self):
+        self._compose(self.Counting, square=memoize())
+        self.assertEqual(4, self.Counting().square(2))
+        self.assertEqual(4, self.Counting().square(2))
+        # global scope: the instance is part of the key
+        self.assertEqual([2, 2], self.Counting.calls)
+
+    def test_staticmethod(self):
+        self._compose(self.Counting, double=memoize())
+        self.assertEqual(4, self.Counting.double(2))
+        self.assertEqual(4, self.Counting().double(2))
+        self.assertEqual([2], self.Counting.calls)
+
+    def test_classmethod(self):
+        self._compose(self.Counting, name=memoize(scope='class'))
+        self.assertEqual('Counting!', self.Counting.name('!'))
+        self.assertEqual('Counting!', self.Counting().name('!'))
+        self.assertEqual(['!'], self.Counting.calls)
+
+    def test_instance(self):
+        instance = self.Counting(factor=3)
+        other = self.Counting()
+        self._compose(instance, square=memoize(scope='instance'))
+        self.assertEqual(12, instance.square(2))
+        self.assertEqual(12, instance.square(2))
+        self.assertEqual(4, other.square(2))
+        self.assertEqual([2, 2], self.Counting.calls)
+
+    def test_instance_scope(self):
+        cache = memoize(scope='instance')
+        self._compose(self.Counting, square=cache)
+        first, second = self.Counting(), self.Counting(factor=2)
+        self.assertEqual(4, first.square(2))
+        self.assertEqual(8, second.square(2))
+        self.assertEqual(4, first.square(2))
+        self.assertEqual((1, 2, None, 2), tuple(cache.cache_info()))
+        del second
+        self.assertEqual(1, cache.cache_info().currsize)
+
+    def test_maxsize(self):
+        self._compose(self.Counting, double=memoize(maxsize=2))
+        for x in (1, 2, 1, 3, 1, 2):
+            self.Counting.double(x)
+        # 2 was evicted by 3 as 1 had been used more recently
+        self.assertEqual([1, 2, 3, 2], self.Counting.calls)
+        self.assertEqual(2, self.Counting.double.cache_info().currsize)
+
+    def test_ttl(self):
+        self._compose(self.Counting, double=memoize(ttl=0.05))
+        self.Counting.double(1)
+        self.Counting.double(1)
+        time.sleep(0.06)
+        self.Counting.double(1)
+        self.assertEqual([1, 1], self.Counting.calls)
+
+    def test_custom_key(self):
+        self._compose(self.Counting, double=memoize(key=lambda x: x % 2))
+        self.assertEqual(2, self.Counting.double(1))
+        self.assertEqual(2, self.Counting.double(3))
+
+    def test_invalidation(self):
+        cache = memoize(scope='instance')
+        self._compose(self.Counting, square=cache)
+        instance = self.Counting()
+        instance.square(2)
+        instance.square(3)
+        instance.square.invalidate(instance, 2)
+        instance.square(2)
+        instance.square(3)
+        self.assertEqual([2, 3, 2], self.Counting.calls)
+        cache.cache_clear()
+        instance.square(3)
+        self.assertEqual([2, 3, 2, 3], self.Counting.calls)
+
+    def test_threads(self):
+        self._compose(self.Counting, double=memoize(maxsize=8))
+
+        def work():
+            for x in range(200):
+                self.Counting.double(x % 16)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        info = self.Counting.double.cache_info()
+        self.assertEqual(800, info.hits + info.misses)
+        self.assertTrue(info.currsize <= 8)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, memoize, scope='process')
+        self.assertRaises(ValueError, memoize, maxsize=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+from __future__ import absolute_import
+from featuremonkey.cli import main
+from featuremonkey.tracing.binary import load_operation_log
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+class TestCommandLine(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.equation = self.write_equation('product.equation', 'featuremonkey.test.mock.clifeature')
+        self.stdout = sys.stdout
+        sys.stdout = StringIO()
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+        shutil.rmtree(self.tmpdir)
+
+    def write_equation(self, name, *features):
+        filename = os.path.join(self.tmpdir, name)
+        with io.open(filename, 'w') as equation:
+            equation.write(u'\n'.join(features))
+        return filename
+
+    def output(self):
+        return sys.stdout.getvalue()
+
+    def test_validate(self):
+        bad = self.write_equation('bad.equation', 'featuremonkey.test.mock.conflictfeature')
+        self.assertEqual(0, main(['validate', self.equation]))
+        self.assertEqual(1, main(['validate', self.equation, bad, '--processes', '1']))
+        self.assertTrue('bad.equation: 2 conflict(s)' in self.output())
+
+    def test_profile(self):
+        self.assertEqual(0, main(['profile', self.equation]))
+        self.assertTrue('featuremonkey.test.mock.clifeature' in self.output())
+
+    def test_trace(self):
+        output = os.path.join(self.tmpdir, 'product.trace')
+        self.assertEqual(0, main(['trace', self.equation, '-o', output]))
+        operations = load_operation_log(output)
+        self.assertEqual(['refinement', 'refinement'], [operation['type'] for operation in operations])
+        self.assertEqual('featuremonkey.test.mock.clifeature', operations[0]['feature'])
+        self.assertEqual(0, main(['trace', self.equation, '-o', output, '--filter', 'operations=introduction']))
+        self.assertEqual([], load_operation_log(output))
+
+    def test_warm(self):
+        self.assertEqual(0, main(['warm', self.equation]))
+        self.assertTrue('clifeature: 3 file(s) compiled' in self.output())
+
+    @unittest.skipUnless(hasattr(os, 'fork') and os.path.exists('/proc/self/smaps'), 'requires os.fork and /proc')
+    def test_prefork(self):
+        import gc
+        try:
+            self.assertEqual(0, main(['prefork', self.equation, '--workers', '1']))
+        finally:
+            if hasattr(gc, 'unfreeze'):
+                gc.unfreeze()
+        self.assertTrue('private kB' in self.output())
+
+    def test_diff(self):
+        empty = self.write_equation('empty.equation', '')
+        self.assertEqual(0, main(['diff', self.equation, self.equation]))
+        self.assertTrue('no differences' in self.output())
+        self.assertEqual(1, main(['diff', self.equation, empty]))
+        self.assertTrue('- refinement by GreeterRole' in self.output())
+        trace = os.path.join(self.tmpdir, 'product.trace')
+        main(['trace', self.equation, '-o', trace])
+        self.assertEqual(0, main(['diff', self.equation, trace]))
+
+    def test_bench(self):
+        self.assertEqual(0, main(['bench', self.equation]))
+        self.assertTrue('Greeter:type.greet' in self.output())
+        self.assertEqual(0, main([
+            'bench', self.equation, '-s', 'from featuremonkey.test.mock import clibase',
+            '--call', 'clibase.Greeter().greet("Joe")', '--call', 'clibase.greet(name="Joe")',
+        ]))
+        self.assertTrue('clibase.Greeter().greet("Joe")' in self.output())
+        self.assertTrue('clibase.greet(name="Joe")' in self.output())
+        self.assertRaises(ValueError, main, ['bench', self.equation, '--call', 'greet("Joe")'])
+
+    def test_stats(self):
+        self.assertEqual(0, main(['stats', self.equation]))
+        self.assertTrue('instance compositions: 0' in self.output())
+        self.assertEqual(1, main(['stats', self.equation, '--watch', '*', '--max-depth', '0']))
+        self.assertTrue('chains deeper than allowed:' in self.output())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
 from __future__ import absolute_import
-from featuremonkey import compose, compose_later
+from featuremonkey import compose, compose_later, compose_package, Composer, CompositionError
 from featuremonkey.test.mock import composer_mocks as mocks
 from featuremonkey.test.mock import testmodule1, testpackage1
+import gc
 import unittest
 import sys
 
@@ -49,6 +50,17 @@ class TestObjectComposition(unittest.TestCase):
         composition = compose(mocks.MethodRefinement(), instance)
         self.assertEquals('Hellorefined', composition.base_method('Hello'))
 
+    def test_role_helpers(self):
+
+        class RoleWithHelper(mocks.MethodRefinement):
+
+            def helper(self):
+                pass
+
+        instance = mocks.Base()
+        composition = compose(RoleWithHelper(), instance)
+        self.assertEquals('Hellorefined', composition.base_method('Hello'))
+
     def test_staticmethod(self):
         instance = mocks.StaticBase()
         instance2 = mocks.StaticBase()
@@ -108,6 +120,146 @@ class TestClassComposition(unittest.TestCase):
         self.assertEquals('Hellorefined', mocks.ClassMethodBase.base_method('Hello'))
         self.assertEquals('Hellorefined', mocks.ClassMethodBase().base_method('Hello'))
 
+    def test_repeated_composition(self):
+        composer = Composer()
+        role = mocks.MethodRefinement2()
+        composer.compose(role, mocks.Base)
+        composer.compose(role, mocks.Base)
+        # role instances without state are the same fst
+        composer.compose(mocks.MethodRefinement2(), mocks.Base)
+        composer.compose(mocks.MemberIntroduction, mocks.Base)
+        composer.compose(mocks.MemberIntroduction, mocks.Base)
+        self.assertEquals('Hellorefined', mocks.Base().base_method('Hello'))
+        self.assertEquals(1, composer.stats.chain_depth('Base:type', 'base_method'))
+        composer.compose(mocks.MethodRefinement2(), mocks.Base, force=True)
+        self.assertEquals('Hellorefinedrefined', mocks.Base().base_method('Hello'))
+        self.assertRaises(
+            CompositionError, composer.compose, mocks.MemberIntroduction, mocks.Base, force=True
+        )
+        self.assertRaises(TypeError, composer.compose, mocks.MemberIntroduction, mocks.Base, forse=True)
+
+    def test_configured_roles(self):
+
+        class Suffix(object):
+
+            def __init__(self, suffix):
+                self.suffix = suffix
+
+            def refine_base_method(self, original):
+                suffix = self.suffix
+
+                def base_method(self, a_str):
+                    return original(self, a_str) + suffix
+
+                return base_method
+
+        composer = Composer()
+        # in a feature, so the product does not keep the roles alive
+        composer._active_feature = 'feature1'
+        composer.compose(Suffix('1'), mocks.Base)
+        composer.compose(Suffix('2'), mocks.Base)
+        self.assertEquals('Hello12', mocks.Base().base_method('Hello'))
+        # neither does the memo
+        gc.collect()
+        self.assertEquals(0, len(composer._applied))
+        role = Suffix('3')
+        composer.compose(role, mocks.Base)
+        composer.compose(role, mocks.Base)
+        self.assertEquals('Hello123', mocks.Base().base_method('Hello'))
+
+    def test_repeated_selection(self):
+        from featuremonkey.test.mock import clibase
+        composer = Composer()
+        greet = clibase.greet
+        try:
+            composer.select('featuremonkey.test.mock.clifeature')
+            composed = clibase.greet
+            composer.select('featuremonkey.test.mock.clifeature')
+            self.assertTrue(clibase.greet is composed)
+        finally:
+            reload(clibase)
+        self.assertTrue(greet is not composed)
+
+    def test_repeated_composition_per_feature(self):
+        composer = Composer()
+        composer._active_feature = 'feature1'
+        composer.compose(mocks.MethodRefinement2(), mocks.Base)
+        composer._active_feature = 'feature2'
+        composer.compose(mocks.MethodRefinement2(), mocks.Base)
+        self.assertEquals('Hellorefinedrefined', mocks.Base().base_method('Hello'))
+
+class TestInstanceClassComposition(unittest.TestCase):
+
+    def setUp(self):
+        self.composer = Composer()
+
+    def test_shared_subclass(self):
+        instances = [mocks.Base() for _ in range(3)]
+        composed = self.composer.compose_instances([mocks.MethodRefinement()], instances)
+        self.assertEqual(instances, composed)
+        self.assertEqual(1, len(set(type(instance) for instance in instances)))
+        for instance in instances:
+            self.assertTrue(isinstance(instance, mocks.Base))
+            self.assertEqual('Hellorefined', instance.base_method('Hello'))
+            self.assertFalse('base_method' in instance.__dict__)
+        self.assertEqual('Hello', mocks.Base().base_method('Hello'))
+
+    def test_subclass_cache(self):
+        first = self.composer.compose_instances([mocks.MethodRefinement()], [mocks.Base()])
+        second = self.composer.compose_instances([mocks.MethodRefinement()], [mocks.Base()])
+        self.assertTrue(type(first[0]) is type(second[0]))
+        self.assertEqual('Hellorefined', second[0].base_method('Hello'))
+        other = self.composer.compose_instances([mocks.MethodRefinement2()], [mocks.Base()])
+        self.assertFalse(type(first[0]) is type(other[0]))
+
+    def test_configured_roles(self):
+
+        class Suffix(object):
+
+            def __init__(self, suffix):
+                self.suffix = suffix
+
+            def refine_base_method(self, original):
+                suffix = self.suffix
+
+                def base_method(self, a_str):
+                    return original(self, a_str) + suffix
+
+                return base_method
+
+        first, = self.composer.compose_instances([Suffix('1')], [mocks.Base()])
+        second, = self.composer.compose_instances([Suffix('2')], [mocks.Base()])
+        self.assertEqual('Hello1', first.base_method('Hello'))
+        self.assertEqual('Hello2', second.base_method('Hello'))
+
+    def test_role_order(self):
+        instance, = self.composer.compose_instances(
+            [mocks.MethodRefinement2(), mocks.MethodRefinement()], [mocks.Base()]
+        )
+        self.assertEqual('Hellorefinedrefined', instance.base_method('Hello'))
+
+    def test_slots_and_special_methods(self):
+        instance = mocks.SlotsBase(3)
+        self.composer.compose_instances(
+            [mocks.ReprRefinement(), mocks.MethodRefinement()], [instance]
+        )
+        self.assertEqual('<composed 3>', repr(instance))
+        self.assertEqual('Hello3refined', instance.base_method('Hello'))
+        self.assertEqual(3, instance.value)
+
+    def test_inherited_staticmethod(self):
+        class StaticChild(mocks.StaticBase):
+            pass
+
+        instance, = self.composer.compose_instances(
+            [mocks.StaticMethodRefinement()], [StaticChild()]
+        )
+        self.assertEqual('Hellorefined', instance.base_method('Hello'))
+
+    def test_noroles(self):
+        self.assertRaises(CompositionError, self.composer.compose_instances, [], [mocks.Base()])
+
+
 class TestModuleComposition(unittest.TestCase):
 
     def setUp(self):
@@ -287,5 +439,22 @@ class TestModuleComposition(unittest.TestCase):
         self.assertEquals(456, testmodule3.a)
         self.assertEquals(5, testmodule3.afunction(2, 2))
 
+    def test_compose_package(self):
+        base = 'featuremonkey.test.mock.mirrorbase'
+        feature = 'featuremonkey.test.mock.mirrorfeature'
+        self.assertEqual(True, base not in sys.modules)
+        compose_package(feature, base)
+        # nothing is imported before the base modules are
+        self.assertEqual(True, base not in sys.modules)
+        self.assertEqual(True, feature + '.sub.leaf' not in sys.modules)
+        from featuremonkey.test.mock.mirrorbase.sub import leaf
+        from featuremonkey.test.mock import mirrorbase
+        self.assertEqual('Hello you!', leaf.greet('you'))
+        self.assertEqual('mirrored', mirrorbase.package_attr)
+        self.assertEqual(42, mirrorbase.sub.sub_attr)
+        # modules without counterpart in the feature are left alone
+        from featuremonkey.test.mock.mirrorbase import untouched
+        self.assertEqual(1, untouched.value)
+
 if __name__ == '__main__':
     unittest.main()
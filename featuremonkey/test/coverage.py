@@ -0,0 +1,102 @@
+from __future__ import absolute_import
+from featuremonkey.composer import Composer
+from featuremonkey.coverage import CoverageCollector
+from featuremonkey.layers import call_below, layers
+from featuremonkey.test.mock import composer_mocks as mocks
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+
+class TestCoverage(unittest.TestCase):
+
+    def compose(self, use_monitoring):
+        class Base(object):
+            def base_method(self, a_str):
+                return a_str
+
+        composer = Composer()
+        collector = CoverageCollector(use_monitoring).install(composer)
+        composer._active_feature = 'featurea'
+        composer.compose(mocks.MethodRefinement(), Base)
+        composer._active_feature = 'featureb'
+        composer.compose(mocks.MethodIntroduction(), mocks.MemberIntroduction(), Base)
+        composer._active_feature = None
+        composer.compose(mocks.MethodRefinement2(), Base)
+        self.addCleanup(collector.uninstall)
+        return collector, Base
+
+    def check(self, collector, Base):
+        report = collector.report()
+        self.assertEqual(0, report['featurea']['executed'])
+        self.assertEqual(1, report['featureb']['layers'])
+        self.assertEqual('refinedrefined', Base().base_method(''))
+        self.assertEqual('refinedrefined', Base().base_method(''))
+        report = collector.report()
+        self.assertEqual(dict(layers=1, executed=1, unused=[]), report['featurea'])
+        self.assertEqual(1, report[None]['executed'])
+        self.assertEqual(['method'], [layer['attribute'] for layer in report['featureb']['unused']])
+        self.assertTrue('featureb: 0 of 1 layers executed' in collector.format_report())
+
+    def test_probes(self):
+        collector, Base = self.compose(False)
+        self.assertEqual('base_method', Base.base_method.__name__)
+        probe = Base.__dict__['base_method']
+        self.check(collector, Base)
+        # the top probe is replaced by its layer on the first call
+        self.assertFalse(Base.__dict__['base_method'] is probe)
+        self.assertTrue(Base.__dict__['base_method'] is probe.__wrapped__)
+        self.assertEqual(
+            ['original', 'refinement', 'refinement'],
+            [layer.operation for layer in layers(Base, 'base_method')]
+        )
+        self.assertEqual('refined', call_below(Base(), 'base_method', None, ''))
+
+    def test_shared_code(self):
+        # with sys.monitoring the first layer is monitored, the second probed
+        collector, Base = self.compose(hasattr(sys, 'monitoring'))
+
+        def suffix(text):
+
+            class Suffix(object):
+
+                def refine_base_method(self, original):
+
+                    def base_method(self, a_str):
+                        return original(self, a_str) + text
+
+                    return base_method
+
+            return Suffix()
+
+        composer = collector._composers[0]
+        composer.compose(suffix('1'), Base)
+        composer.compose(suffix('2'), Base)
+        self.assertEqual([False, False], collector.hits[-2:])
+        self.assertEqual('refinedrefined12', Base().base_method(''))
+        self.assertEqual([True, True], collector.hits[-2:])
+
+    @unittest.skipIf(not hasattr(sys, 'monitoring'), 'needs sys.monitoring')
+    def test_monitoring(self):
+        collector, Base = self.compose(True)
+        self.assertTrue(collector._codes)
+        self.check(collector, Base)
+
+    def test_dump(self):
+        collector, Base = self.compose(False)
+        fd, filename = tempfile.mkstemp('.json')
+        os.close(fd)
+        try:
+            collector.dump(filename)
+            with open(filename) as report:
+                report = json.load(report)
+            self.assertEqual(1, report['featurea']['layers'])
+            self.assertEqual(1, report['(no feature)']['layers'])
+        finally:
+            os.remove(filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
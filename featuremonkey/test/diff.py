@@ -0,0 +1,133 @@
+from __future__ import absolute_import
+from featuremonkey.diff import diff, diff_equations, diff_traces
+from featuremonkey.static import Plan, PlanEntry
+from featuremonkey.tracing.binary import dump_operation_log
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def _entry(role, attribute='index', feature='f', source_hash='h', operation='refinement'):
+    return PlanEntry(feature, role, 'app:module', attribute, operation, source_hash)
+
+
+def _operation(role, attribute='index', new_value='source', operation='refinement'):
+    return dict(
+        type=operation, base='app:module', target_attrname=attribute,
+        role=role, feature='f', new_value=new_value, old_value=None,
+    )
+
+
+class TestDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_identical(self):
+        plan = Plan([_entry('A', operation='introduction'), _entry('B')])
+        product_diff = diff(plan, Plan(list(plan.entries)))
+        self.assertFalse(product_diff)
+        self.assertEqual('', product_diff.format())
+
+    def test_plans(self):
+        old = Plan([
+            _entry('A', operation='introduction'), _entry('B'), _entry('C'),
+            _entry('D', attribute='other'), _entry('X', attribute='child', operation='child'),
+        ])
+        new = Plan([
+            _entry('A', operation='introduction'), _entry('C'), _entry('B', source_hash='h2'),
+            _entry('E'), _entry('D', attribute='other'),
+        ])
+        product_diff = diff(old, new)
+        self.assertEqual(1, len(product_diff))
+        attribute_diff = list(product_diff)[0]
+        self.assertEqual(('app:module', 'index'), attribute_diff[:2])
+        self.assertEqual([('f', 'E', 'refinement')], attribute_diff.added)
+        self.assertEqual([], attribute_diff.removed)
+        self.assertEqual([('f', 'B', 'refinement')], attribute_diff.changed)
+        old_order, new_order = attribute_diff.reordered
+        self.assertEqual(['A', 'B', 'C'], [role for _, role, _ in old_order])
+        self.assertEqual(['A', 'C', 'B'], [role for _, role, _ in new_order])
+        self.assertTrue('+ refinement by E (f)' in product_diff.format())
+        self.assertTrue('order: A, B, C -> A, C, B' in product_diff.format())
+        removed = diff(new, Plan(new.entries[:-1]))
+        self.assertEqual([('f', 'D', 'refinement')], list(removed)[0].removed)
+
+    def test_repeated_layers(self):
+        old = Plan([_entry('A'), _entry('A')])
+        self.assertEqual([('f', 'A', 'refinement')], list(diff(old, Plan(old.entries[:1])))[0].removed)
+
+    def test_operation_logs(self):
+
+        def refine_one(original):
+            return original
+
+        def refine_two(original):
+            return None
+
+        old = [_operation('A', new_value=refine_one), _operation('B', new_value={'a': 1})]
+        new = [_operation('A', new_value=refine_two), _operation('B', new_value={'a': 2})]
+        self.assertEqual(['A', 'B'], [role for _, role, _ in list(diff(old, new))[0].changed])
+        self.assertFalse(diff([_operation('B', new_value=5)], [_operation('B', new_value=5)]))
+        self.assertTrue(diff([_operation('B', new_value=5)], [_operation('B', new_value=6)]))
+        # plans and logs hash differently, only the layers are compared
+        plan = Plan([_entry('A'), _entry('B')])
+        self.assertFalse(diff(plan, new))
+
+    def test_moved_code(self):
+        source = 'def refine_a(original):\n    def a():\n        return original() + 1\n    return a\n'
+        old, new = {}, {}
+        exec(compile(source, 'old.py', 'exec'), old)
+        exec(compile('\n\n' + source, 'new.py', 'exec'), new)
+        self.assertFalse(diff(
+            [_operation('A', new_value=old['refine_a'])], [_operation('A', new_value=new['refine_a'])]
+        ))
+        exec(compile(source.replace('+ 1', '+ 2'), 'new.py', 'exec'), new)
+        self.assertTrue(diff(
+            [_operation('A', new_value=old['refine_a'])], [_operation('A', new_value=new['refine_a'])]
+        ))
+
+    def test_closures(self):
+
+        def factory(suffix):
+
+            def refine_a(original):
+                return lambda: original() + suffix
+
+            return refine_a
+
+        self.assertFalse(diff(
+            [_operation('A', new_value=factory('1'))], [_operation('A', new_value=factory('1'))]
+        ))
+        self.assertTrue(diff(
+            [_operation('A', new_value=factory('1'))], [_operation('A', new_value=factory('2'))]
+        ))
+
+    def test_traces(self):
+        old = os.path.join(self.tmpdir, 'old.trace')
+        new = os.path.join(self.tmpdir, 'new.trace')
+        dump_operation_log([_operation('A'), _operation('B')], old)
+        dump_operation_log([_operation('A', new_value='changed'), _operation('C')], new)
+        attribute_diff = list(diff_traces(old, new))[0]
+        self.assertEqual([('f', 'C', 'refinement')], attribute_diff.added)
+        self.assertEqual([('f', 'B', 'refinement')], attribute_diff.removed)
+        self.assertEqual([('f', 'A', 'refinement')], attribute_diff.changed)
+        self.assertFalse(diff_traces(old, old))
+
+    def test_equations(self):
+        old = os.path.join(self.tmpdir, 'old.equation')
+        new = os.path.join(self.tmpdir, 'new.equation')
+        with io.open(old, 'w') as equation:
+            equation.write(u'featuremonkey.test.mock.clifeature\n')
+        with io.open(new, 'w') as equation:
+            equation.write(u'\n')
+        product_diff = diff_equations(old, new)
+        self.assertEqual(
+            [('Greeter:type', 'greet'), ('featuremonkey.test.mock.clibase:module', 'greet')],
+            [attribute_diff[:2] for attribute_diff in product_diff]
+        )
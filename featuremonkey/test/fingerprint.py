@@ -0,0 +1,70 @@
+from __future__ import absolute_import
+from featuremonkey.composer import CompositionError
+from featuremonkey.fingerprint import FileHashCache, fingerprint, product_fingerprint
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.write('featurea/__init__.py', '')
+        self.write('featurea/feature.py', 'def select(composer):\n    pass\n')
+        self.write('featurea/sub/roles.py', 'introduce_a = 1\n')
+        self.write('featurea/__pycache__/feature.cpython.pyc', 'ignored')
+        self.write('featureb.py', 'introduce_b = 2\n')
+        self.equation = os.path.join(self.tmpdir, 'product.equation')
+        with io.open(self.equation, 'w') as equation:
+            equation.write(u'featurea\n# comment\nfeatureb\n')
+        self.paths = [self.tmpdir]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir, *name.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with io.open(path, 'w') as source:
+            source.write(content if isinstance(content, type(u'')) else content.decode('utf-8'))
+        return path
+
+    def test_stable(self):
+        key = fingerprint(self.equation, self.paths, FileHashCache())
+        self.assertEqual(40, len(key))
+        self.assertEqual(key, fingerprint(self.equation, self.paths, FileHashCache()))
+        self.assertEqual(key, product_fingerprint(['featurea', 'featureb'], self.paths))
+
+    def test_changes(self):
+        cache = FileHashCache()
+        key = fingerprint(self.equation, self.paths, cache)
+        self.assertNotEqual(key, product_fingerprint(['featureb', 'featurea'], self.paths, cache))
+        self.write('featurea/__pycache__/roles.cpython.pyc', 'ignored')
+        self.assertEqual(key, fingerprint(self.equation, self.paths, cache))
+        self.write('featurea/sub/roles.py', 'introduce_a = 10\n')
+        self.assertNotEqual(key, fingerprint(self.equation, self.paths, cache))
+
+    def test_cache(self):
+        filename = os.path.join(self.tmpdir, 'hashes.json')
+        cache = FileHashCache(filename)
+        key = fingerprint(self.equation, self.paths, cache)
+        self.assertEqual(4, cache.misses)
+        fingerprint(self.equation, self.paths, cache)
+        self.assertEqual(4, cache.misses)
+        cache.save()
+        cache = FileHashCache(filename)
+        self.assertEqual(key, fingerprint(self.equation, self.paths, cache))
+        self.assertEqual(0, cache.misses)
+
+    def test_missing_feature(self):
+        self.assertRaises(
+            CompositionError, product_fingerprint, ['missingfeature'], self.paths
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+from __future__ import absolute_import
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# the only featuremonkey modules ``import featuremonkey`` may load
+EAGER_MODULES = (
+    'featuremonkey',
+    'featuremonkey.composer',
+    'featuremonkey.helpers',
+    'featuremonkey.importhooks',
+)
+
+# modules that must not be pulled in by ``import featuremonkey``,
+# including the stdlib modules only needed once composing starts
+DEFERRED_MODULES = (
+    'collections',
+    'enum',
+    'functools',
+    'importlib.util',
+    'inspect',
+    'pkgutil',
+    're',
+    'six',
+    'typing',
+    'weakref',
+    'featuremonkey.tracing',
+    'featuremonkey.tracing.logger',
+    'featuremonkey.tracing.serializer',
+)
+
+# json and os are imported afterwards, json pulls in re and friends
+_PROBE = '''
+import sys
+before = set(sys.modules)
+import featuremonkey
+modules = sorted(set(sys.modules) - before)
+import json, os
+print(json.dumps(dict(
+    modules=modules,
+    tracer_env='COMPOSITION_TRACER' in os.environ,
+    composer_created=featuremonkey._default_composer is not None,
+)))
+'''
+
+
+def _probe_import():
+    env = dict(os.environ)
+    env.pop('COMPOSITION_TRACER', None)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env['PYTHONPATH'] = os.pathsep.join([root] + [p for p in [env.get('PYTHONPATH')] if p])
+    output = subprocess.check_output([sys.executable, '-c', _PROBE], env=env)
+    return json.loads(output.decode('utf-8'))
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'lazy loading requires module __getattr__')
+class TestImportTime(unittest.TestCase):
+
+    def test_import_is_lazy(self):
+        result = _probe_import()
+        for module_name in DEFERRED_MODULES:
+            self.assertFalse(
+                module_name in result['modules'],
+                '%s is imported by "import featuremonkey"' % module_name
+            )
+        self.assertFalse(result['tracer_env'])
+        self.assertFalse(result['composer_created'])
+
+    def test_import_budget(self):
+        # what is imported, not how long it takes: timings are flaky on loaded machines
+        modules = [
+            module_name for module_name in _probe_import()['modules']
+            if module_name.split('.')[0] == 'featuremonkey'
+        ]
+        self.assertEqual(sorted(EAGER_MODULES), sorted(modules))
+
+    def test_module_level_api(self):
+        import featuremonkey
+        self.assertTrue(callable(featuremonkey.compose))
+        self.assertTrue(featuremonkey.compose.__self__ is featuremonkey._get_default_composer())
+        self.assertRaises(AttributeError, getattr, featuremonkey, 'no_such_attribute')
+
+
+if __name__ == '__main__':
+    unittest.main()
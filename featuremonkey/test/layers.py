@@ -0,0 +1,154 @@
+from __future__ import absolute_import
+from featuremonkey.composer import Composer, CompositionError
+from featuremonkey.layers import call_below, layer_below, layers, original
+from featuremonkey.test.mock import composer_mocks as mocks
+import unittest
+
+try:
+    #python3
+    from imp import reload
+except ImportError:
+    #python2
+    pass
+
+
+def _suffix(suffix):
+
+    class Suffix(object):
+
+        def refine_base_method(self, original):
+
+            def base_method(self, a_str):
+                return original(self, a_str) + suffix
+
+            return base_method
+
+    return Suffix()
+
+
+class Introduction(object):
+
+    def introduce_greet(self):
+
+        def greet(self, name):
+            return 'Hello ' + name
+
+        return greet
+
+    def introduce_helper(self):
+
+        def helper(value):
+            return value * 2
+
+        return helper
+
+
+class GreetRefinement(object):
+
+    def refine_greet(self, original):
+
+        def greet(self, name):
+            return original(self, name) + '!'
+
+        return greet
+
+    def refine_helper(self, original):
+
+        def helper(value):
+            return original(value) + 1
+
+        return helper
+
+
+class TestLayers(unittest.TestCase):
+
+    def setUp(self):
+        self.composer = Composer()
+
+    def tearDown(self):
+        reload(mocks)
+
+    def compose(self, feature, *things):
+        self.composer._active_feature = feature
+        try:
+            self.composer.compose(*things)
+        finally:
+            self.composer._active_feature = None
+
+    def test_layers(self):
+        base_method = mocks.Base.base_method
+        self.compose('feature1', _suffix('1'), mocks.Base)
+        self.compose('feature2', _suffix('2'), mocks.Base)
+        chain = layers(mocks.Base, 'base_method')
+        self.assertEqual([None, 'feature1', 'feature2'], [layer.feature for layer in chain])
+        self.assertEqual(
+            ['original', 'refinement', 'refinement'], [layer.operation for layer in chain]
+        )
+        self.assertEqual(['Suffix', 'Suffix'], [layer.role for layer in chain[1:]])
+        self.assertTrue(chain[0].function is base_method)
+        self.assertEqual(chain, layers(mocks.Base(), 'base_method'))
+        self.assertEqual(1, len(layers(mocks.Base, '__init__')))
+        self.assertRaises(AttributeError, layers, mocks.Base, 'missing')
+
+    def test_call_below(self):
+        self.compose('feature1', _suffix('1'), mocks.Base)
+        self.compose('audit', _suffix('A'), mocks.Base)
+        self.compose('feature2', _suffix('2'), mocks.Base)
+        obj = mocks.Base()
+        self.assertEqual('x1A2', obj.base_method('x'))
+        self.assertEqual('x1', call_below(obj, 'base_method', 'audit', 'x'))
+        self.assertEqual('x', original(obj, 'base_method')('x'))
+        self.assertEqual('x1A', layer_below(obj, 'base_method', 'feature2')('x'))
+        self.assertEqual('x1', call_below(mocks.Base, 'base_method', 'audit', obj, 'x'))
+        self.assertRaises(CompositionError, call_below, obj, 'base_method', 'unknown', 'x')
+
+    def test_instance(self):
+        self.compose('feature1', _suffix('1'), mocks.Base)
+        obj = mocks.Base()
+        self.compose('feature2', _suffix('2'), obj)
+        self.assertEqual(
+            [None, 'feature1', 'feature2'], [layer.feature for layer in layers(obj, 'base_method')]
+        )
+        self.assertEqual('x1', call_below(obj, 'base_method', 'feature2', 'x'))
+        self.assertEqual('x', original(obj, 'base_method')('x'))
+        self.assertEqual(2, len(layers(mocks.Base, 'base_method')))
+
+    def test_introductions(self):
+        self.compose('feature1', Introduction(), mocks.Base)
+        self.compose('feature2', GreetRefinement(), mocks.Base)
+        obj = mocks.Base()
+        self.assertEqual(
+            ['introduction', 'refinement'], [layer.operation for layer in layers(obj, 'greet')]
+        )
+        self.assertEqual('Hello Joe', call_below(obj, 'greet', 'feature2', 'Joe'))
+        self.assertRaises(CompositionError, layer_below, obj, 'greet', 'feature1')
+        self.assertEqual(3, mocks.Base.helper(1))
+        self.assertEqual(2, original(mocks.Base, 'helper')(1))
+
+    def test_special_methods(self):
+
+        class StaticRefinement(object):
+
+            def refine_base_method(self, original):
+                return lambda a_str: original(a_str) + 'refined'
+
+        self.compose('feature1', StaticRefinement(), mocks.StaticBase)
+        self.assertEqual('x', original(mocks.StaticBase, 'base_method')('x'))
+        self.assertEqual('x', original(mocks.StaticBase(), 'base_method')('x'))
+        self.compose('feature1', mocks.ClassMethodRefinement(), mocks.ClassMethodBase)
+        self.assertEqual('x', call_below(mocks.ClassMethodBase(), 'base_method', 'feature1', 'x'))
+
+    def test_modules(self):
+
+        class Module(object):
+            introduce_func = lambda self: (lambda: 'func')
+
+        class Refinement(object):
+            refine_func = lambda self, original: (lambda: original() + ' refined')
+
+        import types
+        module = types.ModuleType(str('layermodule'))
+        self.compose('feature1', Module(), module)
+        self.compose('feature2', Refinement(), module)
+        self.assertEqual('func refined', module.func())
+        self.assertEqual('func', call_below(module, 'func', 'feature2'))
@@ -0,0 +1,93 @@
+from __future__ import absolute_import
+from featuremonkey import merge
+from featuremonkey.composer import Composer, CompositionError
+from featuremonkey.tracing.logger import OperationLogger
+import unittest
+
+
+class Settings(object):
+    pass
+
+
+class TestMerge(unittest.TestCase):
+
+    def setUp(self):
+        self.composer = Composer()
+        self.settings = Settings()
+        self.settings.APPS = ['auth', 'admin']
+        self.settings.ROUTES = {'/': 'index'}
+        self.settings.FLAGS = set(['debug'])
+
+    def compose(self, **transformations):
+        role = type(str('Role'), (object,), transformations)()
+        self.composer.compose(role, self.settings)
+
+    def test_in_place(self):
+        apps, routes, flags = self.settings.APPS, self.settings.ROUTES, self.settings.FLAGS
+        self.compose(
+            merge_APPS=['blog'], merge_ROUTES={'/blog': 'blog'}, merge_FLAGS=set(['debug', 'cache'])
+        )
+        self.assertTrue(self.settings.APPS is apps)
+        self.assertTrue(self.settings.ROUTES is routes)
+        self.assertTrue(self.settings.FLAGS is flags)
+        self.assertEqual(['auth', 'admin', 'blog'], apps)
+        self.assertEqual({'/': 'index', '/blog': 'blog'}, routes)
+        self.assertEqual(set(['debug', 'cache']), flags)
+
+    def test_conflicts(self):
+        self.assertRaises(CompositionError, self.compose, merge_ROUTES={'/': 'home'})
+        self.assertRaises(CompositionError, self.compose, merge_APPS=['auth'])
+        # equal values do not conflict
+        self.compose(merge_ROUTES={'/': 'index'})
+        self.compose(merge_ROUTES=merge({'/': 'home'}, conflict='keep'))
+        self.assertEqual('index', self.settings.ROUTES['/'])
+        self.compose(merge_ROUTES=merge({'/': 'home'}, conflict='override'))
+        self.assertEqual('home', self.settings.ROUTES['/'])
+        self.compose(merge_APPS=merge(['auth'], conflict='override'))
+        self.assertEqual(['admin', 'auth'], self.settings.APPS)
+
+    def test_ordering(self):
+        self.compose(merge_APPS=merge(['blog'], before='admin'))
+        self.compose(merge_APPS=merge(['news', 'auth'], after='admin', conflict='keep'))
+        self.assertEqual(['auth', 'blog', 'admin', 'news'], self.settings.APPS)
+        self.assertRaises(
+            CompositionError, self.compose, merge_APPS=merge(['x'], after='missing')
+        )
+        self.assertRaises(ValueError, merge, {'a': 1}, before='b')
+        self.assertRaises(ValueError, merge, [], conflict='ignore')
+
+    def test_failed_merge_changes_nothing(self):
+        self.assertRaises(
+            CompositionError, self.compose, merge_ROUTES={'/blog': 'blog', '/': 'home'}
+        )
+        self.assertEqual({'/': 'index'}, self.settings.ROUTES)
+        self.assertRaises(
+            CompositionError, self.compose,
+            merge_APPS=merge(['auth', 'admin'], after='admin', conflict='override'),
+        )
+        self.assertEqual(['auth', 'admin'], self.settings.APPS)
+
+    def test_invalid_targets(self):
+        self.assertRaises(CompositionError, self.compose, merge_MISSING=['x'])
+        self.assertRaises(CompositionError, self.compose, merge_APPS={'x': 1})
+        self.settings.NAMES = ('a',)
+        self.assertRaises(CompositionError, self.compose, merge_NAMES=('b',))
+
+    def test_traced_as_delta(self):
+        logger = OperationLogger()
+        logger.operation_log = []
+        self.composer.composition_tracer = logger
+        self.compose(merge_APPS=merge(['blog'], before='admin'), merge_ROUTES={'/blog': 'blog'})
+        self.assertEqual(
+            [
+                dict(inserted=[1, ['blog']]),
+                dict(added={'/blog': 'blog'}),
+            ],
+            [operation['new_value'] for operation in logger.operation_log]
+        )
+        self.assertEqual(['merge', 'merge'], [operation['type'] for operation in logger.operation_log])
+        self.assertEqual([None, None], [operation['old_value'] for operation in logger.operation_log])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+from __future__ import absolute_import
+from featuremonkey.composer import Composer
+from featuremonkey.metrics import ChainDepthWarning
+from featuremonkey.test.mock import composer_mocks as mocks
+import unittest
+import warnings
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        class Base(object):
+            def base_method(self, a_str):
+                return a_str
+        self.Base = Base
+        self.composer = Composer()
+
+    def test_chain_depth(self):
+        stats = self.composer.stats
+        self.composer.compose(
+            mocks.MethodRefinement(), mocks.MethodRefinement2(),
+            mocks.MemberIntroduction(), self.Base
+        )
+        self.assertEqual(2, stats.chain_depth('Base:type', 'base_method'))
+        self.assertEqual(0, stats.chain_depth('Base:type', 'a'))
+        self.assertEqual([('Base:type', 'base_method', 2)], stats.deepest())
+        self.assertEqual({'Base:type': 1}, stats.introductions())
+        self.assertEqual(2, stats.operations['refinement'][0])
+        self.assertEqual(1, stats.operations['introduction'][0])
+        self.assertTrue(stats.overhead('Base:type', 'base_method') >= 0)
+        self.assertTrue('Base:type.base_method' in stats.report())
+
+    def test_instance_compositions(self):
+        self.composer.compose(mocks.MemberIntroduction(), self.Base())
+        self.composer.compose_instances([mocks.MethodRefinement()], [self.Base(), self.Base()])
+        self.assertEqual(3, self.composer.stats.instance_compositions)
+
+    def test_watch(self):
+        stats = self.composer.stats
+        stats.watch('*:type.base_method', max_depth=1)
+        self.composer.compose(mocks.MethodRefinement(), self.Base)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.composer.compose(mocks.MethodRefinement2(), self.Base)
+        self.assertEqual([ChainDepthWarning], [w.category for w in caught])
+        self.assertEqual([('Base:type', 'base_method', 2, 1)], stats.violations())
+
+
+if __name__ == '__main__':
+    unittest.main()
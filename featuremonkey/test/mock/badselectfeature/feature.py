@@ -0,0 +1,2 @@
+def select(composer, extra):
+    pass
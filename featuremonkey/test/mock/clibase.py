@@ -0,0 +1,8 @@
+def greet(name):
+    return 'Hello ' + name
+
+
+class Greeter(object):
+
+    def greet(self, name):
+        return 'Hello ' + name
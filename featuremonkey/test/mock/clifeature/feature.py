@@ -0,0 +1,5 @@
+def select(composer):
+    from featuremonkey.test.mock import clibase
+    from . import roles
+    composer.compose(roles, clibase)
+    composer.compose(roles.GreeterRole(), clibase.Greeter)
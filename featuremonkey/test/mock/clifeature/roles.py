@@ -0,0 +1,16 @@
+def refine_greet(original):
+
+    def greet(name):
+        return original(name) + '!'
+
+    return greet
+
+
+class GreeterRole(object):
+
+    def refine_greet(self, original):
+
+        def greet(self, name):
+            return original(self, name) + '!'
+
+        return greet
@@ -76,3 +76,37 @@ class ClassMethodRefinement(object):
 
 
 
+
+
+class SlotsBase(object):
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def base_method(self, a_str):
+        return a_str + str(self.value)
+
+
+class ReprRefinement(object):
+
+    def refine___repr__(self, original):
+
+        def __repr__(self):
+            return '<composed %s>' % self.value
+
+        return __repr__
+
+
+class SuffixRefinement(object):
+
+    def __init__(self, suffix='refined'):
+        self.suffix = suffix
+
+    def refine_base_method(self, original):
+        suffix = self.suffix
+
+        def base_method(self, a_str):
+            return original(self, a_str) + suffix
+
+        return base_method
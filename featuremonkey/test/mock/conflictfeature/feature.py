@@ -0,0 +1,10 @@
+def select(composer):
+    from featuremonkey.test.mock import testmodule1
+
+    class ConflictingRole(object):
+        introduce_attr_in_module = 1
+        introduce_new_attr = 2
+        refine_new_attr = 3
+        refine_missing_attr = 4
+
+    composer.compose(ConflictingRole(), testmodule1)
@@ -0,0 +1 @@
+package_attr = 'base'
@@ -0,0 +1 @@
+value = 1
@@ -0,0 +1 @@
+refine_package_attr = 'mirrored'
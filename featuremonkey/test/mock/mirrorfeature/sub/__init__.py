@@ -0,0 +1 @@
+introduce_sub_attr = 42
@@ -0,0 +1,116 @@
+from featuremonkey.pointcuts import pointcut
+
+
+def greet(name):
+    return 'Hello ' + name
+
+
+class GreetingRefinement(object):
+
+    def refine_greet(self, original):
+
+        def greet(name):
+            return original(name) + '!'
+
+        return greet
+
+
+class Account(object):
+
+    def describe(self):
+        return 'account'
+
+    @staticmethod
+    def currency():
+        return 'EUR'
+
+    @classmethod
+    def kind(cls):
+        return cls.__name__
+
+
+class AccountRefinement(object):
+
+    def refine_describe(self, original):
+
+        def describe(self):
+            return 'refined ' + original(self)
+
+        return describe
+
+    def refine_currency(self, original):
+
+        def currency():
+            return original().lower()
+
+        return currency
+
+    def introduce_balance(self):
+
+        def balance(self):
+            return 0
+
+        return balance
+
+
+class Wallet(object):
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def describe(self):
+        return 'wallet of ' + self.owner
+
+
+class SlottedWallet(object):
+    __slots__ = ('owner',)
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def describe(self):
+        return 'wallet of ' + self.owner
+
+
+class WalletRefinement(object):
+    introduce_limit = 10
+
+    def refine_describe(self, original):
+
+        def describe(self):
+            return original(self) + ' (refined)'
+
+        return describe
+
+    def introduce_spend(self):
+
+        def spend(self, amount):
+            return amount <= self.limit
+
+        return spend
+
+
+class WalletSuffix(object):
+
+    def __init__(self, suffix):
+        self.suffix = suffix
+
+    def refine_describe(self, original):
+        suffix = self.suffix
+
+        def describe(self):
+            return original(self) + suffix
+
+        return describe
+
+
+def exclaimed(original):
+
+    def exclaim(*args, **kws):
+        return original(*args, **kws) + '!'
+
+    return exclaim
+
+
+class WalletExclamation(object):
+    pointcut_exclaim = pointcut(exclaimed, names=['desc*'])
@@ -0,0 +1,2 @@
+def handler():
+    return 'base'
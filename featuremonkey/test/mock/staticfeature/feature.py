@@ -0,0 +1,14 @@
+from featuremonkey.test.mock import testmodule1
+
+
+def select(composer):
+    from . import roles
+    from .roles import ClassRole
+    composer.compose(roles, testmodule1)
+    composer.compose(ClassRole(), testmodule1.ClassInModule)
+    composer.compose_later(
+        'featuremonkey.test.mock.staticfeature.roles',
+        'featuremonkey.test.mock.testmodule2'
+    )
+    for role in (roles,):
+        composer.compose(role, testmodule1)
@@ -0,0 +1,24 @@
+introduce_static_attr = 1
+
+
+def refine_func_in_module(original):
+
+    def func_in_module(arg1, arg2):
+        return original(arg1, arg2) + 1
+
+    return func_in_module
+
+
+class ClassRole(object):
+
+    introduce_a = 1
+
+    def refine_plus(self, original):
+
+        def plus(self, arg1, arg2):
+            return original(self, arg1, arg2) * 2
+
+        return plus
+
+    class child_nested(object):
+        introduce_b = 2
@@ -0,0 +1,24 @@
+events = []
+
+
+def numbers(count):
+    for number in range(count):
+        events.append(('source', number))
+        yield number
+
+
+class Repository(object):
+
+    def __init__(self, count):
+        self.count = count
+
+    def rows(self):
+        return iter(range(self.count))
+
+    @staticmethod
+    def static_rows(count):
+        return range(count)
+
+    @classmethod
+    def class_rows(cls, count):
+        return range(count)
@@ -0,0 +1,14 @@
+def greet(name):
+    return 'Hello ' + name
+
+
+class Greeter(object):
+    greeting = 'Hello'
+    tags = ['a']
+
+    def greet(self, name):
+        return self.greeting + ' ' + name
+
+    @staticmethod
+    def punctuation():
+        return '.'
@@ -0,0 +1,6 @@
+def refine_greet(original):
+
+    def greet(name):
+        return original(name) + ' from a composed worker'
+
+    return greet
@@ -0,0 +1,5 @@
+from featuremonkey.test.mock import workerbase
+
+
+def greet(name):
+    return workerbase.greet(name)
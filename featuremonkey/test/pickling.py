@@ -0,0 +1,96 @@
+from __future__ import absolute_import
+import featuremonkey
+from featuremonkey.test.mock import picklemocks as mocks
+import pickle
+import unittest
+
+
+def roundtrip(obj):
+    return pickle.loads(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+
+class TestPickling(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        featuremonkey.compose(mocks.GreetingRefinement(), mocks)
+        featuremonkey.compose(mocks.AccountRefinement(), mocks.Account)
+
+    def test_module_function(self):
+        greet = roundtrip(mocks.greet)
+        self.assertTrue(greet is mocks.greet)
+        self.assertEqual('Hello Joe!', greet('Joe'))
+
+    def test_methods(self):
+        self.assertTrue(roundtrip(mocks.Account.describe) is mocks.Account.describe)
+        self.assertTrue(roundtrip(mocks.Account.currency) is mocks.Account.currency)
+        self.assertTrue(roundtrip(mocks.Account.balance) is mocks.Account.balance)
+        self.assertEqual('refined account', roundtrip(mocks.Account().describe)())
+        self.assertEqual('Account', roundtrip(mocks.Account.kind)())
+
+    def test_composed_instance(self):
+        wallet = mocks.Wallet('Joe')
+        featuremonkey.compose(mocks.WalletRefinement(), wallet)
+        copy = roundtrip(wallet)
+        self.assertEqual('wallet of Joe (refined)', copy.describe())
+        self.assertTrue(copy.spend(10))
+        self.assertFalse(copy.spend(11))
+        # the copy is composed the same way and can be pickled again
+        self.assertEqual('wallet of Joe (refined)', roundtrip(copy).describe())
+        self.assertEqual('wallet of Joe (refined)', roundtrip(wallet.describe)())
+        # other instances of the class are not affected
+        self.assertEqual('wallet of Ann', roundtrip(mocks.Wallet('Ann')).describe())
+
+    def test_configured_role(self):
+        wallet = mocks.Wallet('Joe')
+        featuremonkey.compose(mocks.WalletSuffix('!'), wallet)
+        self.assertEqual('wallet of Joe!', roundtrip(wallet).describe())
+        wallet, = featuremonkey.compose_instances([mocks.WalletSuffix('?')], [mocks.Wallet('Ann')])
+        self.assertEqual('wallet of Ann?', roundtrip(wallet).describe())
+
+    def test_pointcut(self):
+        wallet = mocks.Wallet('Joe')
+        featuremonkey.compose(mocks.WalletExclamation(), wallet)
+        copy = roundtrip(wallet)
+        self.assertEqual('wallet of Joe!', copy.describe())
+        self.assertEqual('wallet of Joe!', roundtrip(copy).describe())
+
+    def test_protocols(self):
+        wallet = mocks.Wallet('Joe')
+        featuremonkey.compose(mocks.WalletRefinement(), wallet)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(wallet, protocol))
+            self.assertEqual('wallet of Joe (refined)', copy.describe())
+            copy = pickle.loads(pickle.dumps(mocks.Wallet('Ann'), protocol))
+            self.assertEqual('wallet of Ann', copy.describe())
+            self.assertFalse('__reduce_ex__' in copy.__dict__)
+
+    def test_generated_subclass_instance(self):
+        wallet, = featuremonkey.compose_instances(
+            [mocks.WalletRefinement()], [mocks.SlottedWallet('Joe')]
+        )
+        copy = roundtrip(wallet)
+        self.assertTrue(type(copy) is type(wallet))
+        self.assertEqual('Joe', copy.owner)
+        self.assertEqual('wallet of Joe (refined)', copy.describe())
+
+    def test_local_role(self):
+
+        class LocalRefinement(object):
+
+            def refine_describe(self, original):
+
+                def describe(self):
+                    return 'local'
+
+                return describe
+
+        wallet = mocks.Wallet('Joe')
+        featuremonkey.compose(LocalRefinement(), wallet)
+        self.assertRaises(
+            (pickle.PicklingError, AttributeError, TypeError), pickle.dumps, wallet
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+from __future__ import absolute_import
+from featuremonkey import Composer
+from featuremonkey.layers import layers
+from featuremonkey.pointcuts import _attribute_index, mark, pointcut
+import types
+import unittest
+
+
+def _counted(calls):
+
+    def refinement(original):
+
+        def wrapper(*args, **kws):
+            calls.append(original.__name__)
+            return original(*args, **kws)
+
+        wrapper.__name__ = original.__name__
+        return wrapper
+
+    return refinement
+
+
+class _RecordingTracer(object):
+
+    def __init__(self):
+        self.operations = []
+
+    def log(self, operation=None, new_value='', old_value=''):
+        self.operations.append(operation)
+
+    def log_new_value(self, operation=None, new_value=''):
+        pass
+
+
+def _make_base():
+
+    class Base(object):
+
+        def get_name(self):
+            return 'name'
+
+        def get_value(self):
+            return 42
+
+        def save(self):
+            return 'saved'
+
+        @mark('audited')
+        def delete(self):
+            return 'deleted'
+
+        def _get_private(self):
+            return 'private'
+
+        @staticmethod
+        def get_static(value):
+            return value
+
+        @classmethod
+        def get_class(cls):
+            return cls.__name__
+
+        get_constant = 'not callable'
+
+    return Base
+
+
+class TestPointcuts(unittest.TestCase):
+
+    def setUp(self):
+        self.composer = Composer()
+        self.calls = []
+
+    def test_names(self):
+        Base = _make_base()
+
+        class Timing(object):
+            pointcut_timing = pointcut(_counted(self.calls), names=['get_*', 'save'])
+
+        self.composer.compose(Timing(), Base)
+        obj = Base()
+        self.assertEqual('name', obj.get_name())
+        self.assertEqual(42, obj.get_value())
+        self.assertEqual('saved', obj.save())
+        self.assertEqual('deleted', obj.delete())
+        self.assertEqual('private', obj._get_private())
+        self.assertEqual('not callable', Base.get_constant)
+        self.assertEqual(['get_name', 'get_value', 'save'], self.calls)
+
+    def test_special_methods(self):
+        Base = _make_base()
+
+        class Timing(object):
+            pointcut_timing = pointcut(_counted(self.calls), names='get_[sc]*')
+
+        self.composer.compose(Timing(), Base)
+        self.assertTrue(isinstance(Base.__dict__['get_static'], staticmethod))
+        self.assertTrue(isinstance(Base.__dict__['get_class'], classmethod))
+        self.assertEqual(3, Base.get_static(3))
+        self.assertEqual(4, Base().get_static(4))
+        self.assertEqual('Base', Base.get_class())
+        self.assertEqual(['get_static', 'get_static', 'get_class'], self.calls)
+
+    def test_marker_and_predicate(self):
+        Base = _make_base()
+
+        class Audit(object):
+            pointcut_audit = pointcut(_counted(self.calls), marker='audited')
+            pointcut_values = pointcut(
+                _counted(self.calls), predicate=lambda name, value: name.endswith('value')
+            )
+
+        self.composer.compose(Audit(), Base)
+        obj = Base()
+        obj.delete()
+        obj.get_value()
+        obj.save()
+        self.assertEqual(['delete', 'get_value'], self.calls)
+
+    def test_private_names(self):
+        Base = _make_base()
+
+        class Private(object):
+            pointcut_private = pointcut(_counted(self.calls), names=['_get_*'])
+
+        self.composer.compose(Private(), Base)
+        Base()._get_private()
+        self.assertEqual(['_get_private'], self.calls)
+
+    def test_layers_and_trace(self):
+        Base = _make_base()
+        tracer = self.composer.composition_tracer = _RecordingTracer()
+
+        class Introduction(object):
+
+            def introduce_get_greeting(self):
+
+                def get_greeting(self):
+                    return 'hello'
+
+                return get_greeting
+
+            pointcut_timing = pointcut(_counted(self.calls), names=['get_greeting', 'save'])
+
+        self.composer.compose(Introduction(), Base)
+        self.assertEqual('hello', Base().get_greeting())
+        self.assertEqual(
+            ['introduction', 'refinement'],
+            [layer.operation for layer in layers(Base, 'get_greeting')]
+        )
+        self.assertEqual(['get_greeting'], self.calls)
+        refinements = [
+            operation['target_attrname']
+            for operation in tracer.operations
+            if operation['type'] == 'refinement'
+        ]
+        self.assertEqual(['get_greeting', 'save'], refinements)
+
+    def test_instances_and_modules(self):
+        Base = _make_base()
+        obj = Base()
+        other = Base()
+
+        class Timing(object):
+            pointcut_timing = pointcut(_counted(self.calls), names=['save', 'func*'])
+
+        self.composer.compose(Timing(), obj)
+        self.assertEqual('saved', obj.save())
+        self.assertEqual('saved', other.save())
+        self.assertEqual(['save'], self.calls)
+
+        module = types.ModuleType(str('pointcutmodule'))
+        exec('def func():\n    return "func"\n', module.__dict__)
+        # imported from another module
+        module.func_imported = _make_base
+        self.composer.compose(Timing(), module)
+        self.assertEqual('func', module.func())
+        self.assertEqual(['save', 'func'], self.calls)
+
+    def test_attribute_index(self):
+        Base = _make_base()
+
+        class Sub(Base):
+            save = None
+
+        index = _attribute_index(Sub)
+        self.assertTrue('get_name' in index)
+        self.assertTrue('get_static' in index)
+        self.assertFalse('save' in index)
+        self.assertFalse('get_constant' in index)
+        self.assertFalse('__repr__' in index)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, pointcut, _counted(self.calls))
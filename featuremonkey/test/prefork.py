@@ -0,0 +1,96 @@
+from __future__ import absolute_import
+from featuremonkey.composer import Composer
+from featuremonkey.importhooks import LazyComposerHook
+from featuremonkey.prefork import benchmark, finalize, memory_usage
+from featuremonkey.variants import VariantComposer, use_variant
+from featuremonkey.test.mock import variantbase
+import gc
+import os
+import sys
+import unittest
+
+
+class HandlerRefinement(object):
+
+    def refine_handler(self, original):
+
+        def handler():
+            return original() + ' refined'
+
+        return handler
+
+
+class Shout(object):
+
+    def refine_greet(self, original):
+
+        def greet(name):
+            return original(name) + '!'
+
+        return greet
+
+
+_can_fork = hasattr(os, 'fork') and memory_usage() is not None
+
+
+class TestPrefork(unittest.TestCase):
+
+    def tearDown(self):
+        if hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
+        sys.modules.pop('featuremonkey.test.mock.preforkbase', None)
+
+    def test_finalize(self):
+        composer = Composer()
+        composer.compose_later(HandlerRefinement(), 'featuremonkey.test.mock.preforkbase')
+        other = Composer()
+        other.compose_later(HandlerRefinement(), 'featuremonkey.test.mock.preforkother')
+        self.assertEqual(
+            ['featuremonkey.test.mock.preforkbase', 'featuremonkey.test.mock.preforkother'],
+            [module_name for module_name, _ in LazyComposerHook.pending()]
+        )
+        report = finalize(composer)
+        self.assertEqual(['featuremonkey.test.mock.preforkbase'], report.composed_modules)
+        from featuremonkey.test.mock import preforkbase
+        self.assertEqual('base refined', preforkbase.handler())
+        self.assertEqual(
+            ['featuremonkey.test.mock.preforkother'],
+            [module_name for module_name, _ in LazyComposerHook.pending()]
+        )
+        self.assertEqual(hasattr(gc, 'freeze'), report.frozen)
+        if report.frozen:
+            self.assertTrue(gc.get_freeze_count() > 0)
+        LazyComposerHook._to_compose.pop('featuremonkey.test.mock.preforkother')
+        LazyComposerHook._uninstall()
+
+    def test_resolve_variants(self):
+        composer = VariantComposer()
+        self.addCleanup(setattr, variantbase, 'greet', variantbase.greet)
+        composer.compose_variant('prefork', Shout(), variantbase)
+        report = finalize(composer, freeze=False)
+        self.assertEqual(1, report.resolved)
+        self.assertFalse(report.frozen)
+        attribute = variantbase.greet.variant_attribute
+        self.assertTrue('prefork' in attribute.resolved)
+        with use_variant('prefork'):
+            self.assertEqual('Hello Joe!', variantbase.greet('Joe'))
+
+    @unittest.skipUnless(_can_fork, 'requires os.fork and /proc')
+    def test_benchmark(self):
+        composer = Composer()
+        results = benchmark(2, composer=composer)
+        self.assertEqual(2, len(results))
+        for usage in results:
+            self.assertTrue(usage.rss > 0)
+            self.assertTrue(usage.shared > 0)
+
+    @unittest.skipUnless(_can_fork, 'requires os.fork and /proc')
+    def test_failing_worker(self):
+
+        def work():
+            raise ValueError('broken work')
+
+        with self.assertRaises(RuntimeError) as context:
+            benchmark(2, work, Composer(), freeze=False)
+        self.assertTrue('2 of 2' in str(context.exception))
+        self.assertTrue('ValueError: broken work' in str(context.exception))
@@ -0,0 +1,159 @@
+from __future__ import absolute_import
+from featuremonkey.composer import (
+    BrokenFeature, CompositionError, Composer, FeatureNotFound,
+)
+from featuremonkey import registry as registry_module
+from featuremonkey.registry import FeatureRegistry
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+
+FEATURE_PY = '''
+from . import roles
+requires = ['regbase']
+
+def select(composer):
+    import regtarget
+    composer.compose(roles.TargetRole(), regtarget)
+'''
+
+
+class TestFeatureRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.write('regbase/__init__.py', '')
+        self.write('regbase/feature.py', 'def select(composer):\n    pass\n')
+        self.write('regfeature/__init__.py', '')
+        self.write('regfeature/feature.py', FEATURE_PY)
+        self.write('regfeature/roles.py', 'class TargetRole(object):\n    introduce_x = 1\n')
+        self.write('regtarget.py', '')
+        self.write('regnofeaturepy/__init__.py', '')
+        self.write('regbroken/__init__.py', 'import regmissingdependency\n')
+        self.write('regbroken/feature.py', 'def select(composer):\n    pass\n')
+        self.write('notafeature/readme.txt', '')
+        self.index_file = os.path.join(self.tmpdir, 'index.json')
+        sys.path.insert(0, self.tmpdir)
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir)
+        for name in list(sys.modules):
+            if name.startswith(('regbase', 'regfeature', 'regtarget', 'regbroken', 'regnofeaturepy')):
+                del sys.modules[name]
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir, *name.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with io.open(path, 'w') as source:
+            source.write(content if isinstance(content, type(u'')) else content.decode('utf-8'))
+        return path
+
+    def registry(self):
+        return FeatureRegistry([self.tmpdir], entry_point_group=None, index_file=self.index_file)
+
+    def test_discovery(self):
+        registry = self.registry()
+        self.assertEqual(
+            ['regbase', 'regbroken', 'regfeature', 'regnofeaturepy'], registry.names()
+        )
+        info = registry.resolve('regfeature')
+        self.assertTrue(info.has_feature_py)
+        self.assertEqual(('regbase',), info.dependencies)
+        self.assertEqual(('regtarget:module',), info.targets)
+        self.assertEqual(os.path.join(self.tmpdir, 'regfeature', '__init__.py'), info.path)
+        self.assertFalse(registry.resolve('regnofeaturepy').has_feature_py)
+        self.assertTrue('regbase' in registry)
+        self.assertFalse('regtarget' in registry)
+        self.assertRaises(FeatureNotFound, registry.resolve, 'regunknown')
+        self.assertFalse('regtarget' in sys.modules)
+
+    def test_entry_points(self):
+        entry_points = registry_module._entry_points
+        registry_module._entry_points = lambda group: [('regfeature', 'regfeature')]
+        try:
+            registry = FeatureRegistry([], entry_point_group='test')
+            info = registry.resolve('regfeature')
+        finally:
+            registry_module._entry_points = entry_points
+        self.assertEqual(self.tmpdir, info.root)
+        self.assertEqual(('regtarget:module',), info.targets)
+
+    def test_index(self):
+        registry = self.registry()
+        registry.names()
+        self.assertEqual(4, registry.misses)
+        registry.save()
+        registry = self.registry()
+        self.assertEqual(registry.names(), self.registry().names())
+        self.assertEqual(0, registry.misses)
+        # adding a feature changes the root directory
+        self.write('regnew/__init__.py', '')
+        os.utime(self.tmpdir, (0, 0))
+        registry = self.registry()
+        self.assertTrue('regnew' in registry)
+        self.assertEqual(1, registry.misses)
+        registry.save()
+        # changing feature.py
+        self.write('regbase/feature.py', 'requires = ["regfeature"]\ndef select(composer):\n    pass\n')
+        os.utime(os.path.join(self.tmpdir, 'regbase', 'feature.py'), (0, 0))
+        registry = self.registry()
+        self.assertEqual(('regfeature',), registry.resolve('regbase').dependencies)
+        registry.refresh()
+        registry.names()
+        self.assertEqual(6, registry.misses)
+
+    def test_check(self):
+        registry = self.registry()
+        registry.check(['regbase', 'regfeature'])
+        self.assertRaises(BrokenFeature, registry.check, ['regnofeaturepy'])
+        self.write('regbase/feature.py', 'requires = ["regunknown"]\ndef select(composer):\n    pass\n')
+        os.utime(os.path.join(self.tmpdir, 'regbase', 'feature.py'), (0, 0))
+        self.assertRaises(FeatureNotFound, self.registry().check, ['regbase'])
+
+    def test_subpackages(self):
+        self.write('regbase/sub/__init__.py', '')
+        self.write('regbase/sub/feature.py', FEATURE_PY.replace('from . import roles', 'from regfeature import roles'))
+        self.write('regbase/nofeaturepy/__init__.py', '')
+        registry = self.registry()
+        self.assertFalse('regbase.sub' in registry.names())
+        info = registry.resolve('regbase.sub')
+        self.assertEqual(self.tmpdir, info.root)
+        self.assertEqual(('regtarget:module',), info.targets)
+        self.assertTrue('regbase.sub' in registry)
+        self.assertFalse('regbase.missing' in registry)
+        self.assertFalse('regunknown.sub' in registry)
+        composer = Composer()
+        composer.registry = registry
+        self.assertRaises(BrokenFeature, composer.select, 'regbase.nofeaturepy')
+        composer.select('regbase.sub')
+        import regtarget
+        self.assertEqual(1, regtarget.x)
+
+    def test_select_errors(self):
+        composer = Composer()
+        self.assertRaises(FeatureNotFound, composer.select, 'regunknown')
+        self.assertRaises(BrokenFeature, composer.select, 'regnofeaturepy')
+        self.assertRaises(BrokenFeature, composer.select, 'regbroken')
+        try:
+            composer.select('regunknown')
+        except ImportError as e:
+            self.assertTrue(isinstance(e, CompositionError))
+        composer.select('regbase', 'regfeature')
+        import regtarget
+        self.assertEqual(1, regtarget.x)
+
+    def test_select_with_registry(self):
+        composer = Composer()
+        composer.registry = self.registry()
+        self.assertRaises(FeatureNotFound, composer.select, 'regunknown')
+        self.assertRaises(BrokenFeature, composer.select, 'regnofeaturepy')
+        self.assertFalse('regnofeaturepy' in sys.modules)
+        # importable, but not in the registry
+        self.assertRaises(FeatureNotFound, composer.select, 'featuremonkey.test.mock.badselectfeature')
+        composer.select('regbase', 'regfeature')
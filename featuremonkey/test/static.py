@@ -0,0 +1,127 @@
+from __future__ import absolute_import
+from featuremonkey.static import (StaticAnalyzer, AnalysisCache,
+    summarize_source)
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+FEATURE = 'featuremonkey.test.mock.staticfeature'
+
+
+class TestStaticAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.analyzer = StaticAnalyzer(cache=AnalysisCache(self.cachedir))
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir)
+
+    def test_plan(self):
+        plan = self.analyzer.analyze([FEATURE])
+        roles = FEATURE + '.roles'
+        module1 = 'featuremonkey.test.mock.testmodule1:module'
+        module2 = 'featuremonkey.test.mock.testmodule2:module'
+        self.assertEqual(
+            [
+                (roles, module1, 'static_attr', 'introduction'),
+                (roles, module1, 'func_in_module', 'refinement'),
+                ('ClassRole', 'ClassInModule:type', 'nested', 'child'),
+                ('child_nested', 'nested:type', 'b', 'introduction'),
+                ('ClassRole', 'ClassInModule:type', 'a', 'introduction'),
+                ('ClassRole', 'ClassInModule:type', 'plus', 'refinement'),
+                (roles, module2, 'static_attr', 'introduction'),
+                (roles, module2, 'func_in_module', 'refinement'),
+            ],
+            [
+                (entry.role, entry.target, entry.attribute, entry.operation)
+                for entry in plan.entries
+            ]
+        )
+        self.assertTrue(all(entry.feature == FEATURE for entry in plan.entries))
+        reasons = [problem.reason for problem in plan.unresolved]
+        self.assertEqual(
+            ['compose inside a condition or loop',
+             'cannot analyze fst %s.feature.role' % FEATURE],
+            reasons
+        )
+        # nothing has been imported
+        self.assertFalse(FEATURE in sys.modules)
+
+    def test_missing_feature(self):
+        plan = self.analyzer.analyze_feature('featuremonkey.test.mock.nosuchfeature')
+        self.assertEqual([], plan.entries)
+        self.assertEqual('feature.py not found', plan.unresolved[0].reason)
+
+    def test_cache(self):
+        self.analyzer.analyze([FEATURE])
+        cached = os.listdir(self.cachedir)
+        self.assertEqual(2, len(cached))
+        analyzer = StaticAnalyzer(cache=AnalysisCache(self.cachedir))
+        self.assertEqual(
+            [tuple(entry) for entry in self.analyzer.analyze([FEATURE]).entries],
+            [tuple(entry) for entry in analyzer.analyze([FEATURE]).entries],
+        )
+
+    def test_dynamic_members(self):
+        summary = summarize_source(
+            'class Role(Base):\n'
+            '    for name in names:\n'
+            '        pass\n'
+            '    refine_x = 1\n'
+        )
+        role = summary['classes']['Role']
+        self.assertEqual(1, len(role['transformations']))
+        self.assertEqual(
+            ['For statement in class body', 'inherits from Base'],
+            [reason for _, reason in role['dynamic']]
+        )
+
+    def test_syntax_error(self):
+        self.assertEqual(1, summarize_source('def f(:\n')['syntax_error'][0])
+        root = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(root, 'statsyntax'))
+            with open(os.path.join(root, 'statsyntax', '__init__.py'), 'w') as init:
+                init.write('')
+            with open(os.path.join(root, 'statsyntax', 'feature.py'), 'w') as feature:
+                feature.write('def select(composer):\n    print "hello"\n')
+            analyzer = StaticAnalyzer([root] + sys.path, cache=AnalysisCache())
+            plan = analyzer.analyze(['statsyntax', FEATURE])
+        finally:
+            shutil.rmtree(root)
+        self.assertEqual(8, len(plan.entries))
+        self.assertEqual(2, plan.unresolved[0].lineno)
+        self.assertTrue(plan.unresolved[0].reason.startswith('syntax error: '))
+
+    def test_nested_select(self):
+        root = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(root, 'statselect'))
+            with open(os.path.join(root, 'statselect', '__init__.py'), 'w') as init:
+                init.write('')
+            with open(os.path.join(root, 'statselect', 'feature.py'), 'w') as feature:
+                feature.write(
+                    'def select(composer):\n'
+                    '    composer.select(%r, "statselect")\n'
+                    '    composer.select(name)\n' % FEATURE
+                )
+            analyzer = StaticAnalyzer([root] + sys.path, cache=AnalysisCache())
+            plan = analyzer.analyze(['statselect', FEATURE])
+        finally:
+            shutil.rmtree(root)
+        # the selected feature is analyzed once, its entries are its own
+        self.assertEqual(8, len(plan.entries))
+        self.assertTrue(all(entry.feature == FEATURE for entry in plan.entries))
+        self.assertEqual(
+            ['compose inside a condition or loop',
+             'cannot analyze fst %s.feature.role' % FEATURE,
+             'select needs literal feature names'],
+            [problem.reason for problem in plan.unresolved]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+from __future__ import absolute_import
+from featuremonkey.composer import Composer
+from featuremonkey.streams import (
+    STREAM_ATTRIBUTE, enrich_batches, filter_items, map_items, pipeline, tee_items,
+)
+from featuremonkey.test.mock import streambase
+import itertools
+import unittest
+
+try:
+    #python3
+    from imp import reload
+except ImportError:
+    #python2
+    pass
+
+
+def _traced(name, func):
+
+    def traced(item):
+        streambase.events.append((name, item))
+        return func(item)
+
+    return traced
+
+
+class TestStreams(unittest.TestCase):
+
+    def setUp(self):
+        self.composer = Composer()
+
+    def tearDown(self):
+        reload(streambase)
+
+    def test_fusion(self):
+
+        class Double(object):
+            refine_numbers = map_items(_traced('map', lambda number: number * 2))
+
+        class Multiples(object):
+            refine_numbers = filter_items(_traced('filter', lambda number: number % 3 == 0))
+
+        self.composer.compose(Multiples(), Double(), streambase)
+        source, stages = getattr(streambase.numbers, STREAM_ATTRIBUTE)[1:]
+        self.assertEqual('numbers', source.__name__)
+        self.assertEqual(['map', 'filter'], [stage.kind for stage in stages])
+        self.assertEqual([0, 6, 12], list(streambase.numbers(8)))
+        # one pass per item through all layers
+        self.assertEqual(
+            [('source', 0), ('map', 0), ('filter', 0), ('source', 1), ('map', 1), ('filter', 2)],
+            streambase.events[:6]
+        )
+
+    def test_lazy(self):
+
+        class Endless(object):
+            refine_numbers = pipeline(map_items(lambda number: number + 1), enrich_batches(list, 3))
+
+        self.composer.compose(Endless(), streambase)
+        self.assertEqual([1, 2, 3, 4], list(itertools.islice(streambase.numbers(10 ** 9), 4)))
+        self.assertEqual(6, len(streambase.events))
+
+    def test_batches(self):
+        batches = []
+
+        def enrich(batch):
+            batches.append(len(batch))
+            return [(number, 'enriched') for number in batch]
+
+        side_channel = []
+
+        class Enrich(object):
+            refine_numbers = pipeline(
+                filter_items(lambda number: number != 2),
+                enrich_batches(enrich, size=2),
+                tee_items(side_channel.append),
+            )
+
+        class Pairs(object):
+            refine_numbers = enrich_batches(lambda batch: [tuple(batch)], size=2)
+
+        self.composer.compose(Pairs(), Enrich(), streambase)
+        result = list(streambase.numbers(6))
+        self.assertEqual([2, 2, 1], batches)
+        self.assertEqual(
+            [((0, 'enriched'), (1, 'enriched')), ((3, 'enriched'), (4, 'enriched')),
+             ((5, 'enriched'),)],
+            result
+        )
+        self.assertEqual(5, len(side_channel))
+        self.assertRaises(ValueError, enrich_batches, list, 0)
+
+    def test_other_refinement_in_between(self):
+
+        class Double(object):
+            refine_numbers = map_items(lambda number: number * 2)
+
+        class Triple(object):
+            refine_numbers = map_items(lambda number: number * 3)
+
+        class Reverse(object):
+
+            def refine_numbers(self, original):
+
+                def numbers(count):
+                    return reversed(list(original(count)))
+
+                return numbers
+
+        self.composer.compose(Triple(), Reverse(), Double(), streambase)
+        self.assertEqual([18, 12, 6, 0], list(streambase.numbers(4)))
+        self.assertEqual(1, len(getattr(streambase.numbers, STREAM_ATTRIBUTE)[2]))
+
+    def test_methods(self):
+
+        class Rows(object):
+            refine_rows = map_items(str)
+            refine_static_rows = filter_items(bool)
+            refine_class_rows = map_items(lambda number: -number)
+
+        class Rows2(object):
+            refine_rows = map_items(lambda row: row + '!')
+
+        self.composer.compose(Rows2(), Rows(), streambase.Repository)
+        repository = streambase.Repository(3)
+        self.assertEqual(['0!', '1!', '2!'], list(repository.rows()))
+        self.assertEqual(2, len(getattr(streambase.Repository.__dict__['rows'], STREAM_ATTRIBUTE)[2]))
+        self.assertEqual([1, 2], list(streambase.Repository.static_rows(3)))
+        self.assertEqual([0, -1, -2], list(repository.class_rows(3)))
+        instance = streambase.Repository(2)
+        self.composer.compose(Rows2(), instance)
+        self.assertEqual(['0!!', '1!!'], list(instance.rows()))
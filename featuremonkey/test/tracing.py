@@ -0,0 +1,254 @@
+from __future__ import absolute_import
+from featuremonkey.composer import Composer
+from featuremonkey.tracing.store import TraceStore, IndexedOperationLogger
+from featuremonkey.tracing.filters import TraceFilter
+from featuremonkey.tracing import binary
+from featuremonkey.tracing.binary import (TraceReader, TraceFormatError,
+    dump_operation_log, load_operation_log)
+from featuremonkey.tracing.serializer import (SerializationBudget, TRUNCATED,
+    serialize_obj, serialize_operation_log)
+from featuremonkey.test.mock import composer_mocks as mocks
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+
+def _operation(type, base, attrname, role, feature=None):
+    return dict(
+        type=type,
+        base=base,
+        target_attrname=attrname,
+        role=role,
+        feature=feature,
+    )
+
+
+class TestTraceStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = TraceStore.from_operation_log([
+            _operation('introduction', 'app:module', 'index', 'A', 'fa'),
+            _operation('refinement', 'app:module', 'index', 'B', 'fb'),
+            _operation('refinement', 'app:module', 'index', 'C', 'fc'),
+            _operation('refinement', 'app:module', 'other', 'C', 'fc'),
+            _operation('refinement', 'app:module', 'index', 'D', 'fd'),
+        ])
+
+    def test_roundtrip(self):
+        self.assertEqual(5, len(self.store))
+        self.assertEqual('B', self.store[1]['role'])
+        self.assertEqual('fd', self.store[-1]['feature'])
+
+    def test_strings_are_interned(self):
+        # id 0 for None, 2 types, 1 base, 2 attributes, 4 roles and 4 features
+        self.assertEqual(1 + 2 + 1 + 2 + 4 + 4, len(self.store.strings))
+
+    def test_layers_of(self):
+        layers = self.store.layers_of('app:module', 'index')
+        self.assertEqual(['A', 'B', 'C', 'D'], [layer['role'] for layer in layers])
+        self.assertEqual([], self.store.layers_of('app:module', 'missing'))
+
+    def test_touched_by(self):
+        self.assertEqual(
+            [('app:module', 'index'), ('app:module', 'other')],
+            self.store.touched_by('fc')
+        )
+        self.assertEqual([], self.store.touched_by('unknown'))
+
+    def test_find(self):
+        self.assertEqual([1, 2, 4], self.store.find(type='refinement', target_attrname='index'))
+        self.assertRaises(ValueError, self.store.find, colour='red')
+
+    def test_compact(self):
+        compacted = self.store.compact()
+        self.assertEqual(
+            ['introduction', 'refinement_chain', 'refinement', 'refinement'],
+            [record['type'] for record in compacted]
+        )
+        self.assertEqual(['B', 'C'], compacted[1]['roles'])
+
+    def test_indexed_logger(self):
+        composer = Composer()
+        logger = IndexedOperationLogger()
+        logger.trace_store = TraceStore()
+        composer.composition_tracer = logger
+        composer.compose(mocks.MethodRefinement(), mocks.Base())
+        self.assertEqual(1, len(logger.trace_store))
+        self.assertEqual('MethodRefinement', logger.trace_store[0]['role'])
+
+
+class TestSerializationBudget(unittest.TestCase):
+
+    def test_unlimited(self):
+        self.assertEqual(['1', '2'], serialize_obj((1, 2), SerializationBudget()))
+        self.assertEqual({'a': '1'}, serialize_obj({'a': 1}))
+
+    def test_max_items(self):
+        value = dict(('key%d' % i, i) for i in range(100))
+        serialized = serialize_obj(value, SerializationBudget(max_items=11))
+        summary = serialized.pop(TRUNCATED)
+        self.assertEqual(10, len(serialized))
+        self.assertEqual('items', summary[TRUNCATED])
+        self.assertEqual('dict', summary['type'])
+        self.assertEqual(90, summary['length'])
+        self.assertEqual(40, len(summary['hash']))
+
+    def test_max_depth(self):
+        serialized = serialize_obj([[[1]]], SerializationBudget(max_depth=1))
+        self.assertEqual('depth', serialized[0][0][TRUNCATED])
+        self.assertEqual(1, serialized[0][0]['length'])
+
+    def test_max_bytes(self):
+        budget = SerializationBudget(max_bytes=10)
+        serialized = serialize_obj(['a' * 8, 'b' * 8], budget)
+        self.assertEqual('a' * 8, serialized[0])
+        self.assertEqual('bytes', serialized[1][TRUNCATED])
+        self.assertEqual(1, budget.truncated)
+
+    def test_module(self):
+        budget = SerializationBudget(max_items=5)
+        serialized = serialize_obj(unittest, budget)
+        self.assertEqual('items', serialized[TRUNCATED][TRUNCATED])
+        self.assertEqual(4, len(serialized) - 1)
+
+    def test_budget_per_record(self):
+        log = [dict(old_value=[1, 2, 3], new_value=None) for _ in range(2)]
+        serialize_operation_log(log, SerializationBudget(max_items=3))
+        self.assertEqual(log[0]['old_value'], log[1]['old_value'])
+        self.assertEqual(TRUNCATED, list(log[0]['old_value'][-1])[0])
+
+
+class TestBinaryTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'trace.fmt')
+        source = 'def index(request):\n    return original(request)\n'
+        self.log = []
+        for role in ('A', 'B', 'C'):
+            operation = _operation('refinement', 'app:module', 'index', role)
+            operation['old_value'] = source
+            operation['new_value'] = source
+            self.log.append(operation)
+        self.log.append(dict(
+            _operation('introduction', 'app:module', 'settings', 'A', 'fa'),
+            old_value=None,
+            new_value={'DEBUG': 'False', 'APPS': ['a', 'b']},
+        ))
+        self.log.append(dict(
+            _operation('introduction', 'app:module', 'code', 'A', 'fa'),
+            old_value='',
+            new_value=b'\x00\xffmarshalled',
+        ))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_roundtrip(self):
+        dump_operation_log(self.log, self.filename)
+        self.assertEqual(self.log, load_operation_log(self.filename))
+
+    def test_sources_are_stored_once(self):
+        dump_operation_log(self.log, self.filename)
+        with open(self.filename, 'rb') as trace:
+            self.assertEqual(1, trace.read().count(b'return original(request)'))
+
+    def test_lazy_reader(self):
+        dump_operation_log(self.log, self.filename)
+        with TraceReader(self.filename) as reader:
+            self.assertEqual(5, len(reader))
+            self.assertEqual('C', reader[2]['role'])
+            self.assertEqual('fa', reader.metadata(-1)['feature'])
+            self.assertRaises(IndexError, reader.__getitem__, 5)
+            store = reader.to_store()
+        self.assertEqual(3, len(store.layers_of('app:module', 'index')))
+
+    def test_invalid_file(self):
+        with open(self.filename, 'wb') as trace:
+            trace.write(b'{"json": "trace"}' * 4)
+        self.assertRaises(TraceFormatError, TraceReader, self.filename)
+        dump_operation_log(self.log, self.filename)
+        with open(self.filename, 'rb') as trace:
+            data = trace.read()
+        # shorter than the header, truncated records
+        for length in (0, 10, len(data) - 1):
+            with open(self.filename, 'wb') as trace:
+                trace.write(data[:length])
+            self.assertRaises(TraceFormatError, TraceReader, self.filename)
+
+    def test_corrupt_records(self):
+        dump_operation_log(self.log, self.filename)
+        with open(self.filename, 'rb') as trace:
+            data = trace.read()
+        header = binary.HEADER.unpack_from(data, 0)
+        index_offset, records_offset = header[-2:]
+        # a string id out of range, a string offset past the end of the file
+        for fmt, offset, value in (('<I', records_offset, 2 ** 32 - 1),
+                                   ('<Q', index_offset + binary.OFFSET.size, 2 ** 40)):
+            corrupt = bytearray(data)
+            struct.pack_into(fmt, corrupt, offset, value)
+            with open(self.filename, 'wb') as trace:
+                trace.write(bytes(corrupt))
+            with TraceReader(self.filename) as reader:
+                self.assertRaises(TraceFormatError, reader.metadata, 0)
+
+
+class _RecordingTracer(object):
+
+    def __init__(self):
+        self.operations = []
+
+    def log(self, operation=None, new_value='', old_value=''):
+        self.operations.append(operation)
+
+    def log_new_value(self, operation=None, new_value=''):
+        pass
+
+
+class TestTraceFilter(unittest.TestCase):
+
+    def test_predicate(self):
+        traced = TraceFilter(
+            bases=['app.*', 'Order:type'], attributes=['save', 'clean_*'],
+            operations=['refinement'],
+        ).compile()
+        self.assertTrue(traced(_operation('refinement', 'app.models:module', 'save', 'A')))
+        self.assertTrue(traced(_operation('refinement', 'Order:type', 'clean_name', 'A')))
+        self.assertFalse(traced(_operation('introduction', 'app.models:module', 'save', 'A')))
+        self.assertFalse(traced(_operation('refinement', 'other:module', 'save', 'A')))
+        self.assertFalse(traced(_operation('refinement', 'app:module', 'delete', 'A')))
+        by_feature = TraceFilter(features=['f*'], roles=['A']).compile()
+        self.assertTrue(by_feature(_operation('refinement', 'app:module', 'x', 'A', 'fa')))
+        self.assertFalse(by_feature(_operation('refinement', 'app:module', 'x', 'A')))
+        self.assertFalse(TraceFilter(roles=[]).compile()(_operation('refinement', 'a:module', 'x', 'A')))
+
+    def test_parse(self):
+        trace_filter = TraceFilter.parse('bases=app.*; operations=refinement,introduction;')
+        self.assertEqual(['app.*'], trace_filter.bases)
+        self.assertEqual(['refinement', 'introduction'], trace_filter.operations)
+        self.assertEqual(None, trace_filter.roles)
+        self.assertRaises(ValueError, TraceFilter.parse, 'base=app')
+
+    def test_composer(self):
+        composer = Composer()
+        tracer = composer.composition_tracer = _RecordingTracer()
+        composer.trace_filter = TraceFilter(bases=['*:Base'], operations=['introduction'])
+        composer.compose(mocks.MethodRefinement2(), mocks.MemberIntroduction, mocks.Base())
+        self.assertEqual(['a'], [operation['target_attrname'] for operation in tracer.operations])
+        composer.trace_filter = None
+        composer.compose(mocks.MethodRefinement2(), mocks.Base())
+        self.assertEqual(2, len(tracer.operations))
+
+    def test_environment(self):
+        os.environ['COMPOSITION_TRACE_FILTER'] = 'attributes=base_*'
+        try:
+            composer = Composer()
+        finally:
+            del os.environ['COMPOSITION_TRACE_FILTER']
+        self.assertEqual(['base_*'], composer.trace_filter.attributes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+from __future__ import absolute_import
+from featuremonkey.validation import (ValidatingComposer, validate,
+    validate_equations)
+from featuremonkey.test.mock import composer_mocks as mocks
+from featuremonkey.test.mock import testmodule1
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+
+class TestValidation(unittest.TestCase):
+
+    def test_collects_all_conflicts(self):
+        composer = ValidatingComposer()
+        instance = mocks.Base()
+        composer.compose(mocks.ExistingMemberIntroduction(), instance)
+        composer.compose(mocks.MethodIntroduction(), instance)
+        composer.compose(mocks.MethodIntroduction(), instance)
+        self.assertEqual(
+            ['existing_attribute', 'existing_attribute'],
+            [conflict.kind for conflict in composer.conflicts]
+        )
+        self.assertEqual('method', composer.conflicts[1].attribute)
+        self.assertEqual('MethodIntroduction', composer.conflicts[1].role)
+        # nothing has been composed
+        self.assertFalse(hasattr(instance, 'method'))
+        self.assertEqual(8, instance.base_prop)
+
+    def test_merge(self):
+
+        class Merges(object):
+            merge_base_prop = [1]
+            merge_missing = [1]
+
+        class Settings(object):
+            APPS = ['a']
+
+        class AppMerges(object):
+            merge_APPS = ['b']
+
+        composer = ValidatingComposer()
+        composer.compose(Merges(), mocks.Base)
+        composer.compose(AppMerges(), Settings)
+        composer.compose(AppMerges(), Settings, force=True)
+        self.assertEqual(
+            [('merge_conflict', 'base_prop'), ('missing_attribute', 'missing'),
+             ('merge_conflict', 'APPS')],
+            [(conflict.kind, conflict.attribute) for conflict in composer.conflicts]
+        )
+        self.assertEqual(['a'], Settings.APPS)
+
+    def test_missing_child(self):
+
+        class Parent(object):
+
+            class child_missing(object):
+                introduce_a = 1
+
+        composer = ValidatingComposer()
+        composer.compose(Parent(), mocks.Base())
+        self.assertEqual(['missing_child'], [c.kind for c in composer.conflicts])
+
+    def test_features(self):
+        conflicts = validate(
+            'featuremonkey.test.mock.conflictfeature',
+            'featuremonkey.test.mock.badselectfeature',
+            'featuremonkey.test.mock.nosuchfeature',
+        )
+        self.assertEqual(
+            [
+                ('existing_attribute', 'attr_in_module'),
+                ('missing_attribute', 'missing_attr'),
+                ('select', None),
+                ('select', None),
+            ],
+            [(conflict.kind, conflict.attribute) for conflict in conflicts]
+        )
+        self.assertEqual('featuremonkey.test.mock.conflictfeature', conflicts[0].feature)
+        self.assertEqual('featuremonkey.test.mock.badselectfeature', conflicts[2].feature)
+        self.assertTrue('featuremonkey.test.mock.testmodule1' in str(conflicts[0]))
+        self.assertFalse(hasattr(testmodule1, 'new_attr'))
+
+    def test_broken_feature(self):
+        tmpdir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(tmpdir, 'valsyntaxerror'))
+        with open(os.path.join(tmpdir, 'valsyntaxerror', '__init__.py'), 'w') as init:
+            init.write('')
+        with open(os.path.join(tmpdir, 'valsyntaxerror', 'feature.py'), 'w') as feature:
+            feature.write('def select(composer:\n')
+        sys.path.insert(0, tmpdir)
+        try:
+            conflicts = validate('valsyntaxerror', 'featuremonkey.test.mock.conflictfeature')
+        finally:
+            sys.path.remove(tmpdir)
+            for name in list(sys.modules):
+                if name.startswith('valsyntaxerror'):
+                    del sys.modules[name]
+            shutil.rmtree(tmpdir)
+        self.assertEqual(
+            ['select', 'existing_attribute', 'missing_attribute'],
+            [conflict.kind for conflict in conflicts]
+        )
+        self.assertTrue('SyntaxError' in conflicts[0].message)
+
+    def test_compose_instances(self):
+
+        class Introduction(object):
+            introduce_base_method = lambda self: (lambda self: None)
+
+        instance = mocks.Base()
+        composer = ValidatingComposer()
+        composed = composer.compose_instances([Introduction()], [instance])
+        self.assertEqual([instance], composed)
+        self.assertTrue(instance.__class__ is mocks.Base)
+        self.assertEqual(['existing_attribute'], [c.kind for c in composer.conflicts])
+
+    def test_raising_transformations(self):
+
+        class Raising(object):
+
+            def introduce_first(self):
+                raise ValueError('broken factory')
+
+            introduce_second = 1
+
+            def refine_callback(self, original):
+                return original
+
+        instance = mocks.Base()
+        instance.callback = lambda: None
+        composer = ValidatingComposer()
+        composer.compose(Raising(), instance)
+        composer.compose(mocks.MemberIntroduction(), instance)
+        self.assertEqual(['error'], [c.kind for c in composer.conflicts])
+        self.assertEqual('ValueError: broken factory', composer.conflicts[0].message)
+        self.assertEqual('first', composer.conflicts[0].attribute)
+        # the dry run leaves the instance alone
+        self.assertEqual(['callback'], sorted(instance.__dict__))
+
+    def test_compose_later(self):
+
+        class Late(object):
+            introduce_b = 1
+
+        composer = ValidatingComposer()
+        composer.compose_later(Late(), 'featuremonkey.test.mock.testmodule1')
+        composer.compose_later(Late(), 'featuremonkey.test.mock.lateconflict')
+        conflicts = composer.finish()
+        self.assertEqual(['late_composition', 'error'], [c.kind for c in conflicts])
+
+
+class TestParallelValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _equation(self, name, *features):
+        filename = os.path.join(self.tmpdir, name)
+        with open(filename, 'w') as equation:
+            equation.write('\n'.join(features))
+        return filename
+
+    def test_equations(self):
+        good = self._equation('good.equation', '# nothing selected')
+        bad = self._equation('bad.equation', 'featuremonkey.test.mock.conflictfeature')
+        results = validate_equations([good, bad], processes=2)
+        self.assertEqual([], results[good])
+        self.assertEqual(2, len(results[bad]))
+        self.assertEqual(results, validate_equations([good, bad], processes=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+from __future__ import absolute_import
+from featuremonkey.composer import CompositionError
+from featuremonkey.variants import VariantComposer, current_variant, use_variant
+from featuremonkey.test.mock import variantbase
+import threading
+import unittest
+
+
+class LoudGreeting(object):
+
+    def refine_greet(self, original):
+
+        def greet(name):
+            return original(name).upper()
+
+        return greet
+
+
+class PoliteGreeting(object):
+
+    def refine_greet(self, original):
+
+        def greet(name):
+            return original(name) + ', nice to meet you'
+
+        return greet
+
+
+class GreeterRefinement(object):
+    refine_greeting = 'Hi'
+
+    def refine_punctuation(self, original):
+
+        def punctuation():
+            return original() * 3
+
+        return punctuation
+
+    def introduce_farewell(self):
+
+        def farewell(self, name):
+            return 'Bye ' + name
+
+        return farewell
+
+
+class TestVariants(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.composer = VariantComposer()
+        cls.composer.compose_variant('loud', LoudGreeting(), variantbase)
+        cls.composer.compose_variant('polite', PoliteGreeting(), variantbase)
+        cls.composer.compose_variant('polite', LoudGreeting(), variantbase)
+        cls.composer.compose_variant('polite', GreeterRefinement(), variantbase.Greeter)
+
+    def test_module_dispatch(self):
+        self.assertEqual(None, current_variant())
+        self.assertEqual('Hello Joe', variantbase.greet('Joe'))
+        with use_variant('loud'):
+            self.assertEqual('loud', current_variant())
+            self.assertEqual('HELLO JOE', variantbase.greet('Joe'))
+            with use_variant('polite'):
+                self.assertEqual('HELLO JOE, NICE TO MEET YOU', variantbase.greet('Joe'))
+            self.assertEqual('HELLO JOE', variantbase.greet('Joe'))
+        self.assertEqual('Hello Joe', variantbase.greet('Joe'))
+
+    def test_class_dispatch(self):
+        greeter = variantbase.Greeter()
+        self.assertEqual('Hello Joe', greeter.greet('Joe'))
+        self.assertFalse(hasattr(greeter, 'farewell'))
+        with use_variant('polite'):
+            self.assertEqual('Hi Joe', greeter.greet('Joe'))
+            self.assertEqual('...', variantbase.Greeter.punctuation())
+            self.assertEqual('Bye Joe', greeter.farewell('Joe'))
+        with use_variant('loud'):
+            self.assertEqual('.', greeter.punctuation())
+
+    def test_chain_is_cached(self):
+        attribute = variantbase.greet.variant_attribute
+        with use_variant('loud'):
+            variantbase.greet('Joe')
+            resolved = attribute.resolved['loud']
+            variantbase.greet('Joe')
+        self.assertTrue(attribute.resolved['loud'] is resolved)
+
+    def test_threads(self):
+        results = {}
+
+        def serve(variant):
+            with use_variant(variant):
+                results[variant] = variantbase.greet('Joe')
+
+        threads = [threading.Thread(target=serve, args=(variant,)) for variant in ('loud', 'polite')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            {'loud': 'HELLO JOE', 'polite': 'HELLO JOE, NICE TO MEET YOU'}, results
+        )
+
+    def test_conflicts(self):
+        self.assertRaises(
+            CompositionError, self.composer.compose_variant,
+            'polite', GreeterRefinement(), variantbase.Greeter, force=True
+        )
+
+        class Value(object):
+            introduce_value = 1
+
+        self.assertRaises(
+            CompositionError, self.composer.compose_variant, 'loud', Value(), variantbase
+        )
+        self.assertRaises(
+            CompositionError, self.composer.compose_variant,
+            'loud', Value(), variantbase.Greeter()
+        )
+
+    def test_merge(self):
+
+        class Tags(object):
+            merge_tags = ['b']
+
+        class BrokenTags(object):
+            merge_tags = {'b': 1}
+
+        self.composer.compose_variant('tagged', Tags(), variantbase.Greeter)
+        self.assertRaises(
+            CompositionError, self.composer.compose_variant,
+            'tagged', BrokenTags(), variantbase.Greeter
+        )
+        greeter = variantbase.Greeter()
+        with use_variant('tagged'):
+            self.assertEqual(['a', 'b'], greeter.tags)
+        with use_variant('loud'):
+            self.assertEqual(['a'], greeter.tags)
+        self.assertEqual(['a'], greeter.tags)
+
+
+if __name__ == '__main__':
+    unittest.main()
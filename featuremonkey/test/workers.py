@@ -0,0 +1,103 @@
+from __future__ import absolute_import
+from featuremonkey.composer import Composer, CompositionError
+from featuremonkey.workers import ComposedContext, snapshot, replay, verify
+from featuremonkey.helpers import _get_object_ref, _resolve_object_ref
+from featuremonkey.importhooks import LazyComposerHook
+from featuremonkey.test.mock import composer_mocks as mocks
+import sys
+import unittest
+
+try:
+    #python3
+    from imp import reload
+except ImportError:
+    #python2
+    pass
+
+
+class TestWorkers(unittest.TestCase):
+
+    def test_snapshot(self):
+        composer = Composer()
+        composer.compose_later(
+            'featuremonkey.test.mock.workerrole', 'featuremonkey.test.mock.notimported'
+        )
+        composer.compose(mocks.MemberIntroduction(), mocks.Base)
+        product = snapshot(composer)
+        self.assertEqual(
+            [
+                ('compose_later', (
+                    ('module', 'featuremonkey.test.mock.workerrole'),
+                    ('module', 'featuremonkey.test.mock.notimported'),
+                )),
+                ('compose', (
+                    ('instance', 'featuremonkey.test.mock.composer_mocks', 'MemberIntroduction'),
+                    ('class', 'featuremonkey.test.mock.composer_mocks', 'Base'),
+                )),
+            ],
+            product['events']
+        )
+        self.assertEqual(['featuremonkey.test.mock.notimported'], product['targets'])
+        del mocks.Base.a
+        LazyComposerHook._to_compose.pop('featuremonkey.test.mock.notimported')
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'needs ProcessPoolExecutor initializer')
+    def test_spawned_worker(self):
+        composer = Composer()
+        composer.compose_later(
+            'featuremonkey.test.mock.workerrole', 'featuremonkey.test.mock.workerbase'
+        )
+        context = ComposedContext('spawn', composer)
+        from featuremonkey.test.mock import workertasks
+        with context.executor(max_workers=1) as executor:
+            result = executor.submit(workertasks.greet, 'Joe').result()
+        self.assertEqual('Hello Joe from a composed worker', result)
+        self.assertEqual('Hello Joe from a composed worker', workertasks.greet('Joe'))
+
+    def test_unreplayable(self):
+
+        class LocalRole(object):
+            introduce_b = 1
+
+        composer = Composer()
+        composer.compose(LocalRole(), mocks.Base())
+        self.assertRaises(CompositionError, snapshot, composer)
+
+    def test_configured_roles(self):
+        composer = Composer()
+        composer.compose(mocks.SuffixRefinement('!'), mocks.Base)
+        try:
+            product = snapshot(composer)
+            role_ref, base_ref = product['events'][0][1]
+            self.assertEqual('!', _resolve_object_ref(role_ref).suffix)
+            self.assertEqual(
+                'refined', _resolve_object_ref(_get_object_ref(mocks.SuffixRefinement())).suffix
+            )
+        finally:
+            reload(mocks)
+        # a configured role that cannot be pickled
+        composer = Composer()
+        composer._product.append(('compose', (mocks.SuffixRefinement(lambda: None), mocks.Base)))
+        self.assertRaises(CompositionError, snapshot, composer)
+
+    def test_compose_instances(self):
+        composer = Composer()
+        composer.compose_instances([mocks.MethodRefinement()], [mocks.Base()])
+        self.assertEqual([], snapshot(composer)['events'])
+
+    def test_uncomposed_module(self):
+        product = dict(events=[], targets=['featuremonkey.test.mock.testmodule1'])
+        self.assertRaises(CompositionError, verify, product, Composer())
+
+    def test_replay_after_import(self):
+        product = dict(events=[
+            ('compose_later', (
+                ('module', 'featuremonkey.test.mock.workerrole'),
+                ('module', 'featuremonkey.test.mock.testmodule1'),
+            )),
+        ], targets=[])
+        self.assertRaises(CompositionError, replay, product, Composer())
+
+
+if __name__ == '__main__':
+    unittest.main()
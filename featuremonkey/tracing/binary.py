@@ -0,0 +1,289 @@
+# coding: utf-8
+"""
+Binary trace format
+===================
+
+A compact file format for serialized operation logs
+(the output of ``serialize_operation_log``).
+
+JSON dumps repeat the source text of a refinement in every record that
+references it. Here, every distinct string (names as well as serialized
+values) is stored once in a string table. Operations are stored as fixed-size
+records referencing the string table by id, so any record can be located
+without parsing the ones before it.
+
+Layout (all integers little endian)::
+
+    header      magic, version, record size, record count, string count,
+                offset of the string index, offset of the records
+    strings     raw string data, utf-8 for text
+    index       string count + 1 offsets (uint64) into the file;
+                string ``i`` spans ``index[i]:index[i + 1]``
+    records     one fixed-size record per operation
+
+``TraceReader`` memory-maps a trace file and decodes records lazily,
+so even very large traces can be inspected without loading them.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+
+from .store import TraceStore
+
+
+MAGIC = b'FMTRACE\x00'
+VERSION = 1
+
+HEADER = struct.Struct('<8sHHIIQQ')
+# ids of type, base, target_attrname, role, feature, old_value, new_value
+# followed by the value kinds of old_value and new_value
+RECORD = struct.Struct('<7I2B2x')
+OFFSET = struct.Struct('<Q')
+
+NAME_COLUMNS = TraceStore.COLUMNS
+VALUE_COLUMNS = ('old_value', 'new_value')
+
+# value kinds
+KIND_NONE = 0
+KIND_TEXT = 1
+KIND_BYTES = 2
+KIND_JSON = 3
+
+
+class TraceFormatError(Exception):
+    pass
+
+
+def _encode_value(value):
+    if value is None:
+        return KIND_NONE, None
+    if isinstance(value, bytes):
+        return KIND_BYTES, value
+    if isinstance(value, type(u'')):
+        return KIND_TEXT, value.encode('utf-8')
+    # serialized dicts and lists; anything unexpected is kept as its repr
+    return KIND_JSON, json.dumps(value, sort_keys=True, default=repr).encode('utf-8')
+
+
+def _decode_value(kind, data):
+    if kind == KIND_NONE:
+        return None
+    if kind == KIND_BYTES:
+        return bytes(data)
+    if kind == KIND_TEXT:
+        return data.decode('utf-8')
+    if kind == KIND_JSON:
+        return json.loads(data.decode('utf-8'))
+    raise TraceFormatError('unknown value kind: %s' % kind)
+
+
+class TraceWriter(object):
+    """
+    collects operations and writes them in the binary trace format.
+    """
+
+    def __init__(self):
+        self._strings = [b'']
+        self._ids = {}
+        self._records = []
+
+    def _intern(self, data):
+        if data is None:
+            return 0
+        try:
+            return self._ids[data]
+        except KeyError:
+            string_id = len(self._strings)
+            self._strings.append(data)
+            self._ids[data] = string_id
+            return string_id
+
+    def add(self, operation):
+        ids = []
+        for name in NAME_COLUMNS:
+            value = operation.get(name)
+            ids.append(self._intern(None if value is None else value.encode('utf-8')))
+        kinds = []
+        for name in VALUE_COLUMNS:
+            kind, data = _encode_value(operation.get(name))
+            kinds.append(kind)
+            ids.append(self._intern(data))
+        self._records.append(RECORD.pack(*(ids + kinds)))
+
+    def write(self, fileobj):
+        strings_offset = HEADER.size
+        offsets = []
+        position = strings_offset
+        for data in self._strings:
+            offsets.append(position)
+            position += len(data)
+        offsets.append(position)
+        index_offset = position
+        records_offset = index_offset + OFFSET.size * len(offsets)
+        fileobj.write(HEADER.pack(
+            MAGIC, VERSION, RECORD.size,
+            len(self._records), len(self._strings),
+            index_offset, records_offset,
+        ))
+        for data in self._strings:
+            fileobj.write(data)
+        for offset in offsets:
+            fileobj.write(OFFSET.pack(offset))
+        for record in self._records:
+            fileobj.write(record)
+
+
+class TraceReader(object):
+    """
+    lazily decoding, memory-mapped reader of binary trace files.
+
+    supports ``len()``, indexing and iteration; records are returned
+    in the format produced by ``serialize_operation_log``.
+    """
+
+    def __init__(self, filename):
+        self._file = io.open(filename, 'rb')
+        self._map = None
+        try:
+            self._open(filename)
+        except Exception as e:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+            if isinstance(e, TraceFormatError):
+                raise
+            raise TraceFormatError('not a featuremonkey trace: %s (%s)' % (filename, e))
+        # names repeat a lot, values are decoded on every access
+        self._names = {0: None}
+
+    def _open(self, filename):
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            # also catches empty files, which cannot be mapped
+            raise TraceFormatError('not a featuremonkey trace: %s' % filename)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, record_size, self._num_records, self._num_strings,
+         self._index_offset, self._records_offset) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise TraceFormatError('not a featuremonkey trace: %s' % filename)
+        if version != VERSION or record_size != RECORD.size:
+            raise TraceFormatError('unsupported trace version: %s' % version)
+        size = len(self._map)
+        if (self._index_offset + OFFSET.size * (self._num_strings + 1) > size
+                or self._records_offset + RECORD.size * self._num_records > size):
+            raise TraceFormatError('truncated featuremonkey trace: %s' % filename)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._num_records
+
+    def _raw_string(self, string_id):
+        if not 0 <= string_id < self._num_strings:
+            raise TraceFormatError('corrupt featuremonkey trace: string %d out of range' % string_id)
+        start, end = struct.unpack_from(
+            '<2Q', self._map, self._index_offset + OFFSET.size * string_id
+        )
+        if not start <= end <= len(self._map):
+            raise TraceFormatError(
+                'corrupt featuremonkey trace: string %d at %d-%d' % (string_id, start, end)
+            )
+        return self._map[start:end]
+
+    def _name(self, string_id):
+        try:
+            return self._names[string_id]
+        except KeyError:
+            name = self._names[string_id] = self._raw_string(string_id).decode('utf-8')
+            return name
+
+    def _record(self, record_number):
+        if record_number < 0:
+            record_number += self._num_records
+        if not 0 <= record_number < self._num_records:
+            raise IndexError('trace record out of range')
+        return RECORD.unpack_from(
+            self._map, self._records_offset + RECORD.size * record_number
+        )
+
+    def metadata(self, record_number):
+        """
+        returns the record without decoding ``old_value`` and ``new_value``
+        """
+        fields = self._record(record_number)
+        return dict(
+            (name, self._name(string_id))
+            for name, string_id in zip(NAME_COLUMNS, fields)
+        )
+
+    def value_hash(self, record_number, name='new_value'):
+        """
+        returns the sha1 of the stored ``name`` value of a record
+        without decoding it, ``None`` for missing values
+        """
+        fields = self._record(record_number)
+        index = VALUE_COLUMNS.index(name)
+        if fields[-len(VALUE_COLUMNS) + index] == KIND_NONE:
+            return None
+        string_id = fields[len(NAME_COLUMNS) + index]
+        return hashlib.sha1(self._raw_string(string_id)).hexdigest()
+
+    def __getitem__(self, record_number):
+        fields = self._record(record_number)
+        operation = dict(
+            (name, self._name(string_id))
+            for name, string_id in zip(NAME_COLUMNS, fields)
+        )
+        value_ids = fields[len(NAME_COLUMNS):len(NAME_COLUMNS) + len(VALUE_COLUMNS)]
+        kinds = fields[-len(VALUE_COLUMNS):]
+        for name, string_id, kind in zip(VALUE_COLUMNS, value_ids, kinds):
+            operation[name] = _decode_value(kind, self._raw_string(string_id))
+        return operation
+
+    def __iter__(self):
+        for record_number in range(self._num_records):
+            yield self[record_number]
+
+    def to_store(self):
+        """
+        builds a ``TraceStore`` from the record metadata
+        """
+        store = TraceStore()
+        for record_number in range(self._num_records):
+            store.append(self.metadata(record_number))
+        return store
+
+
+def dump_operation_log(operation_log, filename):
+    """
+    writes a serialized operation log to ``filename`` in the binary trace format
+    """
+    writer = TraceWriter()
+    for operation in operation_log:
+        writer.add(operation)
+    with io.open(filename, 'wb') as fileobj:
+        writer.write(fileobj)
+
+
+def load_operation_log(filename):
+    """
+    reads a binary trace file back into the ``serialize_operation_log`` format
+    """
+    with TraceReader(filename) as reader:
+        return list(reader)
@@ -0,0 +1,114 @@
+# coding: utf-8
+"""
+Trace filters
+=============
+
+A composition tracer deep-copies the old and new value of every operation.
+Usually only a few targets are of interest. A ``TraceFilter`` selects the
+operations passed to the tracer by base, attribute, role, feature and
+operation type; all other operations never reach it::
+
+    composer.trace_filter = TraceFilter(
+        bases=['myapp.models*'], attributes=['save', 'clean_*'],
+        operations=['refinement'],
+    )
+
+Every criterion is a list of ``fnmatch`` patterns, an operation is traced
+if each given criterion has a matching pattern. Bases are matched against
+the base names of the trace (``myapp.models:module``, ``Order:type``,
+``<repr>:Order`` for instances); patterns without ``:`` ignore the type.
+
+The filter is compiled into a single predicate when it is set. Like the
+tracer it can be given in the environment::
+
+    COMPOSITION_TRACE_FILTER='bases=myapp.*;operations=refinement,introduction'
+"""
+
+from __future__ import unicode_literals
+
+import fnmatch
+import re
+
+
+FIELDS = (
+    ('bases', 'base'),
+    ('attributes', 'target_attrname'),
+    ('roles', 'role'),
+    ('features', 'feature'),
+    ('operations', 'type'),
+)
+
+
+def _compile_patterns(patterns, name_only):
+    """
+    returns the ``match`` method of a regex matching any of ``patterns``
+    """
+    regexes = []
+    for pattern in patterns:
+        if name_only and ':' not in pattern:
+            pattern += ':*'
+        regexes.append(fnmatch.translate(pattern))
+    if not regexes:
+        return lambda value: None
+    return re.compile('|'.join('(?:%s)' % regex for regex in regexes)).match
+
+
+class TraceFilter(object):
+    """
+    selects the operations passed to the composition tracer.
+    criteria that are ``None`` match everything.
+    """
+
+    def __init__(self, bases=None, attributes=None, roles=None, features=None, operations=None):
+        self.bases = bases
+        self.attributes = attributes
+        self.roles = roles
+        self.features = features
+        self.operations = operations
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        creates a filter from ``'criterion=pattern,pattern;criterion=...'``
+        """
+        criteria = {}
+        for part in spec.split(';'):
+            if not part.strip():
+                continue
+            name, _, patterns = part.partition('=')
+            name = name.strip()
+            if name not in dict(FIELDS):
+                raise ValueError(
+                    'unknown trace filter criterion %r, use one of %s' % (
+                        name, ', '.join(criterion for criterion, _ in FIELDS)
+                    )
+                )
+            criteria[str(name)] = [
+                pattern.strip() for pattern in patterns.split(',') if pattern.strip()
+            ]
+        return cls(**criteria)
+
+    def compile(self):
+        """
+        returns the predicate taking an operation dict
+        """
+        checks = tuple(
+            (key, _compile_patterns(getattr(self, criterion), criterion == 'bases'))
+            for criterion, key in FIELDS
+            if getattr(self, criterion) is not None
+        )
+
+        def predicate(operation):
+            for key, match in checks:
+                if match(operation[key] or '') is None:
+                    return False
+            return True
+
+        return predicate
+
+    def __repr__(self):
+        return 'TraceFilter(%s)' % ', '.join(
+            '%s=%r' % (criterion, getattr(self, criterion))
+            for criterion, _ in FIELDS
+            if getattr(self, criterion) is not None
+        )
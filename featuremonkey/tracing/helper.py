@@ -16,7 +16,12 @@ def is_static_method(obj):
 
 
 def get_class_from_method(obj):
-    for cls in inspect.getmro(obj.im_class):
+    klass = getattr(obj, 'im_class', None)
+    if klass is None:
+        # python 3: no unbound methods, derive the class from the bound object
+        owner = obj.__self__
+        klass = owner if inspect.isclass(owner) else owner.__class__
+    for cls in inspect.getmro(klass):
         if obj.__name__ in cls.__dict__:
             return cls
 
@@ -1,6 +1,4 @@
 # coding: utf-8
-from __future__ import unicode_literals
-
 """
 Serialization module
 ====================
@@ -30,26 +28,132 @@ Therefore, custom serialization is required:
     - for simple objects and iterables (in case the iterables contain simple objects) simply their values
     - for classes, in most cases their __dict__ representation is enough
     - for modules maybe also recursively serialize its __dict__ ? -> tbd
+
+Serializing a big module or class walks its whole __dict__. Pass a
+SerializationBudget to bound the cost and size of each record::
+
+    serialize_operation_log(OPERATION_LOG, SerializationBudget(
+        max_depth=3, max_items=1000, max_bytes=64 * 1024, max_time=0.05
+    ))
+
+Parts that exceed the budget are replaced by summaries like
+``{'__truncated__': 'items', 'type': 'dict', 'length': 1234, 'hash': '...'}``.
 """
 
-import collections
+from __future__ import unicode_literals
+
+import hashlib
 import inspect
-import marshal
-import six
+import time
 
 from io import IOBase
 
+try:
+    from collections.abc import Iterable
+except ImportError:
+    # python 2
+    from collections import Iterable
+
+try:
+    text_type = unicode
+except NameError:
+    # python 3
+    text_type = str
+
+try:
+    from reprlib import repr as _short_repr
+except ImportError:
+    # python 2
+    from repr import repr as _short_repr
+
 from .helper import (
     is_class_method,
     is_static_method
 )
 
 
-def _serialize_method(obj):
-    return _serialize_function(obj)
+_timer = getattr(time, 'perf_counter', time.time)
+
+TRUNCATED = '__truncated__'
 
 
-def _serialize_function(obj):
+class SerializationBudget(object):
+    """
+    limits the nesting depth, number of serialized objects, output bytes
+    (of strings) and time spent serializing a single record.
+    ``None`` means unlimited.
+
+    the counters are reset for each record by ``serialize_operation_log``;
+    call ``reset`` when using the budget with ``serialize_obj`` directly.
+    """
+
+    def __init__(self, max_depth=None, max_items=None, max_bytes=None, max_time=None):
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_time = max_time
+        self.reset()
+
+    def reset(self):
+        self.items = 0
+        self.bytes = 0
+        # number of summaries produced since the last reset
+        self.truncated = 0
+        self._deadline = None if self.max_time is None else _timer() + self.max_time
+
+    def exceeded(self, depth):
+        """
+        returns the name of the exhausted limit or ``None``
+        """
+        if self.max_depth is not None and depth > self.max_depth:
+            return 'depth'
+        if self.max_items is not None and self.items >= self.max_items:
+            return 'items'
+        if self.max_bytes is not None and self.bytes >= self.max_bytes:
+            return 'bytes'
+        if self._deadline is not None and _timer() > self._deadline:
+            return 'time'
+        return None
+
+    def consume(self, value):
+        """
+        accounts for serialized output ``value``.
+        returns ``value`` or its summary if it does not fit into the budget.
+        """
+        if isinstance(value, (bytes, text_type)):
+            if self.max_bytes is not None and self.bytes + len(value) > self.max_bytes:
+                return self.summarize(value, 'bytes')
+            self.bytes += len(value)
+        return value
+
+    def summarize(self, obj, reason):
+        """
+        returns a small summary (type, length, hash) of ``obj``
+        """
+        self.truncated += 1
+        if isinstance(obj, bytes):
+            data = obj
+        elif isinstance(obj, text_type):
+            data = obj.encode('utf-8')
+        else:
+            data = _short_repr(obj).encode('utf-8')
+        try:
+            length = len(obj)
+        except TypeError:
+            length = len(obj.__dict__) if hasattr(obj, '__dict__') else None
+        return {
+            TRUNCATED: reason,
+            'type': type(obj).__name__,
+            'length': length,
+            'hash': hashlib.sha1(data).hexdigest(),
+        }
+
+
+def _serialize_method(obj, budget=None, depth=0):
+    return _serialize_function(obj, budget, depth)
+
+
+def _serialize_function(obj, budget=None, depth=0):
     """
     Still needing this much try-except stuff. We should find a way to get rid of this.
     :param obj:
@@ -58,15 +162,17 @@ def _serialize_function(obj):
     try:
         obj = inspect.getsource(obj)
     except (TypeError, IOError):
+        # marshal is only needed for objects without source
+        import marshal
         try:
             obj = marshal.dumps(obj)
         except ValueError:
             if hasattr(obj, '__dict__'):
-                obj = _serialize_dict(obj.__dict__)
+                obj = _serialize_dict(obj.__dict__, budget, depth)
     return obj
 
 
-def _serialize_module(obj):
+def _serialize_module(obj, budget=None, depth=0):
     """
     Tries to serialize a module by its __dict__ attr.
     Remove the builtins attr as this one is not relevant and extremely large.
@@ -75,46 +181,69 @@ def _serialize_module(obj):
     :param obj:
     :return:
     """
-    obj = dict(obj.__dict__)
-    if '__builtins__' in obj.keys():
-        obj.pop('__builtins__')
-    for k, v in obj.items():
+    module_dict = dict(obj.__dict__)
+    if '__builtins__' in module_dict.keys():
+        module_dict.pop('__builtins__')
+    obj = {}
+    for k, v in module_dict.items():
+        if budget is not None and _truncate_rest(obj, module_dict, len(obj), budget, depth):
+            break
         if callable(v):
-            obj[k] = serialize_obj(v)
+            obj[k] = serialize_obj(v, budget, depth + 1)
+        elif budget is not None:
+            budget.items += 1
+            obj[k] = budget.consume(repr(v))
         else:
             obj[k] = repr(v)
     return obj
 
 
-def _serialize_class(obj):
+def _truncate_rest(serialized, items, done, budget, depth):
+    """
+    if the budget is exhausted, stores a summary of the ``items`` not yet
+    serialized into ``serialized`` and returns ``True``
+    """
+    reason = budget.exceeded(depth + 1)
+    if reason is None:
+        return False
+    summary = budget.summarize(items, reason)
+    summary['length'] = len(items) - done
+    if isinstance(serialized, dict):
+        serialized[TRUNCATED] = summary
+    else:
+        serialized.append(summary)
+    return True
+
+
+def _serialize_class(obj, budget=None, depth=0):
     if hasattr(obj, '__dict__'):
-        obj = _serialize_dict(obj.__dict__)
+        obj = _serialize_dict(obj.__dict__, budget, depth)
     return obj
 
 
-def _serialize_classmethod(obj):
-    return _serialize_function(obj)
+def _serialize_classmethod(obj, budget=None, depth=0):
+    return _serialize_function(obj, budget, depth)
 
 
-def _serialize_staticmethod(obj):
-    return _serialize_function(obj)
+def _serialize_staticmethod(obj, budget=None, depth=0):
+    return _serialize_function(obj, budget, depth)
 
 
-def _serialize_callable(obj):
+def _serialize_callable(obj, budget=None, depth=0):
     if inspect.isclass(obj):
-        obj = _serialize_class(obj)
+        obj = _serialize_class(obj, budget, depth)
     elif inspect.ismethod(obj) and is_class_method(obj):
-        obj = _serialize_classmethod(obj)
+        obj = _serialize_classmethod(obj, budget, depth)
     elif inspect.ismethod(obj) and is_static_method(obj):
-        obj = _serialize_staticmethod(obj)
+        obj = _serialize_staticmethod(obj, budget, depth)
     elif inspect.ismethod(obj):
-        obj = _serialize_method(obj)
+        obj = _serialize_method(obj, budget, depth)
     elif inspect.isfunction(obj):
-        obj = _serialize_function(obj)
+        obj = _serialize_function(obj, budget, depth)
     return obj
 
 
-def _serialize_iterable(obj):
+def _serialize_iterable(obj, budget=None, depth=0):
     """
     Only for serializing list and tuples and stuff.
     Dicts and Strings/Unicode is treated differently.
@@ -123,41 +252,67 @@ def _serialize_iterable(obj):
     :param obj:
     :return:
     """
-    if isinstance(obj, (tuple, set)):
+    if not isinstance(obj, list):
         # make a tuple assignable by casting it to list
         obj = list(obj)
-    for item in obj:
-        obj[obj.index(item)] = serialize_obj(item)
-    return obj
+    if budget is None:
+        return [serialize_obj(item) for item in obj]
+    result = []
+    for index, item in enumerate(obj):
+        if _truncate_rest(result, obj, index, budget, depth):
+            break
+        result.append(serialize_obj(item, budget, depth + 1))
+    return result
 
 
-def _serialize_dict(obj):
-    obj = dict(obj)
-    for k, v in obj.items():
-        obj[k] = serialize_obj(v)
-    return obj
+def _serialize_dict(obj, budget=None, depth=0):
+    if budget is None:
+        return dict((k, serialize_obj(v)) for k, v in obj.items())
+    result = {}
+    for k, v in list(obj.items()):
+        if _truncate_rest(result, obj, len(result), budget, depth):
+            break
+        result[k] = serialize_obj(v, budget, depth + 1)
+    return result
 
 
-def serialize_obj(obj):
+def serialize_obj(obj, budget=None, depth=0):
+    """
+    serializes ``obj``; ``budget`` is an optional ``SerializationBudget``
+    and ``depth`` the nesting level of ``obj`` within the record
+    """
+    if budget is not None:
+        reason = budget.exceeded(depth)
+        if reason is not None:
+            return budget.summarize(obj, reason)
+        budget.items += 1
     if callable(obj):
-        obj = _serialize_callable(obj)
+        obj = _serialize_callable(obj, budget, depth)
     elif inspect.ismodule(obj):
-        obj = _serialize_module(obj)
-    elif isinstance(obj, collections.Iterable) and not isinstance(obj, (str, dict, six.text_type, IOBase)):
-        # "six.text_type" is "unicode" in py2 and "str" in py3
+        obj = _serialize_module(obj, budget, depth)
+    elif isinstance(obj, Iterable) and not isinstance(obj, (str, dict, text_type, IOBase)):
+        # "text_type" is "unicode" in py2 and "str" in py3
         # "IOBase" is the same check as for "file" in py2, but compatible for both
-        obj = _serialize_iterable(obj)
+        obj = _serialize_iterable(obj, budget, depth)
     elif isinstance(obj, dict):
-        obj = _serialize_dict(obj)
+        obj = _serialize_dict(obj, budget, depth)
     elif hasattr(obj, '__dict__'):
-        obj = _serialize_dict(obj.__dict__)
-    elif not isinstance(obj, (str, six.text_type)):
+        obj = _serialize_dict(obj.__dict__, budget, depth)
+    elif not isinstance(obj, (str, text_type)):
         obj = repr(obj)
+    if budget is not None:
+        obj = budget.consume(obj)
     return obj
 
 
-def serialize_operation_log(operation_log):
+def serialize_operation_log(operation_log, budget=None):
+    """
+    serializes the old and new values of all operations in place.
+    with a ``SerializationBudget`` each record gets the full budget.
+    """
     for operation in operation_log:
-        operation['old_value'] = serialize_obj(operation['old_value'])
-        operation['new_value'] = serialize_obj(operation['new_value'])
+        if budget is not None:
+            budget.reset()
+        operation['old_value'] = serialize_obj(operation['old_value'], budget)
+        operation['new_value'] = serialize_obj(operation['new_value'], budget)
     return operation_log
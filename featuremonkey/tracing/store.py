@@ -0,0 +1,257 @@
+# coding: utf-8
+"""
+Trace store
+===========
+
+Indexed, columnar storage for the metadata of composer operations.
+
+``OPERATION_LOG`` is a list of dicts that has to be scanned linearly for
+every question asked about a composition. For products with tens of
+thousands of operations that is slow and wastes a lot of memory, because
+every record carries its own copies of the same base, role and feature names.
+
+The ``TraceStore`` keeps one integer column per operation field. All strings
+are interned into a shared ``StringTable``, so each base/role/feature name is
+stored exactly once. Indexes by base, attribute, role and feature make the
+typical queries cheap::
+
+    store = TraceStore.from_operation_log(OPERATION_LOG)
+    store.layers_of('app.views:module', 'index')
+    store.touched_by('featureX')
+
+Old and new values are not stored; use ``OPERATION_LOG`` and the serializer
+if the actual values are required.
+"""
+
+from __future__ import unicode_literals
+
+from array import array
+
+from .logger import NullOperationLogger
+
+
+class StringTable(object):
+    """
+    interns strings and hands out stable integer ids.
+
+    id ``0`` is reserved for ``None``.
+    """
+
+    def __init__(self):
+        self._strings = [None]
+        self._ids = {None: 0}
+
+    def intern(self, value):
+        try:
+            return self._ids[value]
+        except KeyError:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._ids[value] = string_id
+            return string_id
+
+    def get_id(self, value):
+        """
+        returns the id of ``value`` or ``None`` if it has never been interned
+        """
+        return self._ids.get(value)
+
+    def __getitem__(self, string_id):
+        return self._strings[string_id]
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __iter__(self):
+        return iter(self._strings)
+
+
+class TraceStore(object):
+    """
+    columnar store of composer operations with indexes on every column.
+    """
+
+    COLUMNS = ('type', 'base', 'target_attrname', 'role', 'feature')
+    INDEXED_COLUMNS = ('base', 'target_attrname', 'role', 'feature')
+
+    def __init__(self):
+        self.strings = StringTable()
+        self._columns = dict((name, array('i')) for name in self.COLUMNS)
+        self._indexes = dict((name, {}) for name in self.INDEXED_COLUMNS)
+        # (base id, attribute id) -> record numbers
+        self._targets = {}
+
+    @classmethod
+    def from_operation_log(cls, operation_log):
+        store = cls()
+        store.extend(operation_log)
+        return store
+
+    def append(self, operation):
+        """
+        add a single operation given as dict (the ``OPERATION_LOG`` format)
+        """
+        record_number = len(self)
+        ids = {}
+        for name in self.COLUMNS:
+            string_id = self.strings.intern(operation.get(name))
+            self._columns[name].append(string_id)
+            ids[name] = string_id
+        for name in self.INDEXED_COLUMNS:
+            self._indexes[name].setdefault(ids[name], []).append(record_number)
+        self._targets.setdefault(
+            (ids['base'], ids['target_attrname']), []
+        ).append(record_number)
+
+    def extend(self, operations):
+        for operation in operations:
+            self.append(operation)
+
+    def clear(self):
+        self.__init__()
+
+    def __len__(self):
+        return len(self._columns['type'])
+
+    def __getitem__(self, record_number):
+        if record_number < 0:
+            record_number += len(self)
+        return dict(
+            (name, self.strings[self._columns[name][record_number]])
+            for name in self.COLUMNS
+        )
+
+    def __iter__(self):
+        for record_number in range(len(self)):
+            yield self[record_number]
+
+    def _lookup(self, column, value):
+        string_id = self.strings.get_id(value)
+        if string_id is None:
+            return []
+        return self._indexes[column].get(string_id, [])
+
+    def find(self, **criteria):
+        """
+        returns the record numbers of all operations matching ``criteria``.
+
+        criteria are column names mapped to the expected value, e.g.
+        ``find(role='MyRole', type='refinement')``.
+        Matching starts with the most selective index.
+        """
+        unknown = set(criteria) - set(self.COLUMNS)
+        if unknown:
+            raise ValueError('unknown trace columns: %s' % ', '.join(sorted(unknown)))
+        if not criteria:
+            return list(range(len(self)))
+        indexed = [name for name in criteria if name in self.INDEXED_COLUMNS]
+        if indexed:
+            candidates = min(
+                (self._lookup(name, criteria[name]) for name in indexed),
+                key=len
+            )
+        else:
+            candidates = range(len(self))
+        wanted = []
+        for name, value in criteria.items():
+            string_id = self.strings.get_id(value)
+            if string_id is None:
+                return []
+            wanted.append((self._columns[name], string_id))
+        return [
+            record_number for record_number in candidates
+            if all(column[record_number] == string_id for column, string_id in wanted)
+        ]
+
+    def layers_of(self, base, target_attrname):
+        """
+        returns the operations applied to ``target_attrname`` of ``base``
+        in composition order.
+
+        ``base`` is given in the format used by the composer
+        e.g. ``'app.views:module'``.
+        """
+        base_id = self.strings.get_id(base)
+        attr_id = self.strings.get_id(target_attrname)
+        if base_id is None or attr_id is None:
+            return []
+        return [self[record_number] for record_number in self._targets.get((base_id, attr_id), [])]
+
+    def touched_by(self, feature):
+        """
+        returns the ``(base, target_attrname)`` pairs modified by ``feature``
+        in order of their first modification.
+        """
+        seen = set()
+        result = []
+        bases = self._columns['base']
+        attrs = self._columns['target_attrname']
+        for record_number in self._lookup('feature', feature):
+            key = (bases[record_number], attrs[record_number])
+            if key not in seen:
+                seen.add(key)
+                result.append((self.strings[key[0]], self.strings[key[1]]))
+        return result
+
+    def targets(self):
+        """
+        returns all ``(base, target_attrname)`` pairs in the store
+        """
+        return [
+            (self.strings[base_id], self.strings[attr_id])
+            for base_id, attr_id in self._targets
+        ]
+
+    def compact(self):
+        """
+        returns the operations as list of dicts with consecutive refinements
+        of the same attribute collapsed into a single chain record.
+
+        chain records have the type ``'refinement_chain'`` and list
+        the ``roles`` and ``features`` of the collapsed refinements in order.
+        """
+        result = []
+        refinement_id = self.strings.get_id('refinement')
+        types = self._columns['type']
+        bases = self._columns['base']
+        attrs = self._columns['target_attrname']
+        previous_key = None
+        for record_number in range(len(self)):
+            key = (bases[record_number], attrs[record_number])
+            record = self[record_number]
+            if types[record_number] == refinement_id and key == previous_key:
+                chain = result[-1]
+                if chain['type'] != 'refinement_chain':
+                    chain = dict(
+                        type='refinement_chain',
+                        base=chain['base'],
+                        target_attrname=chain['target_attrname'],
+                        roles=[chain['role']],
+                        features=[chain['feature']],
+                    )
+                    result[-1] = chain
+                chain['roles'].append(record['role'])
+                chain['features'].append(record['feature'])
+            else:
+                result.append(record)
+            previous_key = key if types[record_number] == refinement_id else None
+        return result
+
+
+TRACE_STORE = TraceStore()
+
+
+class IndexedOperationLogger(NullOperationLogger):
+    """
+    composition tracer that records operation metadata into ``TRACE_STORE``.
+
+    Unlike ``OperationLogger`` it neither copies old nor new values, which
+    keeps tracing cheap for large products.
+    Activate it by setting ``COMPOSITION_TRACER`` to
+    ``featuremonkey.tracing.store.IndexedOperationLogger``.
+    """
+    trace_store = TRACE_STORE
+
+    def log(self, operation=None, new_value="", old_value=""):
+        if operation is not None:
+            self.trace_store.append(operation)
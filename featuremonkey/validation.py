@@ -0,0 +1,300 @@
+"""
+validation.py - dry-run validation of feature compositions
+
+The composer raises ``CompositionError`` on the first conflict and leaves
+the product partially composed. The ``ValidatingComposer`` simulates the
+composition instead: transformations are checked against shadow attribute
+tables of the bases and nothing is modified. All conflicts are collected
+together with the feature, role and target they stem from::
+
+    from featuremonkey.validation import validate_equation
+
+    for conflict in validate_equation('product.equation'):
+        print(conflict)
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import copy
+import importlib
+import sys
+
+from collections import namedtuple
+
+from .composer import (Composer, CompositionError,
+    get_features_from_equation_file)
+from .helpers import _get_base_name, _get_role_name
+from .importhooks import load_fsts
+from .merging import apply_merge
+
+
+class Conflict(namedtuple('Conflict', 'kind feature role target attribute message')):
+    """
+    a single problem found during validation.
+
+    ``kind`` is one of:
+
+    - ``'existing_attribute'``: introduction of an attribute that exists already
+    - ``'missing_attribute'``: refinement or merge of an attribute that does not exist
+    - ``'merge_conflict'``: ``merge_`` transformation conflicting with the container
+    - ``'invalid_introduction'``: method introduction that is not callable
+    - ``'missing_child'``: ``child_`` transformation of an attribute that does not exist
+    - ``'late_composition'``: ``compose_later`` after the module has been imported
+    - ``'select'``: the feature could not be selected (import errors, bad ``select``)
+    - ``'error'``: any other error raised while simulating the composition
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        location = ', '.join(
+            '%s: %s' % (name, value) for name, value in (
+                ('feature', self.feature),
+                ('role', self.role),
+                ('target', self.target),
+                ('attribute', self.attribute),
+            ) if value
+        )
+        return '[%s] %s (%s)' % (self.kind, self.message, location)
+
+
+def _describe(error):
+    return '%s: %s' % (error.__class__.__name__, error)
+
+
+class ValidatingComposer(Composer):
+    """
+    composer that simulates compositions and collects conflicts
+    instead of applying transformations.
+    """
+
+    def __init__(self):
+        super(ValidatingComposer, self).__init__()
+        self.conflicts = []
+        # transformations that could not be checked, e.g. children of
+        # attributes introduced during the simulation
+        self.unchecked = []
+        # id(base) -> (base, names of the simulated attributes)
+        self._shadows = {}
+        # (module name, fsts) registered by compose_later
+        self._pending = []
+        # (id(base), attribute) -> copy of the container merged into
+        self._merged = {}
+
+    def _shadow(self, base):
+        try:
+            return self._shadows[id(base)][1]
+        except KeyError:
+            names = set(dir(base))
+            self._shadows[id(base)] = (base, names)
+            return names
+
+    def _conflict(self, kind, message, role=None, base=None, attribute=None):
+        self.conflicts.append(Conflict(
+            kind,
+            self._active_feature,
+            None if role is None else _get_role_name(role),
+            None if base is None else _get_base_name(base),
+            attribute,
+            message,
+        ))
+
+    def _introduce(self, role, target_attrname, transformation, base):
+        shadow = self._shadow(base)
+        if target_attrname in shadow:
+            self._conflict(
+                'existing_attribute',
+                'Cannot introduce "%s": attribute exists already' % target_attrname,
+                role, base, target_attrname,
+            )
+            return
+        if callable(transformation):
+            if not callable(transformation()):
+                self._conflict(
+                    'invalid_introduction',
+                    'Cannot introduce "%s": method introduction is not callable' % target_attrname,
+                    role, base, target_attrname,
+                )
+                return
+        shadow.add(target_attrname)
+
+    def _refine(self, role, target_attrname, transformation, base):
+        if target_attrname not in self._shadow(base):
+            self._conflict(
+                'missing_attribute',
+                'Cannot refine "%s": attribute does not exist in original' % target_attrname,
+                role, base, target_attrname,
+            )
+
+    def _merge(self, role, target_attrname, transformation, base):
+        if target_attrname not in self._shadow(base):
+            self._conflict(
+                'missing_attribute',
+                'Cannot merge "%s": attribute does not exist in original' % target_attrname,
+                role, base, target_attrname,
+            )
+            return
+        if not hasattr(base, target_attrname):
+            self.unchecked.append(
+                'merge_%s of %s: attribute is introduced during composition' % (
+                    target_attrname, _get_base_name(base)
+                )
+            )
+            return
+        key = (id(base), target_attrname)
+        if key not in self._merged:
+            self._merged[key] = copy.copy(getattr(base, target_attrname))
+        try:
+            apply_merge(self._merged[key], transformation, lambda: 'Cannot merge "%s":' % target_attrname)
+        except CompositionError as e:
+            self._conflict('merge_conflict', str(e), role, base, target_attrname)
+
+    def _compose_child(self, role, target_attrname, transformation, base):
+        if hasattr(base, target_attrname):
+            super(ValidatingComposer, self)._compose_child(
+                role, target_attrname, transformation, base
+            )
+        elif target_attrname in self._shadow(base):
+            self.unchecked.append(
+                'child_%s of %s: attribute is introduced during composition' % (
+                    target_attrname, _get_base_name(base)
+                )
+            )
+        else:
+            self._conflict(
+                'missing_child',
+                'Cannot compose child "%s": attribute does not exist' % target_attrname,
+                role, base, target_attrname,
+            )
+
+    def _apply_transformation(self, role, base, transformation, attrname):
+        try:
+            super(ValidatingComposer, self)._apply_transformation(
+                role, base, transformation, attrname
+            )
+        except Exception as e:
+            # e.g. an introduce_ factory raising: report it, check the rest
+            self._conflict(
+                'error', _describe(e), role, base, attrname.partition('_')[2] or attrname
+            )
+
+    def _compose_pair(self, role, base):
+        try:
+            return super(ValidatingComposer, self)._compose_pair(role, base)
+        except Exception as e:
+            self._conflict('error', _describe(e), role, base)
+            return base
+
+    def _record_instance_layers(self, base, role, layers):
+        # nothing is composed, instances are left alone
+        pass
+
+    def compose(self, *things, **options):
+        try:
+            return super(ValidatingComposer, self).compose(*things, **options)
+        except CompositionError as e:
+            self._conflict('error', str(e))
+
+    def compose_instances(self, roles, instances):
+        roles = tuple(roles)
+        instances = list(instances)
+        if not roles:
+            self._conflict('error', 'nothing to compose')
+            return instances
+        classes = []
+        for instance in instances:
+            if instance.__class__ not in classes:
+                classes.append(instance.__class__)
+        for cls in classes:
+            # checked against a stand-in for the generated subclass,
+            # the instances keep their class
+            subclass = type(cls)(cls.__name__, (cls,), {
+                '__slots__': (), '__module__': cls.__module__,
+            })
+            self.compose(*(list(roles) + [subclass]))
+        return instances
+
+    def compose_later(self, *things):
+        if len(things) > 1 and things[-1] in sys.modules:
+            self._conflict(
+                'late_composition',
+                'compose_later call after module has been imported: %s' % things[-1],
+                attribute=things[-1],
+            )
+            return
+        return super(ValidatingComposer, self).compose_later(*things)
+
+    def _compose_on_import(self, module_name, fsts):
+        # composed in finish() instead of installing the import hook
+        self._pending.append((module_name, list(fsts), self._active_feature))
+
+    def _select_feature(self, feature_name):
+        try:
+            super(ValidatingComposer, self)._select_feature(feature_name)
+        except Exception as e:
+            # e.g. a SyntaxError in the feature: report it, validate the rest
+            self._conflict('select', _describe(e))
+
+    def finish(self):
+        """
+        simulates the lazy compositions registered so far by importing their
+        base modules. returns the list of conflicts.
+        """
+        pending, self._pending = self._pending, []
+        for module_name, fsts, feature in pending:
+            previous_feature = self._active_feature
+            self._active_feature = feature
+            try:
+                try:
+                    module = importlib.import_module(module_name)
+                    fsts = load_fsts(fsts)
+                except Exception as e:
+                    self._conflict('error', _describe(e), attribute=module_name)
+                    continue
+                self.compose(*(fsts + [module]))
+            finally:
+                self._active_feature = previous_feature
+        return self.conflicts
+
+
+def validate(*features):
+    """
+    validates the feature selection given by ``features``.
+    returns the list of conflicts.
+    """
+    composer = ValidatingComposer()
+    composer.select(*features)
+    return composer.finish()
+
+
+def validate_equation(filename):
+    """
+    validates the feature selection given by equation file ``filename``.
+    returns the list of conflicts.
+    """
+    return validate(*get_features_from_equation_file(filename))
+
+
+def validate_equations(filenames, processes=None):
+    """
+    validates many equation files in parallel worker processes.
+
+    Each equation is validated in a fresh, spawned process, so imports
+    done for one equation (or by the caller) cannot influence another one.
+    ``processes`` defaults to the number of CPUs; pass ``1`` to validate
+    all equations in the current process.
+    Returns a dict mapping each filename to its list of conflicts.
+    """
+    filenames = list(filenames)
+    if processes == 1 or len(filenames) < 2:
+        return dict((filename, validate_equation(filename)) for filename in filenames)
+    import multiprocessing
+    # forked workers would inherit the modules composed in this process
+    get_context = getattr(multiprocessing, 'get_context', None)
+    context = multiprocessing if get_context is None else get_context('spawn')
+    pool = context.Pool(processes, maxtasksperchild=1)
+    try:
+        results = pool.map(validate_equation, filenames, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    return dict(zip(filenames, results))
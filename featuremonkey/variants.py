@@ -0,0 +1,401 @@
+"""
+variants.py - several product variants in one process
+
+A ``Composer`` modifies modules and classes globally, so a process can only
+serve a single product. The ``VariantComposer`` registers the introductions
+and refinements of a feature selection under a *variant* name instead.
+Composed attributes dispatch on the variant of the current context, so
+threads and asyncio tasks serving different variants (e.g. tenants)
+share one process and all code the variants have in common::
+
+    from featuremonkey.variants import VariantComposer, use_variant
+
+    composer = VariantComposer()
+    composer.select_variant('tenant_a', 'base_feature', 'feature_a')
+    composer.select_variant('tenant_b', 'base_feature', 'feature_b')
+
+    with use_variant('tenant_a'):
+        app.views.index(request)
+
+Outside of ``use_variant`` the uncomposed base is used.
+The chain of a variant is built on the first call and cached, so dispatching
+costs a context variable and a dict lookup per call.
+
+Variants are supported for attributes of modules and classes. Module
+attributes must be callables; class attributes may be any kind of value,
+method, staticmethod or classmethod. Merges (``merge_``) of a variant
+are applied to a copy of the container, other variants keep the original.
+Features need to compose with the composer passed to their ``select``
+function.
+"""
+
+from __future__ import absolute_import
+
+import copy
+import threading
+import types
+
+try:
+    import contextvars
+except ImportError:
+    # python < 3.7: variants are thread-local only
+    contextvars = None
+
+from .composer import Composer, CompositionError, _DeferredComposition
+from .helpers import (
+    _CLASS_TYPES, _extract_classmethod, _extract_staticmethod,
+    _get_base_name, _get_role_name, _set_pickle_identity,
+)
+from .importhooks import LazyComposerHook
+from .merging import apply_merge
+
+
+_MISSING = object()
+
+
+if contextvars is not None:
+    _VARIANT = contextvars.ContextVar('featuremonkey_variant', default=None)
+
+    def current_variant():
+        """
+        returns the variant of the current context or ``None``
+        """
+        return _VARIANT.get()
+
+    def _set_variant(variant):
+        return _VARIANT.set(variant)
+
+    def _reset_variant(token):
+        _VARIANT.reset(token)
+
+else:
+    _local = threading.local()
+
+    def current_variant():
+        """
+        returns the variant of the current thread or ``None``
+        """
+        return getattr(_local, 'variant', None)
+
+    def _set_variant(variant):
+        token = current_variant()
+        _local.variant = variant
+        return token
+
+    def _reset_variant(token):
+        _local.variant = token
+
+
+class use_variant(object):
+    """
+    context manager running its block with the given variant
+    """
+
+    def __init__(self, variant):
+        self.variant = variant
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_set_variant(self.variant))
+        return self.variant
+
+    def __exit__(self, *exc_info):
+        _reset_variant(self._tokens.pop())
+
+
+def _refine_value(value, transformation):
+    if not callable(transformation):
+        return transformation
+    if isinstance(value, staticmethod):
+        return staticmethod(transformation(_extract_staticmethod(value)))
+    if isinstance(value, classmethod):
+        return classmethod(transformation(_extract_classmethod(value)))
+    if callable(value):
+        wrapper = transformation(value)
+        if not wrapper.__doc__:
+            wrapper.__doc__ = value.__doc__
+        return wrapper
+    return transformation(value)
+
+
+class VariantAttribute(object):
+    """
+    an attribute of a module or class with per variant layers
+    """
+
+    def __init__(self, base, name, original):
+        self.base = base
+        self.name = name
+        # the raw value before any variant was composed
+        self.original = original
+        # variant -> [(operation type, transformation)]
+        self.layers = {}
+        # variant -> raw value
+        self.resolved = {}
+
+    def exists(self, variant):
+        return self.original is not _MISSING or any(
+            operation_type == 'introduction'
+            for operation_type, _ in self.layers.get(variant, ())
+        )
+
+    def add(self, variant, operation_type, transformation):
+        self.layers.setdefault(variant, []).append((operation_type, transformation))
+        self.resolved.pop(variant, None)
+
+    def resolve(self, variant):
+        """
+        returns the raw value of the attribute in ``variant``
+        """
+        try:
+            return self.resolved[variant]
+        except KeyError:
+            pass
+        value = self.original
+        copied = False
+        for operation_type, transformation in self.layers.get(variant, ()):
+            if operation_type == 'introduction':
+                value = transformation() if callable(transformation) else transformation
+                copied = False
+            elif operation_type == 'merge':
+                if not copied:
+                    # merges must not change the container other variants share
+                    value = copy.copy(value)
+                    copied = True
+                apply_merge(value, transformation, lambda: 'Cannot merge "%s" of "%s"!' % (
+                    self.name, _get_base_name(self.base)
+                ))
+            else:
+                value = _refine_value(value, transformation)
+                copied = False
+        self.resolved[variant] = value
+        return value
+
+    def get(self, variant):
+        value = self.resolve(variant)
+        if value is _MISSING:
+            raise AttributeError(
+                '%s has no attribute %r in variant %r' % (
+                    _get_base_name(self.base), self.name, variant
+                )
+            )
+        return value
+
+
+class _VariantDescriptor(object):
+    """
+    class attribute dispatching on the current variant
+    """
+
+    def __init__(self, attribute):
+        self.attribute = attribute
+
+    def __get__(self, obj, cls=None):
+        value = self.attribute.get(current_variant())
+        get = getattr(type(value), '__get__', None)
+        if get is None:
+            return value
+        return get(value, obj, cls)
+
+
+def _module_dispatcher(attribute):
+    resolve = attribute.get
+
+    def dispatch(*args, **kws):
+        return resolve(current_variant())(*args, **kws)
+
+    dispatch.__name__ = str(attribute.name)
+    if attribute.original is not _MISSING:
+        dispatch.__doc__ = attribute.original.__doc__
+    dispatch.variant_attribute = attribute
+    _set_pickle_identity(dispatch, attribute.base, attribute.name)
+    return dispatch
+
+
+class _DeferredVariantComposition(_DeferredComposition):
+    """
+    lazy composition registered for the variant that queued it
+    """
+
+    def __init__(self, composer, feature, variant):
+        _DeferredComposition.__init__(self, composer, feature)
+        self.variant = variant
+
+    def compose(self, *things):
+        composer = self.composer
+        previous_variant = composer._variant
+        composer._variant = self.variant
+        try:
+            return _DeferredComposition.compose(self, *things)
+        finally:
+            composer._variant = previous_variant
+
+
+class VariantComposer(Composer):
+    """
+    composer registering transformations per variant.
+
+    compositions made outside of ``select_variant``/``compose_variant``
+    modify the shared base like a plain ``Composer`` and should happen
+    before the first variant is composed.
+    """
+
+    def __init__(self):
+        Composer.__init__(self)
+        # the variant transformations are registered for
+        self._variant = None
+        # (base, name) -> VariantAttribute
+        self._variant_attributes = {}
+
+    def select_variant(self, variant, *features, **options):
+        """
+        selects ``features`` for ``variant``
+        """
+        previous_variant, self._variant = self._variant, variant
+        try:
+            self.select(*features, **options)
+        finally:
+            self._variant = previous_variant
+
+    def compose_variant(self, variant, *things, **options):
+        """
+        like ``compose`` but only for ``variant``
+        """
+        previous_variant, self._variant = self._variant, variant
+        try:
+            return self.compose(*things, **options)
+        finally:
+            self._variant = previous_variant
+
+    def variant_attribute(self, base, name):
+        """
+        returns the ``VariantAttribute`` for ``name`` of ``base``,
+        installing the dispatcher on first use
+        """
+        key = (base, name)
+        attribute = self._variant_attributes.get(key)
+        if attribute is not None:
+            return attribute
+        if isinstance(base, types.ModuleType):
+            original = base.__dict__.get(name, _MISSING)
+            if original is not _MISSING and not callable(original):
+                raise CompositionError(
+                    'Cannot compose "%s" of "%s" per variant:'
+                    ' only callables are supported in modules!' % (
+                        name, _get_base_name(base),
+                    )
+                )
+            attribute = VariantAttribute(base, name, original)
+            setattr(base, name, _module_dispatcher(attribute))
+        elif isinstance(base, _CLASS_TYPES):
+            original = _MISSING
+            for cls in base.__mro__:
+                if name in cls.__dict__:
+                    original = cls.__dict__[name]
+                    break
+            attribute = VariantAttribute(base, name, original)
+            setattr(base, name, _VariantDescriptor(attribute))
+        else:
+            raise CompositionError(
+                'Cannot compose "%s" onto instance "%s" per variant:'
+                ' compose its class instead!' % (name, _get_base_name(base))
+            )
+        self._variant_attributes[key] = attribute
+        return attribute
+
+    def resolve_variants(self):
+        """
+        builds the chains of all variants now instead of on their first
+        call and returns their number, e.g. before forking
+        """
+        resolved = 0
+        for attribute in self._variant_attributes.values():
+            for variant in attribute.layers:
+                attribute.resolve(variant)
+                resolved += 1
+        return resolved
+
+    def _register(self, operation_type, role, target_attrname, transformation, base):
+        attribute = self.variant_attribute(base, target_attrname)
+        exists = attribute.exists(self._variant)
+        if operation_type == 'introduction' and exists:
+            raise CompositionError(
+                'Cannot introduce "%s" from "%s" into "%s"!'
+                ' Attribute exists already!' % (
+                    target_attrname,
+                    _get_role_name(role),
+                    _get_base_name(base),
+                )
+            )
+        if operation_type in ('refinement', 'merge') and not exists:
+            raise CompositionError(
+                'Cannot %s "%s" of "%s" by "%s"!'
+                ' Attribute does not exist in original!' % (
+                    'refine' if operation_type == 'refinement' else 'merge',
+                    target_attrname,
+                    _get_base_name(base),
+                    _get_role_name(role),
+                )
+            )
+        if (operation_type == 'introduction' and isinstance(base, types.ModuleType)
+                and not callable(transformation)):
+            raise CompositionError(
+                'Cannot introduce "%s" from "%s" into "%s" per variant:'
+                ' only callables are supported in modules!' % (
+                    target_attrname,
+                    _get_role_name(role),
+                    _get_base_name(base),
+                )
+            )
+        operation = dict(
+            type=operation_type,
+            target_attrname=target_attrname,
+            role=_get_role_name(role),
+            base=_get_base_name(base),
+            feature=self._active_feature,
+            variant=self._variant,
+        )
+        traced = self._traced(operation)
+        if traced:
+            self.composition_tracer.log(operation=operation, old_value=None)
+        attribute.add(self._variant, operation_type, transformation)
+        if operation_type == 'merge':
+            # report merges of incompatible containers now, not on first use
+            try:
+                attribute.resolve(self._variant)
+            except CompositionError:
+                attribute.layers[self._variant].pop()
+                raise
+        if traced:
+            self.composition_tracer.log_new_value(operation=operation, new_value=transformation)
+
+    def _composition_key(self, role, base):
+        key = Composer._composition_key(self, role, base)
+        if key is None:
+            return None
+        return key + (self._variant,)
+
+    def _selection_key(self, feature_name):
+        return (feature_name, self._variant)
+
+    def _introduce(self, role, target_attrname, transformation, base):
+        if self._variant is None:
+            return Composer._introduce(self, role, target_attrname, transformation, base)
+        self._register('introduction', role, target_attrname, transformation, base)
+
+    def _refine(self, role, target_attrname, transformation, base):
+        if self._variant is None:
+            return Composer._refine(self, role, target_attrname, transformation, base)
+        self._register('refinement', role, target_attrname, transformation, base)
+
+    def _merge(self, role, target_attrname, transformation, base):
+        if self._variant is None:
+            return Composer._merge(self, role, target_attrname, transformation, base)
+        self._register('merge', role, target_attrname, transformation, base)
+
+    def _compose_on_import(self, module_name, fsts):
+        if self._variant is None:
+            return Composer._compose_on_import(self, module_name, fsts)
+        LazyComposerHook.add(module_name, fsts, _DeferredVariantComposition(
+            self, self._active_feature, self._variant
+        ))
@@ -0,0 +1,165 @@
+"""
+workers.py - replay the composed product in worker processes
+
+Worker processes started with the ``spawn`` or ``forkserver`` method import
+modules from scratch and thus see the *uncomposed* base. This module
+captures the active product of a composer - the selected features plus the
+compositions made outside of features - as plain data and replays it in each
+worker before it runs any task::
+
+    from featuremonkey.workers import ComposedContext
+
+    context = ComposedContext('spawn')
+    with context.executor(max_workers=4) as executor:
+        executor.map(task, items)
+
+    # or with multiprocessing.Pool
+    pool = context.Pool(4)
+
+After replaying, each worker verifies that every module composed in the
+parent is either composed or queued for composition. Modules that are
+imported but left uncomposed make the worker fail with a ``CompositionError``
+instead of silently running the wrong product.
+"""
+
+from __future__ import absolute_import
+
+import sys
+
+from .composer import CompositionError
+from .helpers import _get_object_ref, _resolve_object_ref
+from .importhooks import LazyComposerHook
+
+
+def snapshot(composer=None):
+    """
+    returns the product of ``composer`` (default: the default composer)
+    as picklable plain data.
+
+    Raises ``CompositionError`` if a composition made outside of a feature
+    cannot be replayed, e.g. because a role is defined inside a function,
+    a configured role instance cannot be pickled or the target is an instance.
+    """
+    if composer is None:
+        import featuremonkey
+        composer = featuremonkey._get_default_composer()
+    events = []
+    for kind, args in composer._product:
+        if kind in ('select', 'compose_package'):
+            events.append((kind, tuple(args)))
+            continue
+        refs = []
+        for index, thing in enumerate(args):
+            if kind == 'compose_later' and index == len(args) - 1:
+                # the module name
+                refs.append(('module', thing))
+                continue
+            ref = _get_object_ref(thing)
+            if ref is None or (index == len(args) - 1 and ref[0] == 'instance'):
+                raise CompositionError(
+                    'Cannot replay %s(%s) in worker processes: %r cannot be '
+                    'referenced by name or pickled' % (
+                        kind, ', '.join(repr(arg) for arg in args), thing
+                    )
+                )
+            refs.append(ref)
+        events.append((kind, tuple(refs)))
+    targets = set(composer._composed_modules)
+    for module_name, layers in LazyComposerHook._to_compose.items():
+        for _, deferred in layers:
+            if getattr(deferred, 'composer', None) is composer:
+                targets.add(module_name)
+    return dict(events=events, targets=sorted(targets))
+
+
+def replay(product, composer=None):
+    """
+    recreates the ``product`` captured by ``snapshot`` using ``composer``
+    (default: the default composer). returns the composer.
+    """
+    if composer is None:
+        import featuremonkey
+        composer = featuremonkey._get_default_composer()
+    for kind, args in product['events']:
+        if kind == 'select':
+            composer.select(*args)
+        elif kind == 'compose_package':
+            composer.compose_package(*args)
+        elif kind == 'compose_later':
+            module_name = args[-1][1]
+            if module_name in sys.modules:
+                raise CompositionError(
+                    'Cannot replay compose_later in worker: %s has been imported '
+                    'before the product was composed' % module_name
+                )
+            composer.compose_later(*(
+                [_resolve_object_ref(ref) for ref in args[:-1]] + [module_name]
+            ))
+        else:
+            composer.compose(*[_resolve_object_ref(ref) for ref in args])
+    return composer
+
+
+def verify(product, composer=None):
+    """
+    raises ``CompositionError`` if a module composed in the parent process
+    is left uncomposed by ``composer`` in this process.
+    """
+    if composer is None:
+        import featuremonkey
+        composer = featuremonkey._get_default_composer()
+    pending = set(LazyComposerHook._to_compose)
+    uncomposed = [
+        module_name for module_name in product['targets']
+        if module_name not in composer._composed_modules
+        and module_name not in pending
+    ]
+    if uncomposed:
+        raise CompositionError(
+            'Modules left uncomposed in worker process: %s' % ', '.join(uncomposed)
+        )
+
+
+def initialize_worker(product):
+    """
+    worker initializer: replays ``product`` and verifies the result
+    """
+    composer = replay(product)
+    verify(product, composer)
+
+
+class ComposedContext(object):
+    """
+    multiprocessing context whose pools replay the product of ``composer``
+    in every worker.
+
+    ``method`` is the start method (``'spawn'``, ``'forkserver'``, ``'fork'``
+    or ``None`` for the platform default). The product is captured when
+    the context is created. All other attributes are those of the
+    underlying multiprocessing context.
+    """
+
+    def __init__(self, method=None, composer=None):
+        import multiprocessing
+        self._context = multiprocessing.get_context(method)
+        self.product = snapshot(composer)
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+    def Pool(self, processes=None, *args, **kws):
+        return self._context.Pool(
+            processes, initialize_worker, (self.product,), *args, **kws
+        )
+
+    def executor(self, max_workers=None):
+        """
+        returns a ``concurrent.futures.ProcessPoolExecutor`` using this context
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(
+            max_workers,
+            mp_context=self._context,
+            initializer=initialize_worker,
+            initargs=(self.product,),
+        )
@@ -1,7 +1,7 @@
 #! /usr/bin/env python
 import os
 
-DEPS = ['six']
+DEPS = []
 
 try:
     import importlib
@@ -37,11 +37,11 @@ setup(
     author_email='hendrik@schnapptack.de',
     license="MIT License",
     keywords='fop, features, program composition, program synthesis, monkey-patching',
-    packages=['featuremonkey', 'featuremonkey.test', 'featuremonkey.test.mock', 'featuremonkey.test.mock.testpackage1', 'featuremonkey.tracing'],
+    packages=['featuremonkey', 'featuremonkey.test', 'featuremonkey.test.mock', 'featuremonkey.test.mock.testpackage1', 'featuremonkey.test.mock.mirrorbase', 'featuremonkey.test.mock.mirrorbase.sub', 'featuremonkey.test.mock.mirrorfeature', 'featuremonkey.test.mock.mirrorfeature.sub', 'featuremonkey.test.mock.conflictfeature', 'featuremonkey.test.mock.badselectfeature', 'featuremonkey.test.mock.staticfeature', 'featuremonkey.test.mock.clifeature', 'featuremonkey.tracing'],
     package_dir={'featuremonkey': 'featuremonkey'},
     package_data={'featuremonkey': []},
     include_package_data=True,
-    scripts=['bin/test_featuremonkey'],
+    scripts=['bin/test_featuremonkey', 'bin/featuremonkey'],
     classifiers=[
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python',